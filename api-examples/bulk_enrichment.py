@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Bulk Enrichment Helpers
+Runs per-user lookups (MFA factors, group membership) on a bounded worker
+pool with a per-provider request rate cap, streaming results as they finish
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+
+class RateLimiter:
+    """Thread-safe token bucket capping requests per second for one provider"""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until ``tokens`` requests may be sent"""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Take the tokens now, going negative if needed, so waiting
+            # callers are served in order instead of racing for refills
+            self._tokens -= tokens
+            wait_for = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait_for > 0:
+            self.sleep(wait_for)
+
+
+def bulk_enrich(
+    items: Iterable[Any],
+    lookup: Callable[[Any], Any],
+    max_workers: int = 16,
+    rate_limiter: Optional[RateLimiter] = None,
+    cost: float = 1.0,
+    max_pending: Optional[int] = None,
+) -> Iterator[Tuple[Any, Any]]:
+    """Yield ``(item, lookup(item))`` in completion order.
+
+    At most ``max_pending`` items (default twice ``max_workers``) are read
+    ahead of the consumer, so arbitrarily large user iterators stream with
+    bounded memory. Each lookup first takes ``cost`` tokens from the
+    provider's rate limiter.
+    """
+    max_pending = max_pending or max_workers * 2
+
+    def call(item):
+        if rate_limiter is not None:
+            rate_limiter.acquire(cost)
+        return lookup(item)
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="enrich")
+    pending = {}
+    try:
+        for item in items:
+            pending[pool.submit(call, item)] = item
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+    finally:
+        # Stop queued lookups if the consumer gives up early;
+        # shutdown(cancel_futures=...) needs Python 3.9, so cancel by hand
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
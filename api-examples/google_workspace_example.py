@@ -7,8 +7,12 @@ Demonstrates how to integrate with Google Workspace APIs
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from google_service_factory import GoogleServiceFactory  # noqa: E402
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,6 +29,7 @@ class GoogleWorkspaceAPIExample:
     def __init__(self, credentials_file='credentials.json'):
         self.credentials_file = credentials_file
         self.credentials = None
+        self.services = None
         self.admin_service = None
         self.gmail_service = None
         self.drive_service = None
@@ -35,6 +40,7 @@ class GoogleWorkspaceAPIExample:
             flow = InstalledAppFlow.from_client_secrets_file(
                 self.credentials_file, self.SCOPES)
             self.credentials = flow.run_local_server(port=0)
+            self.services = GoogleServiceFactory(self.credentials)
             logger.info("Authentication successful")
         except Exception as e:
             logger.error(f"Authentication failed: {str(e)}")
@@ -43,8 +49,7 @@ class GoogleWorkspaceAPIExample:
         """List users in the organization"""
         try:
             if not self.admin_service:
-                self.admin_service = build('admin', 'directory_v1',
-                                          credentials=self.credentials)
+                self.admin_service = self.services.service('admin', 'directory_v1')
             
             results = self.admin_service.users().list(
                 customer=customer,
@@ -63,8 +68,7 @@ class GoogleWorkspaceAPIExample:
         """Get specific user details"""
         try:
             if not self.admin_service:
-                self.admin_service = build('admin', 'directory_v1',
-                                          credentials=self.credentials)
+                self.admin_service = self.services.service('admin', 'directory_v1')
             
             user = self.admin_service.users().get(userKey=user_key).execute()
             logger.info(f"Retrieved user: {user.get('primaryEmail')}")
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Microsoft Graph Directory Sync
+Keeps a compact local SQLite copy of users, groups and memberships current
+with /users/delta and /groups/delta, so each sync downloads only changes
+"""
+
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+import requests
+
+# Graph property -> local column
+USER_FIELDS = {
+    "displayName": "display_name",
+    "mail": "mail",
+    "userPrincipalName": "user_principal_name",
+    "accountEnabled": "account_enabled",
+}
+GROUP_FIELDS = {
+    "displayName": "display_name",
+    "mail": "mail",
+}
+
+
+class DirectoryStore:
+    """SQLite store for directory objects and their delta tokens"""
+
+    def __init__(self, path: str = "graph_directory.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS delta_state (
+                resource TEXT PRIMARY KEY,
+                delta_link TEXT,
+                generation INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS users (
+                id TEXT PRIMARY KEY,
+                display_name TEXT,
+                mail TEXT COLLATE NOCASE,
+                user_principal_name TEXT COLLATE NOCASE,
+                account_enabled INTEGER,
+                sync_gen INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_users_upn ON users (user_principal_name);
+            CREATE INDEX IF NOT EXISTS idx_users_mail ON users (mail);
+            CREATE TABLE IF NOT EXISTS groups (
+                id TEXT PRIMARY KEY,
+                display_name TEXT,
+                mail TEXT COLLATE NOCASE,
+                sync_gen INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS group_members (
+                group_id TEXT NOT NULL,
+                member_id TEXT NOT NULL,
+                sync_gen INTEGER NOT NULL,
+                PRIMARY KEY (group_id, member_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_group_members_member
+                ON group_members (member_id);
+        """)
+
+    def get_delta_state(self, resource: str) -> Dict:
+        """Return the saved delta link (None until a full sync completes) and generation"""
+        row = self.conn.execute(
+            "SELECT delta_link, generation FROM delta_state WHERE resource = ?",
+            (resource,),
+        ).fetchone()
+        return {"delta_link": row[0], "generation": row[1]} if row else {"delta_link": None, "generation": 0}
+
+    def save_delta_link(
+        self, resource: str, delta_link: Optional[str], generation: int
+    ):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO delta_state (resource, delta_link, generation, updated_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(resource) DO UPDATE SET "
+                "delta_link = excluded.delta_link, generation = excluded.generation, "
+                "updated_at = excluded.updated_at",
+                (resource, delta_link, generation, datetime.now(timezone.utc).isoformat()),
+            )
+
+    def _upsert(self, table: str, fields: Dict[str, str], item: Dict, generation: int):
+        # Delta updates may carry only the changed properties; leave the rest alone
+        columns = ["id", "sync_gen"]
+        values = [item["id"], generation]
+        for prop, column in fields.items():
+            if prop in item:
+                columns.append(column)
+                value = item[prop]
+                values.append(int(value) if isinstance(value, bool) else value)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+        self.conn.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}",
+            values,
+        )
+
+    def apply_users(self, items: List[Dict], generation: int) -> Dict[str, int]:
+        """Apply one page of /users/delta results"""
+        upserted = removed = 0
+        with self.conn:
+            for item in items:
+                if "@removed" in item:
+                    self.conn.execute("DELETE FROM users WHERE id = ?", (item["id"],))
+                    self.conn.execute("DELETE FROM group_members WHERE member_id = ?", (item["id"],))
+                    removed += 1
+                else:
+                    self._upsert("users", USER_FIELDS, item, generation)
+                    upserted += 1
+        return {"upserted": upserted, "removed": removed}
+
+    def apply_groups(self, items: List[Dict], generation: int) -> Dict[str, int]:
+        """Apply one page of /groups/delta results, including members@delta"""
+        upserted = removed = 0
+        with self.conn:
+            for item in items:
+                group_id = item["id"]
+                if "@removed" in item:
+                    self.conn.execute("DELETE FROM groups WHERE id = ?", (group_id,))
+                    self.conn.execute("DELETE FROM group_members WHERE group_id = ?", (group_id,))
+                    removed += 1
+                    continue
+                self._upsert("groups", GROUP_FIELDS, item, generation)
+                upserted += 1
+                for member in item.get("members@delta", []):
+                    if "@removed" in member:
+                        self.conn.execute(
+                            "DELETE FROM group_members WHERE group_id = ? AND member_id = ?",
+                            (group_id, member["id"]),
+                        )
+                    else:
+                        self.conn.execute(
+                            "INSERT INTO group_members (group_id, member_id, sync_gen) VALUES (?, ?, ?) "
+                            "ON CONFLICT(group_id, member_id) DO UPDATE SET sync_gen = excluded.sync_gen",
+                            (group_id, member["id"], generation),
+                        )
+        return {"upserted": upserted, "removed": removed}
+
+    def sweep(self, tables: List[str], generation: int) -> int:
+        """Delete rows a completed full sync did not see"""
+        deleted = 0
+        with self.conn:
+            for table in tables:
+                deleted += self.conn.execute(
+                    f"DELETE FROM {table} WHERE sync_gen < ?", (generation,)
+                ).rowcount
+        return deleted
+
+    @staticmethod
+    def _user_dict(row) -> Dict:
+        return {
+            "id": row[0],
+            "displayName": row[1],
+            "mail": row[2],
+            "userPrincipalName": row[3],
+            "accountEnabled": None if row[4] is None else bool(row[4]),
+        }
+
+    _USER_COLUMNS = "id, display_name, mail, user_principal_name, account_enabled"
+
+    def get_user(self, user_id: str) -> Optional[Dict]:
+        row = self.conn.execute(
+            f"SELECT {self._USER_COLUMNS} FROM users WHERE id = ?", (user_id,)
+        ).fetchone()
+        return self._user_dict(row) if row else None
+
+    def find_user(self, login: str) -> Optional[Dict]:
+        """Look a user up by UPN or mail, case-insensitively"""
+        row = self.conn.execute(
+            f"SELECT {self._USER_COLUMNS} FROM users WHERE user_principal_name = ? "
+            f"UNION SELECT {self._USER_COLUMNS} FROM users WHERE mail = ? LIMIT 1",
+            (login, login),
+        ).fetchone()
+        return self._user_dict(row) if row else None
+
+    def iter_users(self, enabled_only: bool = False) -> Iterator[Dict]:
+        query = f"SELECT {self._USER_COLUMNS} FROM users"
+        if enabled_only:
+            query += " WHERE account_enabled = 1"
+        for row in self.conn.execute(query + " ORDER BY id"):
+            yield self._user_dict(row)
+
+    def count_users(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def get_group_members(self, group_id: str) -> List[str]:
+        rows = self.conn.execute(
+            "SELECT member_id FROM group_members WHERE group_id = ? ORDER BY member_id",
+            (group_id,),
+        )
+        return [row[0] for row in rows]
+
+    def get_user_groups(self, user_id: str) -> List[Dict]:
+        rows = self.conn.execute(
+            "SELECT g.id, g.display_name, g.mail FROM group_members m "
+            "JOIN groups g ON g.id = m.group_id WHERE m.member_id = ? ORDER BY g.id",
+            (user_id,),
+        )
+        return [{"id": row[0], "displayName": row[1], "mail": row[2]} for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+class GraphDirectorySync:
+    """Sync users and groups from Graph delta queries into a DirectoryStore"""
+
+    RESOURCES = {
+        "users": {
+            "url": "/users/delta",
+            "params": {"$select": ",".join(USER_FIELDS)},
+            "tables": ["users"],
+        },
+        "groups": {
+            "url": "/groups/delta",
+            "params": {"$select": ",".join([*GROUP_FIELDS, "members"])},
+            "tables": ["groups", "group_members"],
+        },
+    }
+
+    def __init__(self, graph, store: DirectoryStore):
+        """``graph`` is a MicrosoftGraphIntegration (anything with delta_pages)"""
+        self.graph = graph
+        self.store = store
+
+    def sync_resource(self, resource: str) -> Dict:
+        """Run one delta round; the token is only saved once the round completes
+
+        Without a saved token (or after it expires) a full sync runs and rows
+        it did not return are deleted afterwards.
+        """
+        spec = self.RESOURCES[resource]
+        apply = self.store.apply_users if resource == "users" else self.store.apply_groups
+        state = self.store.get_delta_state(resource)
+        full_sync = state["delta_link"] is None
+        stats = {"full_sync": full_sync, "pages": 0, "upserted": 0, "removed": 0}
+
+        try:
+            delta_link = self._run(state, spec, apply, stats)
+        except requests.exceptions.HTTPError as e:
+            if full_sync or e.response is None or e.response.status_code != 410:
+                raise
+            print(f"Delta token for {resource} expired, running a full sync")
+            self.store.save_delta_link(resource, None, state["generation"])
+            return self.sync_resource(resource)
+
+        if full_sync:
+            stats["removed"] += self.store.sweep(spec["tables"], state["generation"] + 1)
+            self.store.save_delta_link(resource, delta_link, state["generation"] + 1)
+        else:
+            self.store.save_delta_link(resource, delta_link, state["generation"])
+        return stats
+
+    def _run(self, state: Dict, spec: Dict, apply, stats: Dict) -> Optional[str]:
+        if state["delta_link"] is None:
+            # A full sync tags rows with the next generation so the sweep can
+            # tell them from rows that have disappeared
+            url, params, generation = spec["url"], spec["params"], state["generation"] + 1
+        else:
+            url, params, generation = state["delta_link"], None, state["generation"]
+
+        delta_link = None
+        for items, delta_link in self.graph.delta_pages(url, params):
+            counts = apply(items, generation)
+            stats["pages"] += 1
+            stats["upserted"] += counts["upserted"]
+            stats["removed"] += counts["removed"]
+        return delta_link
+
+    def sync(self) -> Dict[str, Dict]:
+        """Sync users then groups, returning per-resource counts"""
+        results = {}
+        for resource in self.RESOURCES:
+            try:
+                results[resource] = self.sync_resource(resource)
+            except Exception as e:
+                print(f"Error syncing {resource}: {str(e)}")
+                results[resource] = {"error": str(e)}
+        return results
@@ -5,13 +5,43 @@ Demonstrates how to integrate with Microsoft 365 services via Graph API
 """
 
 import os
+import heapq
 import json
+import time
+from itertools import islice
 import requests
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from azure.identity import ClientSecretCredential
 from msgraph.core import GraphClient
 
+from bulk_enrichment import RateLimiter, bulk_enrich
+
+
+# JSON batching accepts at most 20 sub-requests per call
+MAX_BATCH_SIZE = 20
+THROTTLED_STATUSES = (429, 503, 504)
+
+
+def retry_after_seconds(value: Optional[str], default: float) -> float:
+    """Parse a Retry-After header given in seconds or as an HTTP-date"""
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if retry_at is None:
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
 
 class MicrosoftGraphIntegration:
     """Integration client for Microsoft Graph API"""
@@ -39,95 +69,136 @@ class MicrosoftGraphIntegration:
         # Initialize Graph client
         self.client = GraphClient(credential=self.credential)
 
-    def get_users(self, filter_query: Optional[str] = None) -> List[Dict]:
-        """Get list of users from Azure AD"""
-        try:
-            endpoint = "/users"
-            query_params = {}
-
-            if filter_query:
-                query_params["$filter"] = filter_query
-
-            query_params["$select"] = "id,displayName,mail,userPrincipalName,accountEnabled"
-
-            response = self.client.get(endpoint, params=query_params)
-            return response.json().get("value", [])
-        except Exception as e:
-            print(f"Error fetching users: {str(e)}")
-            return []
-
-    def get_security_alerts(self, days_back: int = 7) -> List[Dict]:
-        """Get security alerts from the last N days"""
+    def _paginate(
+        self, endpoint: str, params: Optional[Dict] = None
+    ) -> Iterator[Dict]:
+        """Yield items from every page, following @odata.nextLink lazily"""
+        url = endpoint
         try:
-            since_date = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
-            filter_query = f"createdDateTime gt {since_date}Z"
-
-            endpoint = "/security/alerts_v2"
-            query_params = {
-                "$filter": filter_query,
-                "$select": "id,createdDateTime,title,severity,category,status",
-                "$top": 100,
-            }
-
-            response = self.client.get(endpoint, params=query_params)
-            return response.json().get("value", [])
+            while url:
+                data = self.client.get(url, params=params).json()
+                yield from data.get("value", [])
+                # nextLink is absolute and already carries the query and skip token
+                url = data.get("@odata.nextLink")
+                params = None
         except Exception as e:
-            print(f"Error fetching security alerts: {str(e)}")
-            return []
+            print(f"Error paginating {endpoint}: {str(e)}")
+
+    def delta_pages(
+        self, url: str, params: Optional[Dict] = None
+    ) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+        """Yield ``(items, delta_link)`` for each page of a delta query
+
+        ``delta_link`` is only set on the last page. Errors are raised
+        rather than swallowed so callers never persist a partial round; an
+        expired token surfaces as an HTTPError with status 410.
+        """
+        while url:
+            response = self.client.get(url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            delta_link = data.get("@odata.deltaLink")
+            yield data.get("value", []), delta_link
+            url = data.get("@odata.nextLink")
+            params = None
+
+    @staticmethod
+    def _user_params(filter_query: Optional[str] = None) -> Dict:
+        query_params = {}
+        if filter_query:
+            query_params["$filter"] = filter_query
+        query_params["$select"] = "id,displayName,mail,userPrincipalName,accountEnabled"
+        return query_params
+
+    @staticmethod
+    def _security_alert_params(days_back: int, top: int) -> Dict:
+        since_date = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
+        return {
+            "$filter": f"createdDateTime gt {since_date}Z",
+            "$select": "id,createdDateTime,title,severity,category,status",
+            "$top": top,
+        }
+
+    @staticmethod
+    def _audit_log_params(
+        activity_type: Optional[str], days_back: int, top: int
+    ) -> Dict:
+        since_date = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
+        filter_parts = [f"activityDateTime gt {since_date}Z"]
+        if activity_type:
+            filter_parts.append(f"activityDisplayName eq '{activity_type}'")
+        return {
+            "$filter": " and ".join(filter_parts),
+            "$select": "id,activityDateTime,activityDisplayName,result,userDisplayName,targetResources",
+            "$top": top,
+        }
+
+    def get_users(
+        self, filter_query: Optional[str] = None, max_results: Optional[int] = None
+    ) -> List[Dict]:
+        """Get list of users from Azure AD, following every page"""
+        return list(islice(self.iter_users(filter_query), max_results))
+
+    def iter_users(
+        self, filter_query: Optional[str] = None, page_size: int = 999
+    ) -> Iterator[Dict]:
+        """Iterate over every user in Azure AD"""
+        query_params = self._user_params(filter_query)
+        query_params["$top"] = page_size
+        return self._paginate("/users", query_params)
+
+    def get_security_alerts(
+        self, days_back: int = 7, max_results: Optional[int] = None
+    ) -> List[Dict]:
+        """Get security alerts from the last N days, following every page"""
+        return list(islice(self.iter_security_alerts(days_back), max_results))
+
+    def iter_security_alerts(
+        self, days_back: int = 7, page_size: int = 100
+    ) -> Iterator[Dict]:
+        """Iterate over every security alert from the last N days"""
+        return self._paginate(
+            "/security/alerts_v2", self._security_alert_params(days_back, page_size)
+        )
 
     def get_audit_logs(
-        self, activity_type: Optional[str] = None, days_back: int = 7
+        self,
+        activity_type: Optional[str] = None,
+        days_back: int = 7,
+        max_results: Optional[int] = None,
     ) -> List[Dict]:
-        """Get audit logs from Directory"""
-        try:
-            since_date = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
-            filter_parts = [f"activityDateTime gt {since_date}Z"]
-
-            if activity_type:
-                filter_parts.append(f"activityDisplayName eq '{activity_type}'")
-
-            filter_query = " and ".join(filter_parts)
-
-            endpoint = "/auditLogs/directoryAudits"
-            query_params = {
-                "$filter": filter_query,
-                "$select": "id,activityDateTime,activityDisplayName,result,userDisplayName,targetResources",
-                "$top": 100,
-            }
+        """Get audit logs from Directory, following every page"""
+        return list(
+            islice(self.iter_audit_logs(activity_type, days_back), max_results)
+        )
 
-            response = self.client.get(endpoint, params=query_params)
-            return response.json().get("value", [])
-        except Exception as e:
-            print(f"Error fetching audit logs: {str(e)}")
-            return []
+    def iter_audit_logs(
+        self,
+        activity_type: Optional[str] = None,
+        days_back: int = 7,
+        page_size: int = 999,
+    ) -> Iterator[Dict]:
+        """Iterate over every directory audit event from the last N days"""
+        return self._paginate(
+            "/auditLogs/directoryAudits",
+            self._audit_log_params(activity_type, days_back, page_size),
+        )
 
     def get_device_compliance_status(self) -> List[Dict]:
         """Get device compliance status for Intune managed devices"""
-        try:
-            endpoint = "/deviceManagement/deviceCompliancePolicies"
-            query_params = {
-                "$select": "id,displayName,createdDateTime,lastModifiedDateTime"
-            }
-
-            response = self.client.get(endpoint, params=query_params)
-            return response.json().get("value", [])
-        except Exception as e:
-            print(f"Error fetching device compliance: {str(e)}")
-            return []
+        query_params = {
+            "$select": "id,displayName,createdDateTime,lastModifiedDateTime"
+        }
+        return list(
+            self._paginate("/deviceManagement/deviceCompliancePolicies", query_params)
+        )
 
     def get_conditional_access_policies(self) -> List[Dict]:
         """Get Conditional Access policies"""
-        try:
-            endpoint = "/identity/conditionalAccess/policies"
-            query_params = {
-                "$select": "id,displayName,createdDateTime,state,conditions"
-            }
-
-            response = self.client.get(endpoint, params=query_params)
-            return response.json().get("value", [])
-        except Exception as e:
-            print(f"Error fetching CA policies: {str(e)}")
-            return []
+        query_params = {"$select": "id,displayName,createdDateTime,state,conditions"}
+        return list(
+            self._paginate("/identity/conditionalAccess/policies", query_params)
+        )
 
     def check_mfa_status(self, user_id: str) -> Dict:
         """Check MFA status for a specific user"""
@@ -135,15 +206,137 @@ class MicrosoftGraphIntegration:
             endpoint = f"/users/{user_id}/authentication/methods"
 
             response = self.client.get(endpoint)
-            methods = response.json().get("value", [])
-
-            mfa_methods = [m for m in methods if m["@odata.type"] != "#microsoft.graph.passwordAuthenticationMethod"]
-
-            return {"user_id": user_id, "mfa_enabled": len(mfa_methods) > 0, "methods": mfa_methods}
+            return self._mfa_summary(user_id, response.json().get("value", []))
         except Exception as e:
             print(f"Error checking MFA status: {str(e)}")
             return {"user_id": user_id, "mfa_enabled": False, "error": str(e)}
 
+    @staticmethod
+    def _mfa_summary(user_id: str, methods: List[Dict]) -> Dict:
+        mfa_methods = [m for m in methods if m["@odata.type"] != "#microsoft.graph.passwordAuthenticationMethod"]
+        return {"user_id": user_id, "mfa_enabled": len(mfa_methods) > 0, "methods": mfa_methods}
+
+    def _post_batch(self, requests_: List[Dict], max_retries: int):
+        """POST one $batch call, backing off while the whole call is throttled"""
+        for attempt in range(max_retries + 1):
+            response = self.client.post("/$batch", json={"requests": requests_})
+            if response.status_code not in THROTTLED_STATUSES or attempt == max_retries:
+                return response
+            delay = retry_after_seconds(response.headers.get("Retry-After"), 2 ** attempt)
+            print(f"$batch call throttled ({response.status_code}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+        return response
+
+    def batch_requests(
+        self, sub_requests: Iterable[Dict], max_retries: int = 3
+    ) -> Iterator[Dict]:
+        """Send sub-requests through $batch, up to 20 per call
+
+        Each sub-request is ``{"id", "method", "url"}`` with a URL relative
+        to the API version. Responses are yielded as they arrive. Throttled
+        items are retried after their own Retry-After while other items keep
+        flowing, as are sub-requests missing from the response; after
+        ``max_retries`` the last response (status 0 if none) is yielded as-is.
+        A throttled $batch call itself is retried with backoff before its
+        items are reported as failed.
+        """
+        pending = iter(sub_requests)
+        retries: List = []  # heap of (ready_at, sequence, attempt, request)
+        sequence = 0
+        exhausted = False
+
+        while not exhausted or retries:
+            batch = []
+            now = time.monotonic()
+            while retries and retries[0][0] <= now and len(batch) < MAX_BATCH_SIZE:
+                _, _, attempt, request = heapq.heappop(retries)
+                batch.append((attempt, request))
+            while not exhausted and len(batch) < MAX_BATCH_SIZE:
+                request = next(pending, None)
+                if request is None:
+                    exhausted = True
+                else:
+                    batch.append((0, request))
+
+            if not batch:
+                time.sleep(max(0.0, retries[0][0] - time.monotonic()))
+                continue
+
+            attempts = {request["id"]: (attempt, request) for attempt, request in batch}
+            try:
+                response = self._post_batch(
+                    [request for _, request in batch], max_retries
+                )
+                response.raise_for_status()
+                responses = response.json().get("responses", [])
+            except Exception as e:
+                print(f"Error sending batch request: {str(e)}")
+                responses = [
+                    {"id": request_id, "status": 0, "body": {"error": str(e)}}
+                    for request_id in attempts
+                ]
+
+            # Sub-requests the response leaves out are failures, not successes
+            responses = [item for item in responses if item.get("id") in attempts]
+            answered = {item["id"] for item in responses}
+            missing = [request_id for request_id in attempts if request_id not in answered]
+            responses += [
+                {"id": request_id, "status": 0, "body": {"error": "missing from $batch response"}}
+                for request_id in missing
+            ]
+
+            for item in responses:
+                attempt, request = attempts[item["id"]]
+                retryable = item.get("status") in THROTTLED_STATUSES or item["id"] in missing
+                if retryable and attempt < max_retries:
+                    headers = item.get("headers") or {}
+                    delay = retry_after_seconds(headers.get("Retry-After"), 2 ** attempt)
+                    sequence += 1
+                    heapq.heappush(
+                        retries, (time.monotonic() + delay, sequence, attempt + 1, request)
+                    )
+                else:
+                    yield item
+
+    def iter_mfa_status_batched(
+        self, users: Iterable[Union[str, Dict]]
+    ) -> Iterator[Dict]:
+        """Stream MFA status for many users using $batch, 20 users per call"""
+        user_ids: Dict[str, str] = {}
+
+        def sub_requests():
+            for index, user in enumerate(users):
+                user_id = user["id"] if isinstance(user, dict) else user
+                user_ids[str(index)] = user_id
+                yield {
+                    "id": str(index),
+                    "method": "GET",
+                    "url": f"/users/{user_id}/authentication/methods",
+                }
+
+        for item in self.batch_requests(sub_requests()):
+            user_id = user_ids.pop(item["id"])
+            body = item.get("body") or {}
+            if item.get("status") == 200:
+                yield self._mfa_summary(user_id, body.get("value", []))
+            else:
+                error = body.get("error", f"HTTP {item.get('status')}")
+                yield {"user_id": user_id, "mfa_enabled": False, "error": str(error)}
+
+    def iter_mfa_status(
+        self,
+        users: Iterable[Union[str, Dict]],
+        max_workers: int = 16,
+        requests_per_second: Optional[float] = None,
+    ) -> Iterator[Dict]:
+        """Stream check_mfa_status for many users (ids or user dicts) in parallel"""
+        limiter = RateLimiter(requests_per_second) if requests_per_second else None
+        user_ids = (user["id"] if isinstance(user, dict) else user for user in users)
+        for _, status in bulk_enrich(
+            user_ids, self.check_mfa_status, max_workers=max_workers, rate_limiter=limiter
+        ):
+            yield status
+
 
 def main():
     """Example usage of Microsoft Graph integration"""
@@ -6,40 +6,227 @@ Demonstrates how to integrate with Okta for identity and access management
 
 import os
 import json
+import threading
+import time
 import requests
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+from bulk_enrichment import RateLimiter, bulk_enrich
+
+
+class OktaRateLimiter:
+    """Pace requests per Okta rate-limit bucket using the X-Rate-Limit headers.
+
+    Requests run freely while more than half of a bucket's window remains;
+    below that the remaining quota is spread evenly until the window resets,
+    and an exhausted bucket waits for the reset instead of drawing a 429.
+    """
+
+    def __init__(
+        self,
+        safety_margin: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.safety_margin = safety_margin
+        self.clock = clock
+        self.sleep = sleep
+        self._buckets: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bucket(method: str, url: str) -> str:
+        """Bucket key: method plus the API path with ids replaced by {id}"""
+        path = urlsplit(url).path
+        if path.startswith("/api/v1"):
+            path = path[len("/api/v1"):]
+        segments = [segment for segment in path.split("/") if segment]
+        # /users/{id}/factors: resource names sit at even positions
+        normalized = [
+            segment if i % 2 == 0 else "{id}" for i, segment in enumerate(segments)
+        ]
+        return f"{method.upper()} /{'/'.join(normalized)}"
+
+    def acquire(self, bucket: str):
+        """Block until a request in ``bucket`` may be sent"""
+        while True:
+            with self._lock:
+                state = self._buckets.get(bucket)
+                now = self.clock()
+                if state is None or now >= state["reset_at"]:
+                    return
+                remaining = state["remaining"]
+                if remaining > self.safety_margin:
+                    start = now
+                    if remaining * 2 < state["limit"]:
+                        start = max(now, state["next_at"])
+                        state["next_at"] = start + (state["reset_at"] - start) / remaining
+                    state["remaining"] -= 1
+                    wait, granted = start - now, True
+                else:
+                    wait, granted = state["reset_at"] - now, False
+            if wait > 0:
+                self.sleep(wait)
+            if granted:
+                return
+
+    def update(self, bucket: str, response: requests.Response):
+        """Record the quota reported by ``response`` for ``bucket``"""
+        headers = response.headers
+        try:
+            limit = int(headers["X-Rate-Limit-Limit"])
+            remaining = int(headers["X-Rate-Limit-Remaining"])
+            reset = int(headers["X-Rate-Limit-Reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        # Reset is an epoch timestamp; measure it against the server clock
+        server_now = time.time()
+        if headers.get("Date"):
+            try:
+                server_now = parsedate_to_datetime(headers["Date"]).timestamp()
+            except (TypeError, ValueError):
+                pass
+        now = self.clock()
+        reset_at = now + max(0.0, reset - server_now)
+
+        with self._lock:
+            state = self._buckets.get(bucket)
+            if state is None or abs(state["reset_at"] - reset_at) >= 1:
+                self._buckets[bucket] = {
+                    "limit": limit,
+                    "remaining": remaining,
+                    "reset_at": reset_at,
+                    "next_at": now,
+                }
+            else:
+                # Same window: responses can arrive out of order, keep the lower count
+                state["remaining"] = min(state["remaining"], remaining)
+
+    def retry_delay(self, bucket: str) -> float:
+        """Seconds until ``bucket`` resets, for retrying after a 429"""
+        with self._lock:
+            state = self._buckets.get(bucket)
+            if state is None:
+                return 1.0
+            state["remaining"] = 0
+            return max(0.0, state["reset_at"] - self.clock())
 
 
 class OktaIntegration:
     """Integration client for Okta API"""
 
-    def __init__(self, org_url: str, api_token: str):
-        """Initialize Okta client with credentials"""
+    def __init__(
+        self,
+        org_url: str,
+        api_token: str,
+        pool_size: int = 20,
+        max_concurrency: int = 8,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        rate_limiter: Optional[OktaRateLimiter] = None,
+        max_rate_limit_retries: int = 3,
+    ):
+        """Initialize Okta client with credentials and a pooled session"""
         self.org_url = org_url.rstrip("/")
         self.api_token = api_token
         self.base_url = f"{self.org_url}/api/v1"
         self.headers = {
             "Authorization": f"SSWS {api_token}",
             "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
             "Content-Type": "application/json",
         }
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter or OktaRateLimiter()
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+        self.session = self._build_session(pool_size)
+
+    def _build_session(self, pool_size: int) -> requests.Session:
+        """Build a keep-alive session so calls reuse pooled TLS connections"""
+        session = requests.Session()
+        # pool_block keeps the pool at pool_size instead of opening
+        # throwaway connections when every slot is busy
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=pool_size, pool_block=True
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self.headers)
+        return session
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Concurrency limiter shared by every call to the same host"""
+        host = urlsplit(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(
+                    self.max_concurrency
+                )
+            return self._host_slots[host]
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a rate-limited request, waiting out any 429 until the bucket resets"""
+        kwargs.setdefault("timeout", self.timeout)
+        bucket = self.rate_limiter.bucket(method, url)
+        for attempt in range(self.max_rate_limit_retries + 1):
+            self.rate_limiter.acquire(bucket)
+            with self._host_slot(url):
+                response = self.session.request(method, url, **kwargs)
+            self.rate_limiter.update(bucket, response)
+            if response.status_code != 429 or attempt == self.max_rate_limit_retries:
+                break
+            self.rate_limiter.sleep(self.rate_limiter.retry_delay(bucket))
+        response.raise_for_status()
+        return response
 
     def _request(
         self, method: str, endpoint: str, **kwargs
     ) -> Optional[Dict]:
         """Make HTTP request to Okta API"""
         try:
-            url = f"{self.base_url}{endpoint}"
-            response = requests.request(
-                method, url, headers=self.headers, **kwargs
-            )
-            response.raise_for_status()
+            response = self._send(method, f"{self.base_url}{endpoint}", **kwargs)
             return response.json() if response.content else None
         except requests.exceptions.RequestException as e:
             print(f"Error making request: {str(e)}")
             return None
 
+    def _paginate(
+        self, endpoint: str, params: Optional[Dict] = None
+    ) -> Iterator[Dict]:
+        """Yield items from every page, following Link: rel="next" lazily"""
+        url = f"{self.base_url}{endpoint}"
+        try:
+            while url:
+                response = self._send("GET", url, params=params)
+                items = response.json() if response.content else []
+                # Polling endpoints such as /logs keep returning a next link
+                if not items:
+                    return
+                yield from items
+                # The next link already carries the cursor and original query
+                url = response.links.get("next", {}).get("url")
+                params = None
+        except requests.exceptions.RequestException as e:
+            print(f"Error paginating {endpoint}: {str(e)}")
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+    def __enter__(self) -> "OktaIntegration":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
     def list_users(
         self, filter_query: Optional[str] = None, limit: int = 20
     ) -> List[Dict]:
@@ -55,6 +242,15 @@ class OktaIntegration:
             print(f"Error listing users: {str(e)}")
             return []
 
+    def iter_users(
+        self, filter_query: Optional[str] = None, page_size: int = 200
+    ) -> Iterator[Dict]:
+        """Iterate over every user in Okta"""
+        params = {"limit": page_size}
+        if filter_query:
+            params["filter"] = filter_query
+        return self._paginate("/users", params)
+
     def get_user_details(self, user_id: str) -> Optional[Dict]:
         """Get detailed information for a specific user"""
         try:
@@ -101,6 +297,39 @@ class OktaIntegration:
             print(f"Error listing MFA devices: {str(e)}")
             return []
 
+    def enrich_users(
+        self,
+        users: Iterable[Dict],
+        max_workers: int = 16,
+        requests_per_second: Optional[float] = None,
+        include_groups: bool = True,
+    ) -> Iterator[Dict]:
+        """Stream MFA factors (and groups) for each user, in completion order
+
+        Lookups run on a bounded pool; in-flight requests are further capped
+        by ``max_concurrency`` and paced by the rate-limit scheduler.
+        """
+        limiter = RateLimiter(requests_per_second) if requests_per_second else None
+
+        def lookup(user: Dict) -> Dict:
+            result = {
+                "user_id": user.get("id"),
+                "login": user.get("profile", {}).get("login"),
+                "factors": self.list_mfa_devices(user["id"]),
+            }
+            if include_groups:
+                result["groups"] = self.list_user_groups(user["id"])
+            return result
+
+        for _, result in bulk_enrich(
+            users,
+            lookup,
+            max_workers=max_workers,
+            rate_limiter=limiter,
+            cost=2 if include_groups else 1,
+        ):
+            yield result
+
     def list_applications(self, limit: int = 20) -> List[Dict]:
         """List all applications in the organization"""
         try:
@@ -111,6 +340,10 @@ class OktaIntegration:
             print(f"Error listing applications: {str(e)}")
             return []
 
+    def iter_applications(self, page_size: int = 200) -> Iterator[Dict]:
+        """Iterate over every application in the organization"""
+        return self._paginate("/apps", {"limit": page_size})
+
     def get_app_users(self, app_id: str, limit: int = 20) -> List[Dict]:
         """Get users assigned to an application"""
         try:
@@ -123,6 +356,10 @@ class OktaIntegration:
             print(f"Error getting app users: {str(e)}")
             return []
 
+    def iter_app_users(self, app_id: str, page_size: int = 500) -> Iterator[Dict]:
+        """Iterate over every user assigned to an application"""
+        return self._paginate(f"/apps/{app_id}/users", {"limit": page_size})
+
     def list_groups(self, limit: int = 20) -> List[Dict]:
         """List all groups in the organization"""
         try:
@@ -133,6 +370,10 @@ class OktaIntegration:
             print(f"Error listing groups: {str(e)}")
             return []
 
+    def iter_groups(self, page_size: int = 10000) -> Iterator[Dict]:
+        """Iterate over every group in the organization"""
+        return self._paginate("/groups", {"limit": page_size})
+
     def get_group_members(self, group_id: str, limit: int = 20) -> List[Dict]:
         """Get members of a group"""
         try:
@@ -145,6 +386,12 @@ class OktaIntegration:
             print(f"Error getting group members: {str(e)}")
             return []
 
+    def iter_group_members(
+        self, group_id: str, page_size: int = 1000
+    ) -> Iterator[Dict]:
+        """Iterate over every member of a group"""
+        return self._paginate(f"/groups/{group_id}/users", {"limit": page_size})
+
     def get_security_events(
         self, days_back: int = 7, limit: int = 100
     ) -> List[Dict]:
@@ -161,6 +408,15 @@ class OktaIntegration:
             print(f"Error getting security events: {str(e)}")
             return []
 
+    def iter_security_events(
+        self, days_back: int = 7, page_size: int = 1000
+    ) -> Iterator[Dict]:
+        """Iterate over every system log event in the window"""
+        since_date = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
+        return self._paginate(
+            "/logs", {"since": f"{since_date}Z", "limit": page_size}
+        )
+
     def list_network_zones(self) -> List[Dict]:
         """List network zones"""
         try:
@@ -234,6 +490,8 @@ def main():
     for zone in zones[:5]:
         print(f"  - {zone.get('name')} ({zone.get('type')})")
 
+    okta.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Backup Catalog Benchmark
+
+Loads synthetic backup records (each referencing a few chunks, half of them
+shared with the previous backup) and compares the previous in-memory list
+(linear verify_backup scans, cleanup re-parsing every timestamp) with the
+SQLite catalog: id lookups, the latest backup of a type, and a retention
+delete of the oldest 10%.
+
+Usage: python benchmarks/bench_backup_catalog.py [backups] [chunks_per_backup]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from backup_catalog import BackupCatalog  # noqa: E402
+
+TYPES = ['drive', 'gmail', 'calendar', 'admin']
+
+
+def records(count, chunks_per_backup):
+    start = datetime(2025, 1, 1)
+    for n in range(count):
+        chunks = [[f'{(n * chunks_per_backup // 2 + i):064x}', 65536] for i in range(chunks_per_backup)]
+        yield {
+            'id': f'{n:016x}',
+            'type': TYPES[n % len(TYPES)],
+            'timestamp': (start + timedelta(seconds=30 * n)).isoformat(),
+            'size': 65536 * chunks_per_backup,
+            'checksum': f'{n:032x}'
+        }, chunks
+
+
+def timed(label, func, ops=1):
+    start = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - start) / ops
+    print(f'  {label:<32} {elapsed * 1000:>10.3f} ms')
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    chunks_per_backup = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rng = random.Random(5)
+    probe_ids = [f'{rng.randrange(count):016x}' for _ in range(1000)]
+
+    print(f'{count} backups, {chunks_per_backup} chunk references each')
+    metadata = [meta for meta, _ in records(count, chunks_per_backup)]
+    cutoff = datetime.fromisoformat(metadata[count // 10]['timestamp'])
+
+    print('in-memory list')
+    timed('verify_backup (per lookup)', lambda: [
+        next((b for b in metadata if b['id'] == backup_id), None) for backup_id in probe_ids[:20]
+    ], ops=20)
+    timed('latest drive backup', lambda: [b for b in metadata if b['type'] == 'drive'][-1])
+    timed('cleanup_old_backups', lambda: [
+        b for b in metadata if datetime.fromisoformat(b['timestamp']) > cutoff
+    ])
+
+    root = tempfile.mkdtemp(prefix='bench-catalog-')
+    try:
+        catalog = BackupCatalog(os.path.join(root, 'catalog.db'))
+        start = time.perf_counter()
+        for meta, chunks in records(count, chunks_per_backup):
+            catalog.add_backup(meta, chunks)
+        elapsed = time.perf_counter() - start
+        print(f'sqlite catalog (load {elapsed:.1f}s, {count / elapsed:,.0f} backups/s, '
+              f'{catalog.count_chunks():,} chunks, '
+              f'{os.path.getsize(catalog.path) / 1e6:.0f} MB)')
+        timed('verify_backup (per lookup)', lambda: [catalog.get_backup(i) for i in probe_ids], ops=len(probe_ids))
+        timed('latest drive backup', lambda: catalog.latest_backup('drive'))
+        removed = timed('retention delete (oldest 10%)', lambda: catalog.delete_before(cutoff))
+        print(f"    removed {len(removed['backups']):,} backups, {len(removed['chunks']):,} chunks")
+        catalog.close()
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Backup Hashing Benchmark
+
+Hashes a synthetic backup file the old way (read it into one bytes object,
+then a full sha256 pass and a full md5 pass) and with the streaming
+single-pass hash_source. Each run is a fresh interpreter so peak RSS is
+measured per approach.
+
+Usage: python benchmarks/bench_backup_hashing.py [size_mb]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BENCH_DIR, '..', 'scripts')
+
+APPROACHES = {
+    'legacy': """
+import hashlib
+with open(PATH, 'rb') as f:
+    data = f.read()
+digests = (hashlib.sha256(data).hexdigest(), hashlib.md5(data).hexdigest())
+""",
+    'streaming': """
+from backup_hashing import hash_source
+digests = hash_source(PATH)
+""",
+}
+
+HARNESS = """
+import resource, sys, time
+sys.path.insert(0, {scripts!r})
+PATH = {path!r}
+started = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - started
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        block = os.urandom(1024 * 1024)
+        for _ in range(size_mb):
+            f.write(block)
+    try:
+        print(f"Hashing a {size_mb} MiB backup (sha256 + md5)")
+        for label, code in APPROACHES.items():
+            output = subprocess.run(
+                [sys.executable, '-c', HARNESS.format(scripts=SCRIPTS_DIR, path=f.name, code=code)],
+                check=True, capture_output=True, text=True
+            ).stdout.split()
+            elapsed, max_rss_kb = float(output[0]), int(output[1])
+            print(f"{label:<10} {size_mb / elapsed:>8.0f} MB/s  {elapsed:6.2f}s  peak RSS {max_rss_kb / 1024:>7.1f} MiB")
+    finally:
+        os.unlink(f.name)
+
+
+if __name__ == '__main__':
+    main()
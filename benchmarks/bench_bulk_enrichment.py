@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Bulk Enrichment Benchmark
+
+Runs OktaIntegration.enrich_users (factors + groups per user) against a
+local stub Okta API that adds a fixed latency to every request, scaling the
+worker pool from 1 to 64. Client and stub share the machine's CPU, so on
+few cores throughput levels off once both saturate it rather than at the
+worker count.
+
+Usage: python benchmarks/bench_bulk_enrichment.py [num_users] [latency_ms]
+"""
+
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'api-examples'))
+sys.path.insert(0, BENCH_DIR)
+
+from okta_api_example import OktaIntegration  # noqa: E402
+from stub_server import StubServer, _Handler  # noqa: E402
+
+WORKER_COUNTS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class _OktaHandler(_Handler):
+    reply = b'[{"id":"00f1","factorType":"token:software:totp","status":"ACTIVE"}]'
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+    users = [{'id': f'00u{i}', 'profile': {'login': f'user{i}@example.com'}} for i in range(count)]
+
+    with StubServer(_OktaHandler, delay=latency) as server:
+        print(f"Enriching {count:,} users, {latency * 1000:.0f} ms per request, 2 requests per user")
+        baseline = None
+        for workers in WORKER_COUNTS:
+            okta = OktaIntegration(server.url, 'token', pool_size=workers, max_concurrency=workers)
+            server.reset()
+            started = time.perf_counter()
+            enriched = sum(1 for _ in okta.enrich_users(users, max_workers=workers))
+            elapsed = time.perf_counter() - started
+            okta.close()
+
+            rate = enriched / elapsed
+            baseline = baseline or rate
+            print(f"{workers:>3} workers {rate:>10,.0f} users/s  {server.requests:>6,} requests  "
+                  f"{elapsed:6.2f}s  x{rate / baseline:.1f}")
+
+
+if __name__ == '__main__':
+    main()
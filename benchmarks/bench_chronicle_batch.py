@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Chronicle batchCreate Benchmark
+
+Sends synthetic audit events to a local stub Chronicle endpoint, first as
+the old single double-encoded payload and then through
+ChronicleIntegrator.send_logs (entries serialized once, byte-budgeted
+chunks sent concurrently over a pooled session).
+
+Usage: python benchmarks/bench_chronicle_batch.py [num_events]
+"""
+
+import json
+import os
+import sys
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'scripts'))
+sys.path.insert(0, BENCH_DIR)
+
+from siem_integration import ChronicleIntegrator, load_batch_settings  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+def synthetic_events(count):
+    return [
+        {
+            'id': {'time': '2024-12-25T10:00:00.000Z', 'uniqueQualifier': str(i)},
+            'actor': {'email': f'user{i % 5000}@example.com'},
+            'events': [{'type': 'access', 'name': 'download',
+                        'parameters': [{'name': 'doc_title', 'value': 'Quarterly plan ' * 8}]}],
+            'severity': 'LOW'
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_send(endpoint, logs):
+    payload = {
+        'logEntries': [
+            {
+                'severity': log.get('severity', 'LOW'),
+                'logMessage': json.dumps(log),
+                'logSourceRegion': log.get('region', 'global')
+            } for log in logs
+        ]
+    }
+    response = requests.post(f'{endpoint}/v1/events:batchCreate', json=payload,
+                             headers={'Authorization': 'Bearer token'})
+    response.raise_for_status()
+
+
+def run(label, func, server, count):
+    server.reset()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} {count / elapsed:>12,.0f} events/s  {server.requests:>5,} requests  "
+          f"{server.httpd.bytes_received / 1024 / 1024:7.1f} MiB  {elapsed:.2f}s")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    config = os.path.join(BENCH_DIR, '..', 'configs', 'siem_config.yaml')
+    events = synthetic_events(count)
+
+    with StubServer() as server:
+        integrator = ChronicleIntegrator({
+            'api_endpoint': server.url,
+            'api_key': 'token',
+            'batch_settings': load_batch_settings(config)
+        })
+        print(f"Sending {count:,} events to a local stub Chronicle endpoint")
+        run('legacy', lambda: legacy_send(server.url, events), server, count)
+        run('chunked', lambda: integrator.send_logs(events), server, count)
+        integrator.close()
+
+
+if __name__ == '__main__':
+    main()
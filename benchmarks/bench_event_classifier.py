@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Event Classifier Benchmark
+
+Compares the original nested substring scan in monitor_security_events
+with the compiled SecurityEventClassifier over synthetic audit events.
+
+Usage: python benchmarks/bench_event_classifier.py [num_events]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from event_classifier import SecurityEventClassifier  # noqa: E402
+
+LEGACY_TYPES = [
+    'login_failure',
+    'login_success_unusual_location',
+    'password_change',
+    'admin_grant',
+    'admin_revoke',
+    'create_user',
+    'delete_user'
+]
+
+EVENT_NAMES = [
+    ('USER_SETTINGS', 'CREATE_USER'),
+    ('USER_SETTINGS', 'DELETE_USER'),
+    ('USER_SETTINGS', 'CHANGE_PASSWORD'),
+    ('DELEGATED_ADMIN_SETTINGS', 'GRANT_ADMIN_PRIVILEGE'),
+    ('login', 'login_failure'),
+    ('login', 'login_success'),
+    ('login', 'logout'),
+    ('access', 'view'),
+    ('access', 'edit'),
+    ('access', 'download'),
+    ('APPLICATION_SETTINGS', 'CHANGE_APPLICATION_SETTING'),
+    ('GROUP_SETTINGS', 'ADD_GROUP_MEMBER'),
+]
+
+
+def synthetic_activities(count, seed=42):
+    rng = random.Random(seed)
+    return [
+        {
+            'id': {'time': '2024-12-25T10:00:00.000Z', 'uniqueQualifier': str(i)},
+            'actor': {'email': f'user{i % 5000}@example.com'},
+            'events': [dict(zip(('type', 'name'), rng.choice(EVENT_NAMES)))]
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_scan(activities, key='type'):
+    security_events = []
+    for log in activities:
+        for event in log.get('events', []):
+            event_type = event.get('type')
+            if any(sec_type in str(event.get(key)) for sec_type in LEGACY_TYPES):
+                security_events.append({
+                    'timestamp': log.get('id', {}).get('time'),
+                    'actor': log.get('actor', {}).get('email'),
+                    'event_type': event_type,
+                    'event_name': event.get('name')
+                })
+    return security_events
+
+
+def run(label, func, activities):
+    started = time.perf_counter()
+    matched = len(func(activities))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} {len(activities) / elapsed:>14,.0f} events/s  {matched:>9,} matched  {elapsed:.2f}s")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    config = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'configs', 'security_config.yaml')
+    classifier = SecurityEventClassifier.from_config(config)
+    activities = synthetic_activities(count)
+
+    print(f"Classifying {count:,} synthetic events")
+    run('legacy', legacy_scan, activities)
+    run('legacy/name', lambda a: legacy_scan(a, key='name'), activities)
+    run('compiled', lambda a: list(classifier.classify_activities(a)), activities)
+
+
+if __name__ == '__main__':
+    main()
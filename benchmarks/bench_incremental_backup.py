@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Incremental Backup Benchmark
+
+Stores a synthetic snapshot, then a next-day snapshot in which a few
+percent of the data changed: rewritten 64 KiB items (edited files, new
+mail) plus small inserts. It compares writing each snapshot whole (what
+whole-blob backups cost) with the content-defined chunk store, which only
+writes chunks that changed.
+
+Usage: python benchmarks/bench_incremental_backup.py [size_mb] [change_percent] [edit_kb]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from backup_chunking import ChunkStore  # noqa: E402
+
+
+def next_day(snapshot, change_percent, edit_size, rng):
+    """Apply edits of ``edit_size`` bytes and small inserts totalling ``change_percent``."""
+    data = bytearray(snapshot)
+    edits = max(1, int(len(data) * change_percent / 100 / edit_size))
+    for _ in range(edits):
+        offset = rng.randrange(len(data) - edit_size)
+        if rng.random() < 0.8:
+            data[offset:offset + edit_size] = rng.randbytes(edit_size)
+        else:
+            data[offset:offset] = rng.randbytes(rng.randrange(1, 256))
+    return bytes(data)
+
+
+def whole_copy(directory, name, data):
+    with open(os.path.join(directory, name), 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    change_percent = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    edit_size = int(sys.argv[3]) * 1024 if len(sys.argv) > 3 else 64 * 1024
+    rng = random.Random(42)
+    day1 = rng.randbytes(size_mb * 1024 * 1024)
+    day2 = next_day(day1, change_percent, edit_size, rng)
+
+    root = tempfile.mkdtemp(prefix='bench-backup-')
+    try:
+        store = ChunkStore(os.path.join(root, 'store'))
+        os.makedirs(os.path.join(root, 'whole'))
+        print(f"{size_mb} MiB snapshot, ~{change_percent:g}% changed the next day "
+              f"in {edit_size // 1024} KiB edits")
+        print(f"{'':<24} {'written':>12} {'time':>8}")
+        for label, func in (
+            ('whole blob, day 1', lambda: whole_copy(os.path.join(root, 'whole'), 'day1', day1)),
+            ('whole blob, day 2', lambda: whole_copy(os.path.join(root, 'whole'), 'day2', day2)),
+            ('chunk store, full', lambda: store.write_backup('drive', day1)['new_bytes']),
+            ('chunk store, incremental', lambda: store.write_backup('drive', day2, 'incremental')['new_bytes']),
+        ):
+            started = time.perf_counter()
+            written = func()
+            elapsed = time.perf_counter() - started
+            print(f"{label:<24} {written / 2**20:>9.1f} MiB {elapsed:>7.2f}s")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
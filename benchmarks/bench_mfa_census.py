@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+MFA Census Benchmark
+
+Measures runtime and peak Python heap for an MFA census over synthetic
+directory pages: the old build-a-user-list approach versus the streaming
+MfaCensus used by check_mfa_status.
+
+Usage: python benchmarks/bench_mfa_census.py [num_users]
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from mfa_census import MfaCensus  # noqa: E402
+
+PAGE_SIZE = 500
+ORG_UNITS = ['/', '/Engineering', '/Engineering/Platform', '/Sales', '/Support', '/Finance', '/Contractors']
+
+
+def synthetic_pages(count, seed=7):
+    """Yield directory users.list pages, as the API would return them."""
+    rng = random.Random(seed)
+    for offset in range(0, count, PAGE_SIZE):
+        yield [
+            {
+                'primaryEmail': f'user{i}@example.com',
+                'isEnrolledIn2Sv': rng.random() < 0.8,
+                'orgUnitPath': rng.choice(ORG_UNITS),
+            }
+            for i in range(offset, min(offset + PAGE_SIZE, count))
+        ]
+
+
+def collect_then_count(pages):
+    users = []
+    for page in pages:
+        users.extend(page)
+    enabled = sum(1 for u in users if u.get('isEnrolledIn2Sv'))
+    by_org_unit = {}
+    for user in users:
+        by_org_unit.setdefault(user.get('orgUnitPath', '/'), []).append(user)
+    return {'total_users': len(users), 'mfa_enabled': enabled,
+            'by_org_unit': {ou: len(members) for ou, members in by_org_unit.items()}}
+
+
+def streaming_census(pages):
+    census = MfaCensus()
+    for page in pages:
+        census.add_users(page)
+    return census.summary()
+
+
+def run(label, func, count):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func(synthetic_pages(count))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed:6.2f}s  peak {peak / 1024 / 1024:8.1f} MiB  "
+          f"{result['mfa_enabled']:,}/{result['total_users']:,} enrolled")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"MFA census over {count:,} synthetic users ({PAGE_SIZE} per page)")
+    run('list', collect_then_count, count)
+    run('streaming', streaming_census, count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Google API Client Cold-Start Benchmark
+
+Times service construction in fresh interpreters, the way cron-launched
+runs start: the old eager path (discovery.build for directory, reports and
+drive, each with its own transport) against GoogleServiceFactory building
+only the service a run touches, or all three over one shared transport.
+Pass --network to make the eager path fetch discovery documents over the
+network as pre-2.0 clients did.
+
+Usage: python benchmarks/bench_service_startup.py [runs] [--network]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BENCH_DIR, '..', 'scripts')
+
+APIS = "[('admin', 'directory_v1'), ('admin', 'reports_v1'), ('drive', 'v3')]"
+
+SCENARIOS = {
+    'eager': f"""
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build
+credentials = AnonymousCredentials()
+services = [build(api, version, credentials=credentials, static_discovery=STATIC) for api, version in {APIS}]
+""",
+    'lazy, reports only': """
+from google.auth.credentials import AnonymousCredentials
+from google_service_factory import GoogleServiceFactory
+factory = GoogleServiceFactory(AnonymousCredentials(), cache_dir=CACHE_DIR)
+factory.service('admin', 'reports_v1').activities()
+""",
+    'lazy, all three': f"""
+from google.auth.credentials import AnonymousCredentials
+from google_service_factory import GoogleServiceFactory
+factory = GoogleServiceFactory(AnonymousCredentials(), cache_dir=CACHE_DIR)
+services = [factory.service(api, version) for api, version in {APIS}]
+""",
+}
+
+
+def run_once(code, network, cache_dir):
+    prelude = (
+        f"import sys, time\nsys.path.insert(0, {SCRIPTS_DIR!r})\n"
+        f"STATIC = {not network}\nCACHE_DIR = {cache_dir!r}\n"
+        "started = time.perf_counter()\n"
+    )
+    epilogue = "\nprint(time.perf_counter() - started)\n"
+    began = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', prelude + code + epilogue],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return time.perf_counter() - began, float(output.strip().splitlines()[-1])
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    runs = int(args[0]) if args else 10
+    network = '--network' in sys.argv
+
+    print(f"Median of {runs} cold starts ({'network' if network else 'static'} discovery for eager)")
+    print(f"{'scenario':<20} {'process':>10} {'in-process':>12}")
+    cache_dir = tempfile.mkdtemp(prefix='discovery-cache-')
+    for label, code in SCENARIOS.items():
+        try:
+            timings = [run_once(code, network, cache_dir) for _ in range(runs)]
+        except subprocess.CalledProcessError as e:
+            print(f"{label:<20} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        process = statistics.median(t[0] for t in timings)
+        inner = statistics.median(t[1] for t in timings)
+        print(f"{label:<20} {process * 1000:>8.0f}ms {inner * 1000:>10.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
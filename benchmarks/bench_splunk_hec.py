@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Splunk HEC Delivery Benchmark
+
+Sends synthetic audit events to a local stub HEC endpoint, first the old way
+(one requests.post per event, no shared session) and then through
+SplunkIntegrator.send_logs (pooled session, batched bodies).
+
+Usage: python benchmarks/bench_splunk_hec.py [num_events]
+"""
+
+import os
+import sys
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'scripts'))
+sys.path.insert(0, BENCH_DIR)
+
+from siem_integration import SplunkIntegrator, load_batch_settings  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+def synthetic_events(count):
+    return [
+        {
+            'id': {'time': '2024-12-25T10:00:00.000Z', 'uniqueQualifier': str(i)},
+            'actor': {'email': f'user{i % 5000}@example.com'},
+            'events': [{'type': 'login', 'name': 'login_success'}],
+            'ipAddress': '203.0.113.10'
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_send(endpoint, logs):
+    headers = {'Authorization': 'Bearer token', 'Content-Type': 'application/json'}
+    for log in logs:
+        response = requests.post(
+            f'{endpoint}/services/collector',
+            json={'event': log, 'sourcetype': 'google:workspace:audit'},
+            headers=headers
+        )
+        response.raise_for_status()
+
+
+def run(label, func, server, count):
+    server.reset()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} {count / elapsed:>12,.0f} events/s  {server.requests:>6,} requests  {elapsed:.2f}s")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    config = os.path.join(BENCH_DIR, '..', 'configs', 'siem_config.yaml')
+    events = synthetic_events(count)
+
+    with StubServer() as server:
+        integrator = SplunkIntegrator({
+            'api_endpoint': server.url,
+            'api_key': 'token',
+            'batch_settings': load_batch_settings(config)
+        })
+        print(f"Sending {count:,} events to a local stub HEC endpoint")
+        legacy_count = min(count, 2_000)
+        run('legacy', lambda: legacy_send(server.url, events[:legacy_count]), server, legacy_count)
+        run('batched', lambda: integrator.send_logs(events), server, count)
+        integrator.close()
+
+
+if __name__ == '__main__':
+    main()
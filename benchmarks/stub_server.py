@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Local stub HTTP server for SIEM and API client benchmarks.
+
+Accepts any POST/PUT/GET with a small JSON reply over HTTP/1.1 keep-alive and
+counts requests and body bytes. HEAD answers 200 for paths that were PUT
+and 404 otherwise. An optional per-request delay simulates API latency.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Buffer the response so headers and body leave in one segment; split
+    # writes hit Nagle/delayed-ACK stalls and would dominate the timings.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    reply = b'{"text":"Success","code":0}'
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.bytes_received += len(body)
+            if self.command == 'PUT':
+                self.server.paths.add(self.path)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.reply)))
+        self.end_headers()
+        self.wfile.write(self.reply)
+        self.wfile.flush()
+
+    do_POST = _respond
+    do_PUT = _respond
+    do_GET = _respond
+
+    def do_HEAD(self):
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.requests += 1
+            found = self.path in self.server.paths
+        self.send_response(200 if found else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    # Room for many clients opening pooled connections at once
+    request_queue_size = 256
+
+
+class StubServer:
+    """Run the stub server on a background thread for the duration of a with-block."""
+
+    def __init__(self, handler=_Handler, delay=0.0):
+        self.httpd = _Server(('127.0.0.1', 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.delay = delay
+        self.httpd.lock = threading.Lock()
+        self.httpd.requests = 0
+        self.httpd.bytes_received = 0
+        self.httpd.paths = set()
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def reset(self):
+        with self.httpd.lock:
+            self.httpd.requests = 0
+            self.httpd.bytes_received = 0
+            self.httpd.paths.clear()
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
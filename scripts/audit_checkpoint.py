@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Incremental Audit Log Polling
+
+Persists a per-application high-water mark so each poll of the Reports API
+only fetches activities newer than the last one handled. A small overlap
+window plus id-based dedup covers events that arrive late.
+"""
+
+import logging
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_time(value):
+    """Parse a Reports API RFC 3339 timestamp into an aware datetime."""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _activity_key(activity):
+    """Dedup key for an activity; uniqueQualifier is only unique per timestamp."""
+    activity_id = activity.get('id', {})
+    return f"{activity_id.get('time')}|{activity_id.get('uniqueQualifier')}"
+
+
+class AuditCheckpointStore:
+    """SQLite-backed high-water marks and recently seen activity ids."""
+
+    def __init__(self, path='audit_checkpoints.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                application TEXT PRIMARY KEY,
+                high_water_mark TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS seen_activities (
+                application TEXT NOT NULL,
+                activity_key TEXT NOT NULL,
+                event_time REAL NOT NULL,
+                PRIMARY KEY (application, activity_key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_seen_time
+                ON seen_activities (application, event_time);
+        """)
+
+    def get_high_water_mark(self, application):
+        """Return the newest activity time handled for an application, if any."""
+        row = self.conn.execute(
+            'SELECT high_water_mark FROM checkpoints WHERE application = ?',
+            (application,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def seen_keys(self, application, since):
+        """Return the activity keys recorded at or after ``since``."""
+        rows = self.conn.execute(
+            'SELECT activity_key FROM seen_activities WHERE application = ? AND event_time >= ?',
+            (application, since.timestamp())
+        )
+        return {row[0] for row in rows}
+
+    def commit(self, application, high_water_mark, keys, overlap):
+        """Advance the checkpoint and keep only ids inside the overlap window."""
+        cutoff = _parse_time(high_water_mark) - overlap
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO checkpoints (application, high_water_mark, updated_at) '
+                'VALUES (?, ?, ?) ON CONFLICT(application) DO UPDATE SET '
+                'high_water_mark = excluded.high_water_mark, updated_at = excluded.updated_at',
+                (application, high_water_mark, datetime.now(timezone.utc).isoformat())
+            )
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO seen_activities (application, activity_key, event_time) '
+                'VALUES (?, ?, ?)',
+                ((application, key, event_time) for key, event_time in keys
+                 if event_time >= cutoff.timestamp())
+            )
+            self.conn.execute(
+                'DELETE FROM seen_activities WHERE application = ? AND event_time < ?',
+                (application, cutoff.timestamp())
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class IncrementalAuditPoller:
+    """Poll GoogleWorkspaceMonitor audit logs from a persisted checkpoint."""
+
+    def __init__(self, monitor, store, overlap=timedelta(minutes=10),
+                 initial_lookback=timedelta(hours=24)):
+        self.monitor = monitor
+        self.store = store
+        self.overlap = overlap
+        self.initial_lookback = initial_lookback
+        self.stats = {}
+
+    def poll(self, application_name='admin'):
+        """Yield activities not handled by a previous poll.
+
+        The checkpoint is only advanced once the stream has been fully
+        consumed, so an interrupted poll is re-read on the next run.
+        """
+        high_water_mark = self.store.get_high_water_mark(application_name)
+        if high_water_mark:
+            start = _parse_time(high_water_mark) - self.overlap
+        else:
+            start = datetime.now(timezone.utc) - self.initial_lookback
+
+        seen = self.store.seen_keys(application_name, start)
+        new_keys = []
+        newest = high_water_mark
+        newest_time = _parse_time(high_water_mark) if high_water_mark else None
+        duplicates = 0
+
+        activities = self.monitor.iter_audit_logs(
+            start.isoformat(), application_name=application_name, raise_errors=True
+        )
+        for activity in activities:
+            key = _activity_key(activity)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+
+            activity_time = activity.get('id', {}).get('time')
+            event_time = _parse_time(activity_time)
+            new_keys.append((key, event_time.timestamp()))
+            if newest_time is None or event_time > newest_time:
+                newest, newest_time = activity_time, event_time
+            yield activity
+
+        if newest:
+            self.store.commit(application_name, newest, new_keys, self.overlap)
+
+        self.stats[application_name] = {
+            'start': start.isoformat(),
+            'new': len(new_keys),
+            'duplicates': duplicates,
+            'high_water_mark': newest
+        }
+        logger.info(
+            f"Polled {application_name}: {len(new_keys)} new, "
+            f"{duplicates} duplicates skipped since {start.isoformat()}"
+        )
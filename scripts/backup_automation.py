@@ -7,11 +7,16 @@ Automated backup and disaster recovery for Google Workspace data
 import os
 import json
 import logging
-import hashlib
+import yaml
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from backup_catalog import BackupCatalog
+from backup_chunking import ChunkStore, ContentDefinedChunker, new_backup_id
+from backup_hashing import DEFAULT_CHUNK_SIZE, BackupSource, hash_source
+from backup_scrub import BackupScrubber
+from backup_writer import PipelinedBackupWriter, build_backup_writer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,53 +26,170 @@ class BackupManager:
     
     def __init__(self, config_path: str):
         self.config = self.load_config(config_path)
-        self.backup_metadata = []
+        self._catalog = None
+        self._chunk_store = None
     
     def load_config(self, path: str) -> Dict:
-        """Load backup configuration from file"""
+        """Load backup configuration from a JSON or YAML file"""
         try:
             with open(path, 'r') as f:
+                if path.endswith(('.yaml', '.yml')):
+                    return yaml.safe_load(f) or {}
                 return json.load(f)
         except FileNotFoundError:
             logger.error(f"Config file not found: {path}")
             return {}
     
-    def create_backup(self, data_type: str, data: bytes) -> Optional[str]:
-        """Create a backup of specified data"""
+    @property
+    def catalog(self) -> BackupCatalog:
+        """Backup catalog, kept next to the stored backups
+        
+        ``backup.storage.catalog`` overrides the location; without a
+        storage section the catalog is in memory and does not persist.
+        """
+        if self._catalog is None:
+            storage = self.config.get('backup', {}).get('storage', {})
+            if 'catalog' in storage:
+                path = storage['catalog']
+            elif 'path' in storage:
+                os.makedirs(storage['path'], exist_ok=True)
+                path = os.path.join(storage['path'], 'catalog.db')
+            else:
+                logger.warning("No backup.storage configured; backup catalog will not persist")
+                path = ':memory:'
+            self._catalog = BackupCatalog(path)
+        return self._catalog
+    
+    @property
+    def chunk_store(self) -> ChunkStore:
+        """Chunk store configured by the ``backup.storage`` section"""
+        if self._chunk_store is None:
+            storage = self.config.get('backup', {}).get('storage', {})
+            chunking = storage.get('chunking', {})
+            chunker = ContentDefinedChunker(
+                min_size=chunking.get('min_size_kb', 16) * 1024,
+                avg_size=chunking.get('avg_size_kb', 64) * 1024,
+                max_size=chunking.get('max_size_kb', 256) * 1024
+            )
+            self._chunk_store = ChunkStore(storage.get('path', 'backups'), chunker)
+        return self._chunk_store
+    
+    def create_backup(self, data_type: str, data: BackupSource,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> Optional[str]:
+        """Create a backup of specified data
+        
+        ``data`` may be bytes, a file path, a binary file object or an
+        iterator of chunks; it is hashed in a single streaming pass.
+        """
         try:
-            backup_id = hashlib.sha256(data).hexdigest()[:16]
-            timestamp = datetime.now().isoformat()
+            digests = hash_source(data, chunk_size)
+            created = datetime.now()
+            backup_id = new_backup_id(created)
+            timestamp = created.isoformat()
             
             backup_metadata = {
                 'id': backup_id,
                 'type': data_type,
                 'timestamp': timestamp,
-                'size': len(data),
-                'checksum': hashlib.md5(data).hexdigest()
+                'size': digests['size'],
+                'checksum': digests['md5'],
+                'sha256': digests['sha256']
             }
             
-            self.backup_metadata.append(backup_metadata)
+            self.catalog.add_backup(backup_metadata)
             logger.info(f"Backup created: {backup_id}")
             return backup_id
         except Exception as e:
             logger.error(f"Backup creation failed: {str(e)}")
             return None
     
+    def store_backup(self, data_type: str, data: BackupSource,
+                     backup_type: str = 'full') -> Optional[str]:
+        """Chunk and store a backup, writing only chunks not already stored
+        
+        Incremental backups record the latest backup of the same data type
+        as their parent.
+        """
+        try:
+            parent = None
+            if backup_type == 'incremental':
+                previous = self.catalog.latest_backup(data_type)
+                parent = previous['id'] if previous else None
+            
+            manifest = self.chunk_store.write_backup(data_type, data, backup_type, parent)
+            orphans = self.catalog.add_backup(manifest, manifest['chunks'])
+            self._remove_stored([], orphans)
+            return manifest['id']
+        except Exception as e:
+            logger.error(f"Backup storage failed: {str(e)}")
+            return None
+    
+    def replicate_backup(self, data_type: str, data: BackupSource,
+                         writer: Optional[PipelinedBackupWriter] = None) -> Optional[str]:
+        """Compress, encrypt and upload a backup to every enabled target
+        
+        Targets come from the ``backup.targets`` section unless a writer
+        (for example one built with local stand-ins) is passed in. Targets
+        without a client are skipped; with none left, copies go under the
+        storage path.
+        """
+        try:
+            writer = writer or build_backup_writer(self.config.get('backup', {}))
+            manifest = writer.write(data_type, data)
+            metadata = {k: v for k, v in manifest.items() if k != 'chunks'}
+            metadata['chunk_count'] = len(manifest['chunks'])
+            self.catalog.add_backup(metadata)
+            return manifest['id']
+        except Exception as e:
+            logger.error(f"Backup replication failed: {str(e)}")
+            return None
+    
+    def restore_backup(self, backup_id: str) -> Iterator[bytes]:
+        """Stream a stored backup's content"""
+        return self.chunk_store.read_backup(backup_id)
+    
     def verify_backup(self, backup_id: str, checksum: str) -> bool:
         """Verify backup integrity"""
-        for backup in self.backup_metadata:
-            if backup['id'] == backup_id:
-                return backup['checksum'] == checksum
-        return False
+        backup = self.catalog.get_backup(backup_id)
+        return backup is not None and backup['checksum'] == checksum
+    
+    def scrub_backups(self, mode: str = 'chunks', max_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Re-hash stored chunks or backups against the catalog
+        
+        Worker count, bandwidth cap and maintenance window come from the
+        ``backup.scrub`` section; an unfinished scrub resumes on the next call.
+        """
+        settings = self.config.get('backup', {}).get('scrub', {})
+        if max_seconds is None and settings.get('window_minutes'):
+            max_seconds = settings['window_minutes'] * 60
+        scrubber = BackupScrubber(
+            self.catalog,
+            self.chunk_store,
+            workers=settings.get('workers', 4),
+            bandwidth_mb_s=settings.get('bandwidth_mb_s'),
+            state_path=os.path.join(self.chunk_store.root, 'scrub_state.json')
+        )
+        return scrubber.scrub(mode, max_seconds=max_seconds)
+    
+    def _remove_stored(self, backup_ids: List[str], digests: List[str]):
+        """Delete stored manifests and chunk files the catalog no longer references"""
+        if 'path' not in self.config.get('backup', {}).get('storage', {}):
+            return
+        for backup_id in backup_ids:
+            self.chunk_store.delete_manifest(backup_id)
+        for digest in digests:
+            self.chunk_store.delete_chunk(digest)
     
     def cleanup_old_backups(self, retention_days: int = 30):
-        """Remove backups older than retention period"""
+        """Remove backups older than retention period
+        
+        Stored manifests and chunks no remaining backup references are
+        deleted along with the catalog records.
+        """
         cutoff_date = datetime.now() - timedelta(days=retention_days)
-        self.backup_metadata = [
-            b for b in self.backup_metadata 
-            if datetime.fromisoformat(b['timestamp']) > cutoff_date
-        ]
-        logger.info(f"Cleanup completed. Kept {len(self.backup_metadata)} backups")
+        removed = self.catalog.delete_before(cutoff_date)
+        self._remove_stored(removed['backups'], removed['chunks'])
+        logger.info(f"Cleanup completed. Kept {self.catalog.count_backups()} backups")
 
 if __name__ == "__main__":
     manager = BackupManager("configs/backup_schedule.yaml")
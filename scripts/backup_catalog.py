@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Backup Catalog
+
+Persistent SQLite index of backups and the chunks they reference. Backups
+are looked up by id, listed by type and time through indexes, and expired
+with range deletes; chunk reference counts are maintained so retention only
+touches the chunks of the backups it removes, even with millions of rows.
+"""
+
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Catalog columns; any other metadata field is kept in the ``extra`` JSON column
+BACKUP_COLUMNS = ('id', 'type', 'backup_type', 'parent', 'timestamp', 'size',
+                  'checksum', 'sha256', 'chunk_count')
+
+
+def _epoch(timestamp: str) -> float:
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+class BackupCatalog:
+    """SQLite catalog of backup metadata and chunk references
+
+    Timestamps are stored as ISO text for display and as epoch seconds for
+    indexed range queries, so they are parsed once, when recorded.
+    """
+
+    def __init__(self, path: str = 'backup_catalog.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS backups (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                backup_type TEXT,
+                parent TEXT,
+                timestamp TEXT NOT NULL,
+                created REAL NOT NULL,
+                size INTEGER,
+                checksum TEXT,
+                sha256 TEXT,
+                chunk_count INTEGER,
+                extra TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_backups_type_created ON backups (type, created);
+            CREATE INDEX IF NOT EXISTS idx_backups_created ON backups (created);
+            CREATE TABLE IF NOT EXISTS chunks (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                refs INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS backup_chunks (
+                backup_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (backup_id, seq)
+            ) WITHOUT ROWID;
+        ''')
+
+    def add_backup(self, metadata: Dict[str, Any],
+                   chunks: Optional[Sequence[Sequence[Any]]] = None) -> List[str]:
+        """Record a backup and, for chunked backups, its ``[digest, size]`` list
+
+        Re-recording an id replaces its metadata and chunk references.
+        Returns the chunk digests the replaced record alone referenced, so
+        their stored files can be removed.
+        """
+        extra = {k: v for k, v in metadata.items() if k not in BACKUP_COLUMNS and k != 'chunks'}
+        if chunks is not None:
+            metadata = {**metadata, 'chunk_count': len(chunks)}
+        row = [metadata.get(column) for column in BACKUP_COLUMNS]
+        row.insert(5, _epoch(metadata['timestamp']))
+        orphans: List[str] = []
+        with self.conn:
+            replacing = self.conn.execute(
+                'SELECT 1 FROM backup_chunks WHERE backup_id = ? LIMIT 1', (metadata['id'],)
+            ).fetchone()
+            if replacing:
+                orphans = self._release_chunks('SELECT ?', (metadata['id'],))
+            self.conn.execute(
+                'INSERT OR REPLACE INTO backups (id, type, backup_type, parent, timestamp, created, '
+                'size, checksum, sha256, chunk_count, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (*row, json.dumps(extra) if extra else None)
+            )
+            if chunks is not None:
+                self.conn.executemany(
+                    'INSERT INTO chunks (digest, size, refs) VALUES (?, ?, 1) '
+                    'ON CONFLICT(digest) DO UPDATE SET refs = refs + 1',
+                    ((digest, size) for digest, size in chunks)
+                )
+                self.conn.executemany(
+                    'INSERT INTO backup_chunks (backup_id, seq, digest) VALUES (?, ?, ?)',
+                    ((metadata['id'], seq, digest) for seq, (digest, _) in enumerate(chunks))
+                )
+                if orphans:
+                    # Chunks the new record references again are not orphans
+                    kept = {digest for digest, _ in chunks}
+                    orphans = [digest for digest in orphans if digest not in kept]
+        return orphans
+
+    def _row_dict(self, row) -> Dict[str, Any]:
+        record = dict(zip(BACKUP_COLUMNS, row[:-1]))
+        if row[-1]:
+            record.update(json.loads(row[-1]))
+        return record
+
+    _SELECT = f"SELECT {', '.join(BACKUP_COLUMNS)}, extra FROM backups"
+
+    def get_backup(self, backup_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(f'{self._SELECT} WHERE id = ?', (backup_id,)).fetchone()
+        return self._row_dict(row) if row else None
+
+    def latest_backup(self, data_type: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            f'{self._SELECT} WHERE type = ? ORDER BY created DESC LIMIT 1', (data_type,)
+        ).fetchone()
+        return self._row_dict(row) if row else None
+
+    def iter_backups(self, data_type: Optional[str] = None, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Backups in time order, optionally filtered by type and [since, until)"""
+        clauses, params = [], []
+        if data_type is not None:
+            clauses.append('type = ?')
+            params.append(data_type)
+        if since is not None:
+            clauses.append('created >= ?')
+            params.append(since.timestamp())
+        if until is not None:
+            clauses.append('created < ?')
+            params.append(until.timestamp())
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        for row in self.conn.execute(f'{self._SELECT}{where} ORDER BY created', params):
+            yield self._row_dict(row)
+
+    def iter_backup_records(self, after: Optional[str] = None,
+                            batch_size: int = 10_000) -> Iterator[Dict[str, Any]]:
+        """All backups in id order, starting after ``after``"""
+        last = after or ''
+        while True:
+            rows = self.conn.execute(
+                f'{self._SELECT} WHERE id > ? ORDER BY id LIMIT ?', (last, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._row_dict(row)
+            last = rows[-1][0]
+
+    def count_backups(self, data_type: Optional[str] = None) -> int:
+        if data_type is None:
+            return self.conn.execute('SELECT COUNT(*) FROM backups').fetchone()[0]
+        return self.conn.execute('SELECT COUNT(*) FROM backups WHERE type = ?', (data_type,)).fetchone()[0]
+
+    def backup_chunks(self, backup_id: str) -> List[Tuple[str, int]]:
+        rows = self.conn.execute(
+            'SELECT b.digest, c.size FROM backup_chunks b JOIN chunks c ON c.digest = b.digest '
+            'WHERE b.backup_id = ? ORDER BY b.seq', (backup_id,)
+        )
+        return [(row[0], row[1]) for row in rows]
+
+    def iter_chunk_records(self, after: Optional[str] = None, batch_size: int = 10_000) -> Iterator[Tuple[str, int]]:
+        """All referenced chunks in digest order, starting after ``after``"""
+        last = after or ''
+        while True:
+            rows = self.conn.execute(
+                'SELECT digest, size FROM chunks WHERE digest > ? ORDER BY digest LIMIT ?',
+                (last, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1][0]
+
+    def count_chunks(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM chunks').fetchone()[0]
+
+    def _release_chunks(self, backup_ids_query: str, params: Iterable[Any]) -> List[str]:
+        """Drop the chunk references of the selected backups; returns orphaned digests"""
+        self.conn.execute('DROP TABLE IF EXISTS temp.released')
+        self.conn.execute('CREATE TEMP TABLE released (digest TEXT PRIMARY KEY, n INTEGER) WITHOUT ROWID')
+        self.conn.execute(
+            'INSERT INTO temp.released SELECT digest, COUNT(*) FROM backup_chunks '
+            f'WHERE backup_id IN ({backup_ids_query}) GROUP BY digest', tuple(params)
+        )
+        self.conn.execute(
+            f'DELETE FROM backup_chunks WHERE backup_id IN ({backup_ids_query})', tuple(params)
+        )
+        self.conn.execute(
+            'UPDATE chunks SET refs = refs - (SELECT n FROM temp.released r WHERE r.digest = chunks.digest) '
+            'WHERE digest IN (SELECT digest FROM temp.released)'
+        )
+        orphans = [row[0] for row in self.conn.execute(
+            'SELECT c.digest FROM temp.released r JOIN chunks c ON c.digest = r.digest WHERE c.refs <= 0'
+        )]
+        self.conn.execute(
+            'DELETE FROM chunks WHERE digest IN (SELECT digest FROM temp.released) AND refs <= 0'
+        )
+        self.conn.execute('DROP TABLE temp.released')
+        return orphans
+
+    def delete_before(self, cutoff: datetime, data_type: Optional[str] = None) -> Dict[str, List[str]]:
+        """Delete backups created before ``cutoff`` in one indexed range delete
+
+        Returns the deleted backup ids and the chunk digests no remaining
+        backup references, so their stored files can be removed.
+        """
+        query = 'SELECT id FROM backups WHERE created < ?'
+        params: List[Any] = [cutoff.timestamp()]
+        if data_type is not None:
+            query += ' AND type = ?'
+            params.append(data_type)
+        with self.conn:
+            backup_ids = [row[0] for row in self.conn.execute(query, params)]
+            orphans = self._release_chunks(query, params)
+            self.conn.execute(f'DELETE FROM backups WHERE id IN ({query})', params)
+        logger.info(f'Catalog retention removed {len(backup_ids)} backups and {len(orphans)} chunks')
+        return {'backups': backup_ids, 'chunks': orphans}
+
+    def close(self):
+        self.conn.close()
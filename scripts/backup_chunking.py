@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Content-Defined Chunking and Chunk Store
+
+Splits backup streams into content-defined chunks so that a small edit only
+changes the chunks around it, stores each chunk once under its sha256, and
+describes every backup with a manifest listing its chunks. Incremental
+backups therefore only write the chunks that changed since earlier backups.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from backup_hashing import DEFAULT_CHUNK_SIZE, BackupSource, StreamingHasher, iter_chunks
+
+logger = logging.getLogger(__name__)
+
+# Byte substitution table and 256-bit multiplier for the rolling hash; derived
+# from fixed labels so chunk boundaries never change between releases.
+_TABLE = bytes(sorted(range(256), key=lambda b: hashlib.sha256(b'cdc-table' + bytes([b])).digest()))
+_MULTIPLIER = int.from_bytes(hashlib.sha256(b'cdc-multiplier').digest(), 'little') | 1
+_WINDOW = 32  # bytes of history that feed each hash lane (multiplier width)
+_SCAN_STEP = 64 * 1024
+
+
+def _boundary_pattern(bits: int):
+    """Regex matching hash lanes whose low ``bits`` bits are all zero."""
+    pattern = b'\x00' * (bits // 8)
+    remainder = bits % 8
+    if remainder:
+        allowed = (bytes([v]) for v in range(256) if v & ((1 << remainder) - 1) == 0)
+        pattern += b'[' + b''.join(re.escape(v) for v in allowed) + b']'
+    return re.compile(pattern)
+
+
+def new_backup_id(created: Optional[datetime] = None) -> str:
+    """Unique, time-ordered backup id; identical data still gets a new id"""
+    created = created or datetime.now()
+    return f"{created:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:12]}"
+
+
+class ContentDefinedChunker:
+    """FastCDC-style chunker with cut-point skipping and normalized chunking.
+
+    The rolling hash is computed a whole region at a time: the region is
+    byte-substituted and multiplied by a 256-bit constant as one big
+    integer, so every byte lane of the product mixes the preceding 32 bytes.
+    A boundary is a run of zero lanes, searched with a compiled regex; a
+    stricter pattern is used before ``avg_size`` and a looser one after it,
+    which keeps chunk sizes close to the average. Everything is computed
+    relative to the chunk start, so boundaries depend only on content.
+    """
+
+    def __init__(self, min_size: int = 16 * 1024, avg_size: int = 64 * 1024,
+                 max_size: int = 256 * 1024):
+        if not 0 < min_size < avg_size < max_size:
+            raise ValueError('Chunk sizes must satisfy 0 < min_size < avg_size < max_size')
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+        bits = max(1, (avg_size - min_size).bit_length() - 1)
+        self._strict = _boundary_pattern(bits + 2)
+        self._loose = _boundary_pattern(max(1, bits - 2))
+
+    def _find(self, pattern, buf, lo: int, hi: int) -> Optional[int]:
+        """Return the first cut offset whose boundary lanes start in [lo, hi)."""
+        while lo < hi:
+            step_end = min(lo + _SCAN_STEP, hi)
+            begin = max(0, lo - _WINDOW)
+            segment = buf[begin:step_end + 8]
+            product = int.from_bytes(segment.translate(_TABLE), 'little') * _MULTIPLIER
+            lanes = product.to_bytes(len(segment) + _WINDOW + 1, 'little')[:len(segment)]
+            match = pattern.search(lanes, lo - begin)
+            if match is not None and match.start() < step_end - begin:
+                return begin + match.end()
+            lo = step_end
+        return None
+
+    def cut(self, buf, start: int, end: int) -> int:
+        """Length of the chunk starting at ``start`` within ``buf[start:end]``."""
+        available = end - start
+        if available <= self.min_size:
+            return available
+        limit = min(available, self.max_size)
+        normal = min(self.avg_size, limit)
+        for pattern, lo, hi in ((self._strict, self.min_size, normal), (self._loose, normal, limit)):
+            found = self._find(pattern, buf, start + lo, start + hi)
+            if found is not None:
+                return min(found - start, limit)
+        return limit
+
+    def chunks(self, source: BackupSource, read_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the content-defined chunks of a backup source."""
+        buf = bytearray()
+        start = 0
+        for block in iter_chunks(source, read_size):
+            buf += block
+            while len(buf) - start >= self.max_size:
+                length = self.cut(buf, start, len(buf))
+                yield bytes(buf[start:start + length])
+                start += length
+            if start >= len(buf) // 2:
+                del buf[:start]
+                start = 0
+        while start < len(buf):
+            length = self.cut(buf, start, len(buf))
+            yield bytes(buf[start:start + length])
+            start += length
+
+
+class ChunkStore:
+    """Content-addressed chunk files plus one JSON manifest per backup.
+
+    Layout: ``<root>/chunks/<ab>/<sha256>`` and ``<root>/manifests/<id>.json``.
+    """
+
+    def __init__(self, root: str, chunker: Optional[ContentDefinedChunker] = None):
+        self.root = root
+        self.chunker = chunker or ContentDefinedChunker()
+        self.chunk_dir = os.path.join(root, 'chunks')
+        self.manifest_dir = os.path.join(root, 'manifests')
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+
+    def chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def has_chunk(self, digest: str) -> bool:
+        return os.path.exists(self.chunk_path(digest))
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def put_chunk(self, digest: str, data: bytes) -> bool:
+        """Store a chunk unless it is already present; returns True if written."""
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write_atomic(path, data)
+        return True
+
+    def get_chunk(self, digest: str) -> bytes:
+        with open(self.chunk_path(digest), 'rb') as f:
+            return f.read()
+
+    def delete_chunk(self, digest: str) -> bool:
+        try:
+            os.remove(self.chunk_path(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def write_backup(self, data_type: str, source: BackupSource, backup_type: str = 'full',
+                     parent: Optional[str] = None) -> Dict[str, Any]:
+        """Chunk ``source``, store new chunks and write its manifest."""
+        hasher = StreamingHasher()
+        chunks: List[List[Any]] = []
+        new_chunks = new_bytes = 0
+        for chunk in self.chunker.chunks(source):
+            hasher.update(chunk)
+            digest = hashlib.sha256(chunk).hexdigest()
+            if self.put_chunk(digest, chunk):
+                new_chunks += 1
+                new_bytes += len(chunk)
+            chunks.append([digest, len(chunk)])
+
+        digests = hasher.hexdigests()
+        created = datetime.now()
+        manifest = {
+            'id': new_backup_id(created),
+            'type': data_type,
+            'backup_type': backup_type,
+            'parent': parent,
+            'timestamp': created.isoformat(),
+            'size': hasher.size,
+            'checksum': digests['md5'],
+            'sha256': digests['sha256'],
+            'new_chunks': new_chunks,
+            'new_bytes': new_bytes,
+            'chunks': chunks
+        }
+        self._write_atomic(
+            os.path.join(self.manifest_dir, f"{manifest['id']}.json"),
+            json.dumps(manifest).encode('utf-8')
+        )
+        logger.info(
+            f"Stored {backup_type} backup {manifest['id']}: {len(chunks)} chunks, "
+            f"{new_chunks} new ({new_bytes} of {hasher.size} bytes written)"
+        )
+        return manifest
+
+    def load_manifest(self, backup_id: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.manifest_dir, f'{backup_id}.json')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def delete_manifest(self, backup_id: str) -> bool:
+        try:
+            os.remove(os.path.join(self.manifest_dir, f'{backup_id}.json'))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def read_backup(self, backup_id: str) -> Iterator[bytes]:
+        """Yield a backup's content chunk by chunk."""
+        manifest = self.load_manifest(backup_id)
+        if manifest is None:
+            raise KeyError(f'Unknown backup: {backup_id}')
+        for digest, _ in manifest['chunks']:
+            yield self.get_chunk(digest)
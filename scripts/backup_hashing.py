@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Streaming Backup Hashing
+
+Computes every digest a backup needs (sha256 for its id, md5 for its
+checksum) in one pass over fixed-size buffers, from a file path, a file
+object or an iterator of chunks, so backups never have to fit in memory.
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, Iterable, Iterator, Sequence, Union
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_ALGORITHMS = ('sha256', 'md5')
+
+BackupSource = Union[bytes, bytearray, memoryview, str, os.PathLike, Any, Iterable[bytes]]
+
+
+def _readinto_chunks(f, chunk_size: int) -> Iterator[memoryview]:
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    while True:
+        count = f.readinto(buffer)
+        if not count:
+            return
+        yield view[:count]
+
+
+def iter_chunks(source: BackupSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[memoryview]:
+    """Yield a backup source as buffers of at most ``chunk_size`` bytes.
+
+    Files are read with ``readinto`` into one reused buffer, so a yielded
+    chunk is only valid until the next one is requested.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for offset in range(0, len(view), chunk_size):
+            yield view[offset:offset + chunk_size]
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb', buffering=0) as f:
+            yield from _readinto_chunks(f, chunk_size)
+    elif hasattr(source, 'readinto'):
+        yield from _readinto_chunks(source, chunk_size)
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield memoryview(chunk)
+    else:
+        for chunk in source:
+            yield memoryview(chunk)
+
+
+def _new_digest(name: str):
+    if name != 'md5':
+        return hashlib.new(name)
+    # md5 is an integrity checksum here, not a security control; say so where
+    # the interpreter accepts the flag (3.9+), which keeps FIPS builds working
+    try:
+        return hashlib.new(name, usedforsecurity=False)
+    except TypeError:
+        return hashlib.new(name)
+
+
+class StreamingHasher:
+    """Feed several digests from the same buffers."""
+
+    def __init__(self, algorithms: Sequence[str] = DEFAULT_ALGORITHMS):
+        self._digests = {name: _new_digest(name) for name in algorithms}
+        self.size = 0
+
+    def update(self, chunk):
+        for digest in self._digests.values():
+            digest.update(chunk)
+        self.size += len(chunk)
+
+    def hexdigests(self) -> Dict[str, str]:
+        return {name: digest.hexdigest() for name, digest in self._digests.items()}
+
+
+def hash_source(source: BackupSource, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                algorithms: Sequence[str] = DEFAULT_ALGORITHMS) -> Dict[str, Any]:
+    """Return ``{'size': ..., <algorithm>: <hexdigest>, ...}`` for a backup source."""
+    hasher = StreamingHasher(algorithms)
+    for chunk in iter_chunks(source, chunk_size):
+        hasher.update(chunk)
+    return {'size': hasher.size, **hasher.hexdigests()}
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Backup Scrubbing
+
+Re-reads stored chunks (or whole backups) and checks them against the
+catalog on a worker pool, under an I/O bandwidth cap. Progress is
+checkpointed to a state file by catalog key, so a scrub interrupted by the
+end of a maintenance window resumes where it stopped on the next run.
+"""
+
+import collections
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from backup_catalog import BackupCatalog
+from backup_chunking import ChunkStore
+from backup_hashing import DEFAULT_CHUNK_SIZE, StreamingHasher, iter_chunks
+
+logger = logging.getLogger(__name__)
+
+SCRUB_MODES = ('chunks', 'backups')
+
+
+class _DeadlineReached(Exception):
+    """Raised inside a check once the scrub's time budget is spent"""
+
+
+class BandwidthLimiter:
+    """Thread-safe token bucket capping bytes read per second"""
+
+    def __init__(self, bytes_per_second: float, burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if bytes_per_second <= 0:
+            raise ValueError('bytes_per_second must be positive')
+        self.rate = bytes_per_second
+        self.burst = burst if burst is not None else max(DEFAULT_CHUNK_SIZE, bytes_per_second / 10)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, size: int):
+        """Block until ``size`` more bytes may be read"""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Go into debt so waiting readers are served in order
+            self._tokens -= size
+            wait_for = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait_for > 0:
+            self.sleep(wait_for)
+
+
+class BackupScrubber:
+    """Verify stored chunks or backups against the catalog
+
+    ``chunks`` mode re-hashes every referenced chunk file and compares it
+    with its digest and size. ``backups`` mode streams each backup through
+    its chunk list and compares the result with the catalog's sha256 and
+    md5 checksum, as a restore would see it. Only the first
+    ``max_corrupt_listed`` corrupt objects of a pass are kept in the state
+    file and report; ``corrupt_count`` has the total.
+    """
+
+    def __init__(self, catalog: BackupCatalog, chunk_store: ChunkStore, workers: int = 4,
+                 bandwidth_mb_s: Optional[float] = None, state_path: Optional[str] = None,
+                 checkpoint_interval: float = 10.0, max_corrupt_listed: int = 1000):
+        self.catalog = catalog
+        self.chunk_store = chunk_store
+        self.workers = workers
+        self.limiter = BandwidthLimiter(bandwidth_mb_s * 1024 * 1024) if bandwidth_mb_s else None
+        self.state_path = state_path
+        self.checkpoint_interval = checkpoint_interval
+        self.max_corrupt_listed = max_corrupt_listed
+        self._deadline: Optional[float] = None
+
+    def _read(self, path: str, hasher: StreamingHasher):
+        """Feed a file to ``hasher`` through the bandwidth cap"""
+        for block in iter_chunks(path):
+            # Checked per block so a multi-GB backup cannot overrun the window
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                raise _DeadlineReached()
+            if self.limiter is not None:
+                self.limiter.acquire(len(block))
+            hasher.update(block)
+
+    def _check_chunk(self, digest: str, size: int) -> Dict[str, Any]:
+        hasher = StreamingHasher(('sha256',))
+        try:
+            self._read(self.chunk_store.chunk_path(digest), hasher)
+        except FileNotFoundError:
+            return {'bytes': 0, 'error': 'missing'}
+        except OSError as e:
+            return {'bytes': hasher.size, 'error': f'unreadable: {e}'}
+        if hasher.size != size:
+            return {'bytes': hasher.size, 'error': f'size {hasher.size} != {size}'}
+        if hasher.hexdigests()['sha256'] != digest:
+            return {'bytes': hasher.size, 'error': 'digest mismatch'}
+        return {'bytes': hasher.size, 'error': None}
+
+    def _check_backup(self, backup: Dict[str, Any], chunks) -> Dict[str, Any]:
+        hasher = StreamingHasher()
+        for digest, _ in chunks:
+            try:
+                self._read(self.chunk_store.chunk_path(digest), hasher)
+            except FileNotFoundError:
+                return {'bytes': hasher.size, 'error': f'missing chunk {digest}'}
+            except OSError as e:
+                return {'bytes': hasher.size, 'error': f'unreadable chunk {digest}: {e}'}
+        digests = hasher.hexdigests()
+        if hasher.size != backup['size']:
+            return {'bytes': hasher.size, 'error': f"size {hasher.size} != {backup['size']}"}
+        if digests['sha256'] != backup['sha256'] or digests['md5'] != backup['checksum']:
+            return {'bytes': hasher.size, 'error': 'checksum mismatch'}
+        return {'bytes': hasher.size, 'error': None}
+
+    def _tasks(self, mode: str, after: Optional[str]):
+        """Yield ``(key, callable)`` in catalog key order, starting after ``after``"""
+        if mode == 'chunks':
+            for digest, size in self.catalog.iter_chunk_records(after=after):
+                yield digest, (lambda d=digest, s=size: self._check_chunk(d, s))
+        else:
+            for backup in self.catalog.iter_backup_records(after=after):
+                if not backup.get('chunk_count'):
+                    continue  # metadata-only backups have no stored content
+                # Catalog reads stay on this thread; workers only touch files
+                chunks = self.catalog.backup_chunks(backup['id'])
+                if not chunks:
+                    continue  # replicated copies live on their targets, not in the chunk store
+                yield backup['id'], (lambda b=backup, c=chunks: self._check_backup(b, c))
+
+    def _load_state(self) -> Dict[str, Any]:
+        if self.state_path and os.path.exists(self.state_path):
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        return {}
+
+    def _save_state(self, state: Dict[str, Any]):
+        if not self.state_path:
+            return
+        tmp_path = f'{self.state_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def scrub(self, mode: str = 'chunks', max_seconds: Optional[float] = None,
+              max_objects: Optional[int] = None) -> Dict[str, Any]:
+        """Verify objects until done or a limit is hit, resuming any unfinished run
+
+        Returns the run's report: objects and bytes verified, the rate,
+        the corrupt objects found so far in this pass and whether the
+        pass completed. A completed pass clears the resume cursor. Checks
+        still running at ``max_seconds`` are abandoned, and the cursor stays
+        on the last object verified in order.
+        """
+        if mode not in SCRUB_MODES:
+            raise ValueError(f'Unknown scrub mode: {mode}')
+        state = self._load_state()
+        progress = state.get(mode) or {'cursor': None, 'objects': 0, 'bytes': 0, 'corrupt': []}
+        progress.setdefault('corrupt_count', len(progress['corrupt']))
+        resumed_from = progress['cursor']
+        if resumed_from:
+            logger.info(f'Resuming {mode} scrub after {resumed_from}')
+
+        start = last_checkpoint = time.monotonic()
+        objects = verified_bytes = 0
+        complete = True
+        pending = collections.deque()
+
+        def finish(key, future):
+            nonlocal objects, verified_bytes
+            result = future.result()
+            objects += 1
+            verified_bytes += result['bytes']
+            progress['cursor'] = key
+            progress['objects'] += 1
+            progress['bytes'] += result['bytes']
+            if result['error']:
+                logger.warning(f"Scrub found corrupt {mode[:-1]} {key}: {result['error']}")
+                progress['corrupt_count'] += 1
+                if len(progress['corrupt']) < self.max_corrupt_listed:
+                    progress['corrupt'].append({'id': key, 'error': result['error']})
+
+        self._deadline = start + max_seconds if max_seconds is not None else None
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scrub') as pool:
+            try:
+                submitted = 0
+                for key, check in self._tasks(mode, resumed_from):
+                    if (max_objects is not None and submitted >= max_objects) or \
+                            (max_seconds is not None and time.monotonic() - start >= max_seconds):
+                        complete = False
+                        break
+                    pending.append((key, pool.submit(check)))
+                    submitted += 1
+                    # Finish in submission order so the cursor never skips an object
+                    while len(pending) >= self.workers * 2:
+                        finish(*pending.popleft())
+                    if time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+                        self._save_state({**state, mode: progress})
+                        last_checkpoint = time.monotonic()
+                while pending:
+                    finish(*pending.popleft())
+            except _DeadlineReached:
+                complete = False
+            finally:
+                for _, future in pending:
+                    future.cancel()
+        # Cleared after the pool exits so checks still running at shutdown stop too
+        self._deadline = None
+
+        state[mode] = None if complete else progress
+        if complete:
+            state[f'last_{mode}'] = {
+                'finished': time.time(), 'objects': progress['objects'],
+                'bytes': progress['bytes'], 'corrupt': progress['corrupt_count']
+            }
+        self._save_state(state)
+
+        elapsed = time.monotonic() - start
+        report = {
+            'mode': mode,
+            'complete': complete,
+            'resumed_from': resumed_from,
+            'objects': objects,
+            'bytes': verified_bytes,
+            'elapsed': elapsed,
+            'rate_mb_s': verified_bytes / elapsed / (1024 * 1024) if elapsed else 0.0,
+            'pass_objects': progress['objects'],
+            'pass_bytes': progress['bytes'],
+            'corrupt': progress['corrupt'],
+            'corrupt_count': progress['corrupt_count']
+        }
+        logger.info(
+            f"Scrub ({mode}) verified {objects} objects, {verified_bytes} bytes at "
+            f"{report['rate_mb_s']:.1f} MiB/s; {progress['corrupt_count']} corrupt in this pass"
+            f"{'' if complete else ' (paused)'}"
+        )
+        return report
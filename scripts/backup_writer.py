@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Pipelined Multi-Target Backup Writer
+
+Streams a backup through reader -> compression (process pool) ->
+authenticated encryption -> concurrent upload to every enabled target.
+Stages are connected by bounded queues so reading, compressing and
+uploading overlap without buffering the whole backup. Objects are keyed by
+the sha256 of their plaintext chunk, or by an HMAC of it under the backup
+key when encryption is on so stored names do not fingerprint content, and
+a JSON manifest is written last.
+"""
+
+import base64
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+from backup_chunking import ContentDefinedChunker, new_backup_id
+from backup_hashing import BackupSource, StreamingHasher
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:  # pragma: no cover - optional dependency
+    AESGCM = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_LEVELS = {'gzip': 6, 'zstd': 3}
+# Weakest to strongest; zstd compresses better than gzip at its default level
+COMPRESSION_STRENGTH = (None, 'gzip', 'zstd')
+ENCRYPTED_MAGIC = b'WSB1'
+NONCE_SIZE = 12
+_DONE = object()
+
+
+def compress_chunk(data: bytes, algorithm: Optional[str], level: int, threads: int = 0) -> bytes:
+    """Compress one chunk; runs in the compression process pool."""
+    if algorithm is None:
+        return data
+    if algorithm == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if algorithm == 'zstd':
+        return zstandard.ZstdCompressor(level=level, threads=threads).compress(data)
+    raise ValueError(f'Unknown compression: {algorithm}')
+
+
+def decompress_chunk(data: bytes, algorithm: Optional[str]) -> bytes:
+    if algorithm is None:
+        return data
+    if algorithm == 'gzip':
+        return gzip.decompress(data)
+    if algorithm == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f'Unknown compression: {algorithm}')
+
+
+def load_encryption_key(env_var: str = 'BACKUP_ENCRYPTION_KEY') -> Optional[bytes]:
+    """Read a base64-encoded 256-bit AES key from the environment."""
+    value = os.environ.get(env_var)
+    if not value:
+        return None
+    key = base64.b64decode(value)
+    if len(key) != 32:
+        raise ValueError(f'{env_var} must decode to 32 bytes')
+    return key
+
+
+class LocalDirectoryTarget:
+    """Write objects as files under a directory (local NAS mount or stand-in)."""
+
+    def __init__(self, name: str, directory: str):
+        self.name = name
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), 'rb') as f:
+            return f.read()
+
+
+class HttpTarget:
+    """PUT objects to ``<base_url>/<key>`` (object-store style API or local stub)."""
+
+    def __init__(self, name: str, base_url: str, timeout: float = 60.0, pool_size: int = 8):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def exists(self, key: str) -> bool:
+        response = self.session.head(f'{self.base_url}/{key}', timeout=self.timeout)
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    def put(self, key: str, data: bytes):
+        response = self.session.put(f'{self.base_url}/{key}', data=data, timeout=self.timeout)
+        response.raise_for_status()
+
+    def get(self, key: str) -> bytes:
+        response = self.session.get(f'{self.base_url}/{key}', timeout=self.timeout)
+        response.raise_for_status()
+        return response.content
+
+
+def _build_target(config: Dict[str, Any], stand_in_root: Optional[str],
+                  stand_in_url: Optional[str]):
+    name = config['name']
+    path = config.get('path', '')
+    if stand_in_root is not None:
+        return LocalDirectoryTarget(name, os.path.join(stand_in_root, name))
+    if stand_in_url is not None:
+        return HttpTarget(name, f"{stand_in_url.rstrip('/')}/{name}")
+    if path.startswith(('http://', 'https://')):
+        return HttpTarget(name, path)
+    if path and '://' not in path:
+        return LocalDirectoryTarget(name, path)
+    logger.warning(f'No client for backup target {name}, skipping it; configure a stand-in')
+    return None
+
+
+def build_targets(target_configs: List[Dict[str, Any]], stand_in_root: Optional[str] = None,
+                  stand_in_url: Optional[str] = None) -> List:
+    """Build the enabled targets from the ``backup.targets`` config.
+
+    Local paths and http(s) URLs are written directly. Remote targets
+    (drive://, nas://, buckets) have no client here and are skipped with a
+    warning unless replaced by a stand-in: a directory per target under
+    ``stand_in_root`` or a URL per target under ``stand_in_url``.
+    """
+    targets = []
+    for config in target_configs:
+        if not config.get('enabled', True):
+            continue
+        target = _build_target(config, stand_in_root, stand_in_url)
+        if target is not None:
+            targets.append(target)
+    return targets
+
+
+class PipelinedBackupWriter:
+    """Compress, encrypt and upload a backup to several targets concurrently."""
+
+    def __init__(self, targets: List, compression: Optional[str] = 'gzip',
+                 compression_level: Optional[int] = None, encryption_key: Optional[bytes] = None,
+                 compression_workers: Optional[int] = None, zstd_threads: int = 0,
+                 queue_size: int = 16, upload_concurrency: int = 4,
+                 chunker: Optional[ContentDefinedChunker] = None):
+        if not targets:
+            raise ValueError('At least one backup target is required')
+        if compression not in (None, 'gzip', 'zstd'):
+            raise ValueError(f'Unknown compression: {compression}')
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError('zstd compression requires the zstandard package')
+        if encryption_key is not None and AESGCM is None:
+            raise ValueError('Encryption requires the cryptography package')
+
+        self.targets = targets
+        self.compression = compression
+        self.compression_level = compression_level if compression_level is not None \
+            else COMPRESSION_LEVELS.get(compression, 0)
+        self.compression_workers = compression_workers or os.cpu_count() or 1
+        self.zstd_threads = zstd_threads
+        self.queue_size = queue_size
+        self.upload_concurrency = upload_concurrency
+        self.chunker = chunker or ContentDefinedChunker()
+        self._aead = AESGCM(encryption_key) if encryption_key is not None else None
+        # Separate subkey for object names so they reveal nothing about content
+        self._name_key = hmac.new(encryption_key, b'object-names', hashlib.sha256).digest() \
+            if encryption_key is not None else None
+
+    def _encrypt(self, key: str, data: bytes) -> bytes:
+        """AES-256-GCM with the object key as associated data, so blobs cannot be swapped."""
+        if self._aead is None:
+            return data
+        nonce = os.urandom(NONCE_SIZE)
+        return ENCRYPTED_MAGIC + nonce + self._aead.encrypt(nonce, data, key.encode('utf-8'))
+
+    def _decrypt(self, key: str, blob: bytes) -> bytes:
+        if self._aead is None:
+            return blob
+        if not blob.startswith(ENCRYPTED_MAGIC):
+            raise ValueError(f'Object {key} is not encrypted')
+        nonce = blob[len(ENCRYPTED_MAGIC):len(ENCRYPTED_MAGIC) + NONCE_SIZE]
+        return self._aead.decrypt(nonce, blob[len(ENCRYPTED_MAGIC) + NONCE_SIZE:], key.encode('utf-8'))
+
+    @staticmethod
+    def _object_key(backup_id_or_digest: str, manifest: bool = False) -> str:
+        if manifest:
+            return f'manifests/{backup_id_or_digest}.json'
+        return f'chunks/{backup_id_or_digest[:2]}/{backup_id_or_digest}'
+
+    def _chunk_key(self, digest: str) -> str:
+        """Object key for a chunk; keyed by HMAC rather than sha256 when encrypting"""
+        if self._name_key is None:
+            return self._object_key(digest)
+        return self._object_key(hmac.new(self._name_key, digest.encode('ascii'), hashlib.sha256).hexdigest())
+
+    def write(self, data_type: str, source: BackupSource) -> Dict[str, Any]:
+        """Run the pipeline over ``source`` and return the backup manifest."""
+        errors: List[BaseException] = []
+        abort = threading.Event()
+        compressed: 'queue.Queue' = queue.Queue(maxsize=self.queue_size)
+        uploads = {target.name: queue.Queue(maxsize=self.queue_size) for target in self.targets}
+        hasher = StreamingHasher()
+        chunks: List[List[Any]] = []
+        stats = {'chunks': 0, 'bytes_in': 0, 'bytes_stored': 0, 'skipped': 0}
+        stats_lock = threading.Lock()
+
+        def count(**increments):
+            with stats_lock:
+                for name, value in increments.items():
+                    stats[name] += value
+
+        def fail(error: BaseException):
+            errors.append(error)
+            abort.set()
+
+        def put(q: 'queue.Queue', item) -> bool:
+            # Poll for aborts so a failed stage cannot wedge its neighbours
+            while not abort.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(q: 'queue.Queue'):
+            while not abort.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _DONE
+
+        def read(pool: ProcessPoolExecutor):
+            try:
+                for chunk in self.chunker.chunks(source):
+                    if abort.is_set():
+                        return
+                    hasher.update(chunk)
+                    digest = hashlib.sha256(chunk).hexdigest()
+                    chunks.append([digest, len(chunk)])
+                    count(bytes_in=len(chunk))
+                    key = self._chunk_key(digest)
+                    if all(target.exists(key) for target in self.targets):
+                        count(skipped=1)
+                        continue
+                    future = pool.submit(
+                        compress_chunk, chunk, self.compression, self.compression_level, self.zstd_threads
+                    )
+                    if not put(compressed, (key, future)):
+                        return
+            except BaseException as e:
+                fail(e)
+            finally:
+                put(compressed, _DONE)
+
+        def encrypt():
+            try:
+                while True:
+                    item = get(compressed)
+                    if item is _DONE:
+                        break
+                    key, future = item
+                    blob = self._encrypt(key, future.result())
+                    count(chunks=1, bytes_stored=len(blob))
+                    for target in self.targets:
+                        if not put(uploads[target.name], (key, blob)):
+                            return
+            except BaseException as e:
+                fail(e)
+            finally:
+                for target in self.targets:
+                    for _ in range(self.upload_concurrency):
+                        put(uploads[target.name], _DONE)
+
+        def upload(target):
+            try:
+                while True:
+                    item = get(uploads[target.name])
+                    if item is _DONE:
+                        return
+                    key, blob = item
+                    target.put(key, blob)
+            except BaseException as e:
+                fail(RuntimeError(f'Upload to {target.name} failed: {e}'))
+
+        with ProcessPoolExecutor(max_workers=self.compression_workers) as pool:
+            threads = [threading.Thread(target=read, args=(pool,), name='backup-reader'),
+                       threading.Thread(target=encrypt, name='backup-encrypt')]
+            threads += [
+                threading.Thread(target=upload, args=(target,), name=f'backup-upload-{target.name}')
+                for target in self.targets for _ in range(self.upload_concurrency)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            if errors:
+                # shutdown(cancel_futures=...) needs Python 3.9; cancel the
+                # compressions still queued by hand
+                while True:
+                    try:
+                        item = compressed.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _DONE:
+                        item[1].cancel()
+                pool.shutdown(wait=True)
+                raise errors[0]
+
+        digests = hasher.hexdigests()
+        created = datetime.now()
+        manifest = {
+            'id': new_backup_id(created),
+            'type': data_type,
+            'timestamp': created.isoformat(),
+            'size': hasher.size,
+            'checksum': digests['md5'],
+            'sha256': digests['sha256'],
+            'compression': self.compression,
+            'encrypted': self._aead is not None,
+            'stored_bytes': stats['bytes_stored'],
+            'targets': [target.name for target in self.targets],
+            'chunks': chunks
+        }
+        manifest_key = self._object_key(manifest['id'], manifest=True)
+        manifest_blob = self._encrypt(manifest_key, json.dumps(manifest).encode('utf-8'))
+        for target in self.targets:
+            target.put(manifest_key, manifest_blob)
+        logger.info(
+            f"Backup {manifest['id']} written to {len(self.targets)} targets: "
+            f"{stats['bytes_in']} bytes in, {stats['bytes_stored']} stored per target, "
+            f"{stats['skipped']} chunks already present"
+        )
+        return manifest
+
+    def read_manifest(self, target, backup_id: str) -> Dict[str, Any]:
+        key = self._object_key(backup_id, manifest=True)
+        return json.loads(self._decrypt(key, target.get(key)))
+
+    def restore(self, target, backup_id: str) -> Iterator[bytes]:
+        """Yield a backup's plaintext from one target, verifying every chunk."""
+        manifest = self.read_manifest(target, backup_id)
+        for digest, _ in manifest['chunks']:
+            key = self._chunk_key(digest)
+            chunk = decompress_chunk(self._decrypt(key, target.get(key)), manifest['compression'])
+            if hashlib.sha256(chunk).hexdigest() != digest:
+                raise ValueError(f'Chunk {digest} failed verification')
+            yield chunk
+
+
+def build_backup_writer(backup_config: Dict[str, Any], stand_in_root: Optional[str] = None,
+                        stand_in_url: Optional[str] = None,
+                        encryption_key: Optional[bytes] = None) -> PipelinedBackupWriter:
+    """Build a writer from the ``backup`` section of backup_schedule.yaml.
+
+    One compressed, encrypted copy is shared by all targets, so the
+    strongest settings any usable target asks for are applied to all: the
+    strongest ``compression`` (see COMPRESSION_STRENGTH) at the highest
+    ``compression_level`` given for it, else ``pipeline.compression_level``,
+    and encryption if any target asks for it.
+    Targets without a client are skipped (see ``build_targets``); if none
+    is usable, copies go to ``<storage.path>/replicas`` instead.
+    """
+    storage = backup_config.get('storage', {})
+    configs = backup_config.get('targets', [])
+    targets = build_targets(configs, stand_in_root, stand_in_url)
+    built = {target.name for target in targets}
+    target_configs = [t for t in configs if t.get('enabled', True) and t['name'] in built]
+    if not targets:
+        directory = os.path.join(storage.get('path', 'backups'), 'replicas')
+        logger.warning(f'No usable backup targets, writing copies to {directory}')
+        targets.append(LocalDirectoryTarget('local_storage', directory))
+    pipeline = backup_config.get('pipeline', {})
+    for config in target_configs:
+        if config.get('compression') not in COMPRESSION_STRENGTH:
+            raise ValueError(f"Unknown compression for target {config['name']}: {config['compression']}")
+    compression = max(
+        (t.get('compression') for t in target_configs), key=COMPRESSION_STRENGTH.index, default=None
+    )
+    levels = [t['compression_level'] for t in target_configs
+              if t.get('compression') == compression and t.get('compression_level') is not None]
+    compression_level = max(levels) if levels else pipeline.get('compression_level')
+    if any(t.get('encryption') for t in target_configs):
+        encryption_key = encryption_key or load_encryption_key()
+        if encryption_key is None:
+            raise ValueError('A target requires encryption but BACKUP_ENCRYPTION_KEY is not set')
+    chunking = storage.get('chunking', {})
+    return PipelinedBackupWriter(
+        targets,
+        compression=compression,
+        compression_level=compression_level,
+        encryption_key=encryption_key,
+        compression_workers=pipeline.get('compression_workers'),
+        zstd_threads=pipeline.get('zstd_threads', 0),
+        queue_size=pipeline.get('queue_size', 16),
+        upload_concurrency=pipeline.get('upload_concurrency', 4),
+        chunker=ContentDefinedChunker(
+            min_size=chunking.get('min_size_kb', 16) * 1024,
+            avg_size=chunking.get('avg_size_kb', 64) * 1024,
+            max_size=chunking.get('max_size_kb', 256) * 1024
+        )
+    )
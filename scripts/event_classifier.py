@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Security Event Classifier
+
+Tags Google Workspace audit events with a category and severity in a
+single pass. Rules are compiled once into an exact-match table plus one
+alternation regex for substring rules.
+"""
+
+import logging
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_LEVELS = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+
+DEFAULT_RULES = [
+    {'match': 'contains', 'pattern': 'login_failure', 'category': 'authentication', 'severity': 'medium'},
+    {'match': 'contains', 'pattern': 'login_success_unusual_location', 'category': 'authentication', 'severity': 'high'},
+    {'match': 'contains', 'pattern': 'password_change', 'category': 'credential_change', 'severity': 'medium'},
+    {'match': 'contains', 'pattern': 'admin_grant', 'category': 'privilege_change', 'severity': 'critical'},
+    {'match': 'contains', 'pattern': 'admin_revoke', 'category': 'privilege_change', 'severity': 'high'},
+    {'match': 'contains', 'pattern': 'create_user', 'category': 'account_lifecycle', 'severity': 'medium'},
+    {'match': 'contains', 'pattern': 'delete_user', 'category': 'account_lifecycle', 'severity': 'high'},
+]
+
+
+class SecurityEventClassifier:
+    """Classify audit events by name against a compiled rule list.
+
+    Exact rules win over substring rules; among substring rules the
+    leftmost match in the event name wins, ties going to the earlier rule.
+    Matching is case-insensitive. Event names have low cardinality, so
+    results are memoized per distinct name up to ``cache_size`` entries.
+    """
+
+    def __init__(self, rules: List[Dict], cache_size: int = 65536):
+        self.rules = list(rules)
+        self.cache_size = cache_size
+        self._cache: Dict[str, Optional[Tuple[str, str]]] = {}
+        self._exact: Dict[str, Tuple[str, str]] = {}
+        contains = []
+
+        for index, rule in enumerate(self.rules):
+            severity = rule.get('severity', 'low').lower()
+            if severity not in SEVERITY_LEVELS:
+                raise ValueError(f"Unknown severity '{severity}' in rule {rule}")
+            tag = (rule['category'], severity)
+            match = rule.get('match', 'exact')
+
+            if match == 'exact':
+                self._exact.setdefault(rule['pattern'].lower(), tag)
+            elif match == 'contains':
+                contains.append((f'r{index}', re.escape(rule['pattern']), tag))
+            else:
+                raise ValueError(f"Unknown match type '{match}' in rule {rule}")
+
+        self._contains_tags = {group: tag for group, _, tag in contains}
+        self._contains = re.compile(
+            '|'.join(f'(?P<{group}>{pattern})' for group, pattern, _ in contains),
+            re.IGNORECASE
+        ) if contains else None
+
+    @classmethod
+    def from_config(cls, path: str = 'configs/security_config.yaml') -> 'SecurityEventClassifier':
+        """Build a classifier from security_config.yaml, falling back to defaults."""
+        if not os.path.exists(path):
+            logger.warning(f"Security config not found: {path}, using default event rules")
+            return cls(DEFAULT_RULES)
+
+        with open(path, 'r') as f:
+            config = yaml.safe_load(f) or {}
+        rules = config.get('security', {}).get('event_classification', {}).get('rules')
+        return cls(rules or DEFAULT_RULES)
+
+    def _match(self, name: str) -> Optional[Tuple[str, str]]:
+        tag = self._exact.get(name.lower())
+        if tag is not None or self._contains is None:
+            return tag
+        match = self._contains.search(name)
+        return self._contains_tags[match.lastgroup] if match else None
+
+    def classify(self, name: Optional[str]) -> Optional[Tuple[str, str]]:
+        """Return ``(category, severity)`` for an event name, or None."""
+        if not name:
+            return None
+        try:
+            return self._cache[name]
+        except KeyError:
+            tag = self._match(name)
+            if len(self._cache) < self.cache_size:
+                self._cache[name] = tag
+            return tag
+
+    def classify_activities(self, activities: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield one tagged record per security-relevant event in ``activities``."""
+        classify = self.classify
+        for activity in activities:
+            events = activity.get('events')
+            if not events:
+                continue
+            for event in events:
+                event_name = event.get('name')
+                tag = classify(event_name or event.get('type'))
+                if tag is None:
+                    continue
+                yield {
+                    'timestamp': activity.get('id', {}).get('time'),
+                    'actor': activity.get('actor', {}).get('email'),
+                    'event_type': event.get('type'),
+                    'event_name': event_name,
+                    'category': tag[0],
+                    'severity': tag[1]
+                }
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Google API Service Factory
+
+Builds googleapiclient services lazily from locally cached discovery
+documents over one authorized HTTP transport. Discovery documents are read
+from an on-disk cache, then from the copies bundled with
+google-api-python-client, and only fetched over the network (and cached)
+when neither has them, so cron-launched runs start without discovery
+round-trips.
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'workspace-security', 'discovery')
+
+
+class GoogleServiceFactory:
+    """Lazily built, memoized Google API services sharing one transport.
+
+    ``service()`` objects share the factory's transport, which (like
+    httplib2) is not thread-safe; use ``build(..., http=factory.new_http())``
+    for services used from worker threads.
+    """
+
+    def __init__(self, credentials, cache_dir=None, timeout=60):
+        self.credentials = credentials
+        self.cache_dir = cache_dir or os.environ.get('GOOGLE_DISCOVERY_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.timeout = timeout
+        self._http = None
+        self._services = {}
+        self._lock = threading.Lock()
+        self.stats = {'builds': 0, 'disk_hits': 0, 'static_hits': 0, 'fetches': 0}
+
+    def new_http(self):
+        """Create a new authorized transport."""
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+        return AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.timeout))
+
+    @property
+    def http(self):
+        """The shared authorized transport, created on first use."""
+        if self._http is None:
+            self._http = self.new_http()
+        return self._http
+
+    def _cache_path(self, api_name, api_version):
+        return os.path.join(self.cache_dir, f'{api_name}.{api_version}.json')
+
+    def _fetch_discovery_document(self, api_name, api_version):
+        """Download a discovery document; tries the v2 then the v1 discovery URL."""
+        import httplib2
+        from googleapiclient.discovery import DISCOVERY_URI, V2_DISCOVERY_URI
+
+        http = httplib2.Http(timeout=self.timeout)
+        for template in (V2_DISCOVERY_URI, DISCOVERY_URI):
+            url = template.format(api=api_name, apiVersion=api_version)
+            response, content = http.request(url)
+            if response.status < 400:
+                return content.decode('utf-8')
+        raise ValueError(f'No discovery document for {api_name} {api_version}')
+
+    def discovery_document(self, api_name, api_version):
+        """Return the discovery document, preferring local copies over the network."""
+        path = self._cache_path(api_name, api_version)
+        if os.path.exists(path):
+            self.stats['disk_hits'] += 1
+            with open(path, 'r') as f:
+                return f.read()
+
+        from googleapiclient.discovery_cache import get_static_doc
+        document = get_static_doc(api_name, api_version)
+        if document is not None:
+            self.stats['static_hits'] += 1
+            return document
+
+        logger.info(f'Fetching discovery document for {api_name} {api_version}')
+        document = self._fetch_discovery_document(api_name, api_version)
+        self.stats['fetches'] += 1
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(document)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f'Could not cache discovery document in {self.cache_dir}: {e}')
+        return document
+
+    def build(self, api_name, api_version, http=None):
+        """Build a new service object; uses the shared transport unless ``http`` is given."""
+        from googleapiclient.discovery import build_from_document
+        document = self.discovery_document(api_name, api_version)
+        self.stats['builds'] += 1
+        return build_from_document(document, http=http or self.http)
+
+    def service(self, api_name, api_version):
+        """Return the memoized service, building it on first use."""
+        key = (api_name, api_version)
+        with self._lock:
+            if key not in self._services:
+                self._services[key] = self.build(api_name, api_version)
+            return self._services[key]
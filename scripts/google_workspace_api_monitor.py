@@ -7,14 +7,16 @@ Provides real-time alerting and compliance reporting.
 """
 
 import os
-import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from google.auth.transport.requests import Request
 from google.oauth2.service_account import Credentials
-from google.apis.admin import directory_v1
-from google.apis.reports import reports_v1
-from google.apis.drive import drive_v3
+from event_classifier import SecurityEventClassifier
+from google_service_factory import GoogleServiceFactory
+from mfa_census import MfaCensus
+from report_writer import StreamingReportWriter, load_compression_settings
 
 # Configure logging
 logging.basicConfig(
@@ -26,12 +28,23 @@ logger = logging.getLogger(__name__)
 class GoogleWorkspaceMonitor:
     """Monitor Google Workspace security events and activities."""
     
-    def __init__(self, service_account_file):
+    def __init__(self, service_account_file, event_classifier=None):
         """Initialize the monitor with service account credentials."""
+        self.event_classifier = event_classifier or SecurityEventClassifier.from_config()
         self.credentials = self._load_credentials(service_account_file)
-        self.directory_service = self._build_service('admin', 'directory_v1')
-        self.reports_service = self._build_service('admin', 'reports_v1')
-        self.drive_service = self._build_service('drive', 'v3')
+        self.services = GoogleServiceFactory(self.credentials)
+    
+    @property
+    def directory_service(self):
+        return self.services.service('admin', 'directory_v1')
+    
+    @property
+    def reports_service(self):
+        return self.services.service('admin', 'reports_v1')
+    
+    @property
+    def drive_service(self):
+        return self.services.service('drive', 'v3')
     
     def _load_credentials(self, service_account_file):
         """Load service account credentials."""
@@ -52,111 +65,246 @@ class GoogleWorkspaceMonitor:
         return credentials
     
     def _build_service(self, api_name, api_version):
-        """Build API service object."""
-        from googleapiclient.discovery import build
-        return build(api_name, api_version, credentials=self.credentials)
+        """Build a new API service object with its own HTTP transport."""
+        return self.services.build(api_name, api_version, http=self.services.new_http())
     
-    def get_audit_logs(self, start_date=None, max_results=100):
-        """Retrieve audit logs from Google Workspace."""
+    def _iter_pages(self, collection, params, items_key, max_results=None):
+        """Yield pages from a list() call, prefetching the next page in the background.
+
+        At most two pages are held in memory: the one being consumed and the
+        one being fetched.
+        """
+        request = collection.list(**params)
+        fetched = 0
+        pending = None
+        prefetcher = ThreadPoolExecutor(max_workers=1)
+        try:
+            pending = prefetcher.submit(request.execute)
+            while pending is not None:
+                response = pending.result()
+                page = response.get(items_key, [])
+                fetched += len(page)
+
+                pending = None
+                if not max_results or fetched < max_results:
+                    request = collection.list_next(request, response)
+                    if request is not None:
+                        pending = prefetcher.submit(request.execute)
+
+                yield page
+        finally:
+            # shutdown(cancel_futures=...) needs Python 3.9; cancel by hand
+            if pending is not None:
+                pending.cancel()
+            prefetcher.shutdown(wait=True)
+
+    def _iter_activity_pages(self, application_name, start_time, end_time=None,
+                             page_size=1000, max_results=None, service=None):
+        """Yield pages of Reports API activities."""
+        service = service or self.reports_service
+        params = {
+            'userKey': 'all',
+            'applicationName': application_name,
+            'startTime': start_time,
+            'maxResults': min(page_size, max_results) if max_results else page_size
+        }
+        if end_time:
+            params['endTime'] = end_time
+
+        return self._iter_pages(service.activities(), params, 'activities', max_results)
+
+    def iter_audit_logs(self, start_date=None, end_date=None, application_name='admin',
+                        page_size=1000, max_results=None, service=None, raise_errors=False):
+        """Stream audit log activities, following nextPageToken to the last page.
+
+        Errors end the stream early and are only logged unless
+        ``raise_errors`` is set, which callers that checkpoint progress need.
+        """
         if not start_date:
             start_date = (datetime.now() - timedelta(hours=24)).isoformat()
-        
+
+        count = 0
         try:
-            results = self.reports_service.activities().list(
-                userKey='all',
-                applicationName='admin',
-                startTime=start_date,
-                maxResults=max_results
-            ).execute()
-            
-            activities = results.get('activities', [])
-            logger.info(f"Retrieved {len(activities)} audit log entries")
-            return activities
+            pages = self._iter_activity_pages(
+                application_name, start_date, end_date,
+                page_size=page_size, max_results=max_results, service=service
+            )
+            for page in pages:
+                if max_results:
+                    page = page[:max_results - count]
+                count += len(page)
+                yield from page
         except Exception as e:
             logger.error(f"Error retrieving audit logs: {e}")
-            return []
+            if raise_errors:
+                raise
+            return
+
+        logger.info(f"Retrieved {count} {application_name} audit log entries")
+
+    def get_audit_logs(self, start_date=None, max_results=100):
+        """Retrieve audit logs from Google Workspace.
+
+        Pass ``max_results=None`` to read every page; prefer ``iter_audit_logs``
+        when the result does not need to be held in memory.
+        """
+        return list(self.iter_audit_logs(start_date, max_results=max_results))
     
-    def check_mfa_status(self):
-        """Check MFA status for all users."""
+    def check_mfa_status(self, page_size=500):
+        """Check MFA status for all users.
+
+        Pages through the whole directory with a minimal field projection and
+        only keeps running counts, overall and per organizational unit.
+        """
+        census = MfaCensus()
         try:
-            results = self.directory_service.users().list(
-                customer='my_customer',
-                maxResults=500
-            ).execute()
-            
-            users = results.get('users', [])
-            mfa_enabled_count = sum(1 for u in users if u.get('twoStepVerificationEnrolled'))
-            total_users = len(users)
-            
-            logger.info(f"MFA Status: {mfa_enabled_count}/{total_users} users have MFA enabled")
-            return {
-                'total_users': total_users,
-                'mfa_enabled': mfa_enabled_count,
-                'mfa_disabled': total_users - mfa_enabled_count,
-                'percentage': round((mfa_enabled_count / total_users) * 100, 2) if total_users > 0 else 0
-            }
+            pages = self._iter_pages(
+                self.directory_service.users(),
+                {
+                    'customer': 'my_customer',
+                    'maxResults': page_size,
+                    'fields': f'nextPageToken,users({",".join(MfaCensus.FIELDS)})'
+                },
+                'users'
+            )
+            for page in pages:
+                census.add_users(page)
         except Exception as e:
             logger.error(f"Error checking MFA status: {e}")
             return {}
+
+        status = census.summary()
+        logger.info(
+            f"MFA Status: {status['mfa_enabled']}/{status['total_users']} users have MFA enabled "
+            f"across {len(status['by_org_unit'])} organizational units"
+        )
+        return status
     
-    def monitor_security_events(self):
-        """Monitor for security-related events."""
-        security_events = []
-        
-        # Get recent audit logs
-        logs = self.get_audit_logs()
-        
-        # Filter for security-relevant events
-        security_event_types = [
-            'login_failure',
-            'login_success_unusual_location',
-            'password_change',
-            'admin_grant',
-            'admin_revoke',
-            'create_user',
-            'delete_user'
-        ]
+    def monitor_security_events(self, logs=None):
+        """Monitor for security-related events.
+
+        ``logs`` may be an already fetched iterable of activities; by default
+        recent audit logs are streamed from the Reports API.
+        """
+        if logs is None:
+            logs = self.iter_audit_logs()
         
-        for log in logs:
-            events = log.get('events', [])
-            for event in events:
-                event_type = event.get('type')
-                if any(sec_type in str(event_type) for sec_type in security_event_types):
-                    security_events.append({
-                        'timestamp': log.get('id', {}).get('time'),
-                        'actor': log.get('actor', {}).get('email'),
-                        'event_type': event_type,
-                        'event_name': event.get('name')
-                    })
+        # Tag security-relevant events in a single pass
+        security_events = list(self.event_classifier.classify_activities(logs))
         
         logger.info(f"Found {len(security_events)} security events")
         return security_events
     
-    def generate_report(self):
-        """Generate comprehensive security report."""
-        report = {
-            'timestamp': datetime.now().isoformat(),
-            'mfa_status': self.check_mfa_status(),
-            'security_events': self.monitor_security_events(),
-            'audit_logs': self.get_audit_logs()
+    def generate_report(self, context=None, output_format='json', compression=None):
+        """Generate comprehensive security report.
+
+        Audit logs are streamed from the Reports API straight into the report
+        file and classified in the same pass, so the full log is never held
+        in memory. Every section reads its data through one ``ReportContext``
+        so each dataset is fetched at most once per report. Returns a summary
+        rather than the report contents.
+        """
+        context = context or ReportContext()
+        timestamp = datetime.now()
+        report_file = StreamingReportWriter.filename(
+            f"security_report_{timestamp.strftime('%Y%m%d_%H%M%S')}", output_format, compression
+        )
+        mfa_status = context.get('mfa_status', self.check_mfa_status)
+        security_events = []
+
+        def classified(activities):
+            classify = self.event_classifier.classify_activities
+            for activity in activities:
+                security_events.extend(classify((activity,)))
+                yield activity
+
+        with StreamingReportWriter(report_file, output_format, compression) as writer:
+            writer.write_section('timestamp', timestamp.isoformat())
+            writer.write_section('mfa_status', mfa_status)
+            audit_log_count = writer.write_records(
+                'audit_logs', classified(context.stream('audit_logs', self.iter_audit_logs))
+            )
+            writer.write_records('security_events', security_events)
+            writer.write_section('collection_stats', context.stats)
+
+        logger.info(
+            f"Report generated: {report_file} ({audit_log_count} audit log entries, "
+            f"{len(security_events)} security events)"
+        )
+        return {
+            'report_file': report_file,
+            'timestamp': timestamp.isoformat(),
+            'mfa_status': mfa_status,
+            'audit_log_count': audit_log_count,
+            'security_event_count': len(security_events),
+            'collection_stats': context.stats
         }
-        
-        # Save report to file
-        report_file = f"security_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(report_file, 'w') as f:
-            json.dump(report, f, indent=2)
-        
-        logger.info(f"Report generated: {report_file}")
-        return report
+
+class ReportContext:
+    """Per-run snapshot that fetches each report dataset once and shares it."""
+
+    def __init__(self):
+        self._datasets = {}
+        self.stats = {}
+
+    def get(self, name, loader):
+        """Return the dataset ``name``, calling ``loader`` only on first use."""
+        if name in self._datasets:
+            self.stats[name]['hits'] += 1
+            return self._datasets[name]
+
+        started = time.perf_counter()
+        self._datasets[name] = loader()
+        elapsed = time.perf_counter() - started
+        stats = self.stats.setdefault(name, {'fetches': 0, 'hits': 0, 'seconds': 0.0})
+        stats['fetches'] += 1
+        stats['seconds'] = round(stats['seconds'] + elapsed, 3)
+        logger.info(f"Fetched {name} in {elapsed:.2f}s")
+        return self._datasets[name]
+
+    def stream(self, name, loader):
+        """Iterate the dataset ``name`` once without retaining it.
+
+        A dataset already materialized by get() is replayed instead of
+        fetched again.
+        """
+        if name in self._datasets:
+            self.stats[name]['hits'] += 1
+            return iter(self._datasets[name])
+        return self._timed_stream(name, loader)
+
+    def _timed_stream(self, name, loader):
+        stats = self.stats.setdefault(name, {'fetches': 0, 'hits': 0, 'seconds': 0.0})
+        stats['fetches'] += 1
+        started = time.perf_counter()
+        try:
+            yield from loader()
+        finally:
+            elapsed = time.perf_counter() - started
+            stats['seconds'] = round(stats['seconds'] + elapsed, 3)
+            logger.info(f"Streamed {name} in {elapsed:.2f}s")
+
+    def invalidate(self, name=None):
+        """Drop one dataset, or all of them, so the next get() refetches."""
+        if name is None:
+            self._datasets.clear()
+        else:
+            self._datasets.pop(name, None)
 
 def main():
     """Main execution function."""
     service_account_file = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', 'service_account.json')
     
     monitor = GoogleWorkspaceMonitor(service_account_file)
-    report = monitor.generate_report()
+    summary = monitor.generate_report(
+        output_format=os.getenv('REPORT_FORMAT', 'json'),
+        compression=load_compression_settings()
+    )
     
-    print(json.dumps(report, indent=2))
+    print(f"Report written to {summary['report_file']}: "
+          f"{summary['audit_log_count']} audit log entries, "
+          f"{summary['security_event_count']} security events, "
+          f"MFA enabled for {summary['mfa_status'].get('percentage', 0)}% of users")
 
 if __name__ == '__main__':
     main()
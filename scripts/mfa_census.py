@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+MFA Census
+
+Streaming 2-Step Verification counts for Google Workspace directory users,
+with per-organizational-unit breakdowns. Only counters are retained, so
+memory does not grow with the size of the directory.
+"""
+
+from typing import Dict, Iterable
+
+
+class MfaCensus:
+    """Accumulate MFA enrollment counts one directory page at a time."""
+
+    # Directory API fields needed for the census; used for the fields= projection
+    FIELDS = ('primaryEmail', 'isEnrolledIn2Sv', 'orgUnitPath')
+
+    def __init__(self):
+        self.total_users = 0
+        self.mfa_enabled = 0
+        # orgUnitPath -> [total_users, mfa_enabled]
+        self.org_units: Dict[str, list] = {}
+
+    def add_users(self, users: Iterable[Dict]):
+        """Count a page of users without keeping a reference to them."""
+        org_units = self.org_units
+        for user in users:
+            enrolled = 1 if user.get('isEnrolledIn2Sv') else 0
+            org_unit = user.get('orgUnitPath', '/')
+            counts = org_units.get(org_unit)
+            if counts is None:
+                counts = org_units[org_unit] = [0, 0]
+            counts[0] += 1
+            counts[1] += enrolled
+            self.total_users += 1
+            self.mfa_enabled += enrolled
+
+    @staticmethod
+    def _percentage(enabled: int, total: int) -> float:
+        return round((enabled / total) * 100, 2) if total > 0 else 0
+
+    def summary(self) -> Dict:
+        """Return the check_mfa_status report for the users counted so far."""
+        return {
+            'total_users': self.total_users,
+            'mfa_enabled': self.mfa_enabled,
+            'mfa_disabled': self.total_users - self.mfa_enabled,
+            'percentage': self._percentage(self.mfa_enabled, self.total_users),
+            'by_org_unit': {
+                org_unit: {
+                    'total_users': total,
+                    'mfa_enabled': enabled,
+                    'mfa_disabled': total - enabled,
+                    'percentage': self._percentage(enabled, total)
+                }
+                for org_unit, (total, enabled) in sorted(self.org_units.items())
+            }
+        }
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Streaming Report Writer
+
+Writes security reports section by section straight from record generators,
+as NDJSON or a single chunked JSON document, with optional gzip/zstd
+compression. Uses orjson for serialization when it is installed.
+"""
+
+import gzip
+import json
+import logging
+import os
+from typing import Any, Iterable, Optional
+
+import yaml
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('json', 'ndjson')
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize compactly to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def load_compression_settings(path: str = 'configs/cache_config.yaml') -> Optional[str]:
+    """Return the compression algorithm from cache_config.yaml, or None if disabled."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        config = yaml.safe_load(f) or {}
+    compression = config.get('cache', {}).get('compression', {})
+    if not compression.get('enabled'):
+        return None
+    return compression.get('algorithm', 'gzip')
+
+
+class StreamingReportWriter:
+    """Write report sections incrementally without building the report in memory.
+
+    In ``json`` mode the output is one JSON object whose record sections are
+    arrays; in ``ndjson`` mode every line is ``{"section": ..., "data": ...}``.
+    """
+
+    def __init__(self, path: str, output_format: str = 'json', compression: Optional[str] = None,
+                 chunk_size: int = 64 * 1024, compression_level: Optional[int] = None):
+        if output_format not in FORMATS:
+            raise ValueError(f'Unknown report format: {output_format}')
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f'Unknown compression: {compression}')
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError('zstd compression requires the zstandard package')
+
+        self.path = path
+        self.output_format = output_format
+        self.compression = compression
+        self.chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._sections = 0
+        self._raw = open(path, 'wb')
+        if compression == 'gzip':
+            self._file = gzip.GzipFile(
+                fileobj=self._raw, mode='wb',
+                compresslevel=compression_level if compression_level is not None else 6
+            )
+        elif compression == 'zstd':
+            self._file = zstandard.ZstdCompressor(
+                level=compression_level if compression_level is not None else 3
+            ).stream_writer(self._raw, closefd=False)
+        else:
+            self._file = self._raw
+
+        if output_format == 'json':
+            self._buffer += b'{'
+
+    @staticmethod
+    def filename(prefix: str, output_format: str = 'json', compression: Optional[str] = None) -> str:
+        """Build a report filename with the right extension."""
+        return f'{prefix}.{output_format}{COMPRESSION_SUFFIXES[compression]}'
+
+    def _write(self, data: bytes):
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_size:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+
+    def _start_section(self, name: str):
+        if self._sections:
+            self._write(b',')
+        self._write(dumps(name) + b':')
+        self._sections += 1
+
+    def write_section(self, name: str, value: Any):
+        """Write a small, already materialized section."""
+        if self.output_format == 'ndjson':
+            self._write(dumps({'section': name, 'data': value}) + b'\n')
+        else:
+            self._start_section(name)
+            self._write(dumps(value))
+
+    def write_records(self, name: str, records: Iterable[Any]) -> int:
+        """Stream ``records`` into the section ``name``; returns the record count."""
+        count = 0
+        if self.output_format == 'ndjson':
+            prefix = b'{"section":' + dumps(name) + b',"data":'
+            for record in records:
+                self._write(prefix + dumps(record) + b'}\n')
+                count += 1
+            return count
+
+        self._start_section(name)
+        self._write(b'[')
+        for record in records:
+            if count:
+                self._write(b',')
+            self._write(dumps(record))
+            count += 1
+        self._write(b']')
+        return count
+
+    def close(self):
+        if self._raw.closed:
+            return
+        if self.output_format == 'json':
+            self._buffer += b'}'
+        self._file.write(self._buffer)
+        self._buffer.clear()
+        if self._file is not self._raw:
+            self._file.close()
+        self._raw.close()
+
+    def __enter__(self) -> 'StreamingReportWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
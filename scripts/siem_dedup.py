@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+SIEM Event Deduplication
+
+Drops Workspace activities that have already been shipped, which happens
+with overlapping polling windows and retried batches. Recent keys are kept
+in an exact, time-windowed LRU set; older keys fall back to a rotating
+Bloom filter so memory stays bounded at millions of events per day.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from siem_integration import PartialDelivery
+
+logger = logging.getLogger(__name__)
+
+
+def event_key(event: Dict[str, Any]) -> str:
+    """Dedup key for an event: Reports API id, else event id, else its content."""
+    activity_id = event.get('id')
+    if isinstance(activity_id, dict):
+        return '|'.join((
+            str(activity_id.get('applicationName', '')),
+            str(activity_id.get('time', '')),
+            str(activity_id.get('uniqueQualifier', ''))
+        ))
+    if activity_id is not None:
+        return str(activity_id)
+    return hashlib.blake2b(
+        json.dumps(event, sort_keys=True, default=str).encode('utf-8'), digest_size=16
+    ).hexdigest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def positions(self, key: str) -> List[int]:
+        """Bit positions for ``key``; filters of equal size share them."""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        num_bits = self.num_bits
+        return [(h1 + i * h2) % num_bits for i in range(self.num_hashes)]
+
+    def add_positions(self, positions: List[int]):
+        bits = self.bits
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def has_positions(self, positions: List[int]) -> bool:
+        bits = self.bits
+        for position in positions:
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, key: str):
+        self.add_positions(self.positions(key))
+
+    def __contains__(self, key: str) -> bool:
+        return self.has_positions(self.positions(key))
+
+    def estimated_false_positive_rate(self) -> float:
+        """Expected false-positive rate at the current fill level."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class RotatingBloomFilter:
+    """A ring of Bloom filter generations; the oldest is discarded on rotation.
+
+    A key is remembered for at least ``rotation_seconds`` * (generations - 1).
+    A generation also rotates early once it reaches its capacity, so the
+    false-positive rate stays near ``error_rate`` under bursts.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001, generations: int = 2,
+                 rotation_seconds: float = 3600.0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rotation_seconds = rotation_seconds
+        self.generations = [BloomFilter(capacity, error_rate) for _ in range(max(2, generations))]
+        self.rotations = 0
+        self._rotated_at = time.monotonic()
+
+    def _maybe_rotate(self):
+        current = self.generations[0]
+        if (current.count >= self.capacity
+                or time.monotonic() - self._rotated_at >= self.rotation_seconds):
+            self.generations.pop()
+            self.generations.insert(0, BloomFilter(self.capacity, self.error_rate))
+            self._rotated_at = time.monotonic()
+            self.rotations += 1
+
+    def add(self, key: str):
+        self._maybe_rotate()
+        self.generations[0].add(key)
+
+    def __contains__(self, key: str) -> bool:
+        positions = self.generations[0].positions(key)
+        return any(generation.has_positions(positions) for generation in self.generations)
+
+    def estimated_false_positive_rate(self) -> float:
+        miss = 1.0
+        for generation in self.generations:
+            miss *= 1 - generation.estimated_false_positive_rate()
+        return 1 - miss
+
+    def memory_bytes(self) -> int:
+        return sum(len(generation.bits) for generation in self.generations)
+
+
+class EventDeduplicator:
+    """Exact LRU set over the recent window, backed by a rotating Bloom filter."""
+
+    def __init__(self, window_seconds: float = 3600.0, lru_size: int = 100_000,
+                 bloom_capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.window_seconds = window_seconds
+        self.lru_size = lru_size
+        self._recent: 'OrderedDict[str, float]' = OrderedDict()
+        self._bloom = RotatingBloomFilter(bloom_capacity, error_rate, rotation_seconds=window_seconds)
+        self._lock = threading.Lock()
+        self.stats = {'checked': 0, 'exact_hits': 0, 'bloom_hits': 0, 'misses': 0}
+
+    def _expire(self, now: float):
+        recent = self._recent
+        while recent:
+            key, seen_at = next(iter(recent.items()))
+            if now - seen_at < self.window_seconds and len(recent) <= self.lru_size:
+                break
+            recent.popitem(last=False)
+
+    def seen(self, key: str) -> bool:
+        """True if ``key`` was recorded before (Bloom hits may be false positives)."""
+        with self._lock:
+            self.stats['checked'] += 1
+            seen_at = self._recent.get(key)
+            if seen_at is not None and time.monotonic() - seen_at < self.window_seconds:
+                self._recent.move_to_end(key)
+                self.stats['exact_hits'] += 1
+                return True
+            if key in self._bloom:
+                self.stats['bloom_hits'] += 1
+                return True
+            self.stats['misses'] += 1
+            return False
+
+    def add(self, key: str):
+        with self._lock:
+            now = time.monotonic()
+            self._recent[key] = now
+            self._recent.move_to_end(key)
+            self._bloom.add(key)
+            self._expire(now)
+
+    def filter(self, events: List[Dict]) -> List[Dict]:
+        """Return events not seen before, also dropping repeats within the batch."""
+        fresh, batch_keys = [], set()
+        for event in events:
+            key = event_key(event)
+            if key in batch_keys or self.seen(key):
+                continue
+            batch_keys.add(key)
+            fresh.append(event)
+        return fresh
+
+    def mark_delivered(self, events: List[Dict]):
+        for event in events:
+            self.add(event_key(event))
+
+    def report(self) -> Dict[str, Any]:
+        """Hit/miss counters plus Bloom filter memory and false-positive estimate."""
+        with self._lock:
+            return {
+                **self.stats,
+                'recent_keys': len(self._recent),
+                'bloom_rotations': self._bloom.rotations,
+                'bloom_memory_bytes': self._bloom.memory_bytes(),
+                'estimated_false_positive_rate': self._bloom.estimated_false_positive_rate()
+            }
+
+
+class DedupIntegrator:
+    """Drop already-shipped events in front of any SIEM integrator.
+
+    Keys are recorded only after a successful send, so retried batches are
+    not mistaken for duplicates.
+    """
+
+    def __init__(self, integrator, deduplicator: Optional[EventDeduplicator] = None):
+        self.integrator = integrator
+        self.deduplicator = deduplicator or EventDeduplicator()
+
+    @property
+    def batch_settings(self) -> Dict:
+        return getattr(self.integrator, 'batch_settings', {})
+
+    def send_logs(self, logs: List[Dict]) -> bool:
+        fresh = self.deduplicator.filter(logs)
+        if len(fresh) < len(logs):
+            logger.info(f'Dropped {len(logs) - len(fresh)} duplicate events')
+        if not fresh:
+            return True
+        result = self.integrator.send_logs(fresh)
+        if isinstance(result, PartialDelivery):
+            failed = {id(log) for log in result.undelivered}
+            self.deduplicator.mark_delivered([log for log in fresh if id(log) not in failed])
+            return result
+        if not result:
+            return False
+        self.deduplicator.mark_delivered(fresh)
+        return True
+
+    def create_alert(self, alert_data: Dict) -> bool:
+        return self.integrator.create_alert(alert_data)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+SIEM Event Filter
+
+Pre-ship transform stage driven by the ``filtering`` and ``fields``
+sections of configs/siem_config.yaml. Drops events below the minimum
+severity, outside the included event types or matching an excluded
+pattern, and projects the remaining events onto the configured fields.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import yaml
+
+from event_classifier import SEVERITY_LEVELS
+
+logger = logging.getLogger(__name__)
+
+
+class EventFilter:
+    """Compiled severity/type/pattern filter and field projection."""
+
+    def __init__(self, min_severity: str = 'low', included_event_types: Optional[List[str]] = None,
+                 excluded_patterns: Optional[List[str]] = None,
+                 include_fields: Optional[List[str]] = None,
+                 exclude_fields: Optional[List[str]] = None,
+                 default_severity: str = 'low'):
+        if min_severity.lower() not in SEVERITY_LEVELS:
+            raise ValueError(f'Unknown severity: {min_severity}')
+
+        # Accept the casings SIEM payloads use without lowercasing per event
+        self._levels = {}
+        for name, level in SEVERITY_LEVELS.items():
+            for variant in (name, name.upper(), name.capitalize()):
+                self._levels[variant] = level
+        self._min_level = SEVERITY_LEVELS[min_severity.lower()]
+        self._default_level = SEVERITY_LEVELS[default_severity.lower()]
+
+        self._included_types = frozenset(included_event_types or ())
+        self._excluded = re.compile(
+            '|'.join(f'(?:{pattern})' for pattern in excluded_patterns)
+        ).match if excluded_patterns else None
+
+        excluded = set(exclude_fields or ())
+        self._include_fields = tuple(f for f in include_fields or () if f not in excluded) or None
+        self._exclude_fields = frozenset(excluded)
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'received': 0,
+            'passed': 0,
+            'dropped_severity': 0,
+            'dropped_type': 0,
+            'dropped_pattern': 0
+        }
+
+    @classmethod
+    def from_config(cls, path: str = 'configs/siem_config.yaml') -> 'EventFilter':
+        """Build a filter from siem_config.yaml; a missing file filters nothing."""
+        if not os.path.exists(path):
+            logger.warning(f'SIEM config not found: {path}, events will not be filtered')
+            return cls()
+
+        with open(path, 'r') as f:
+            config = yaml.safe_load(f) or {}
+        filtering = config.get('filtering') or {}
+        fields = config.get('fields') or {}
+        return cls(
+            min_severity=filtering.get('min_severity', 'low'),
+            included_event_types=filtering.get('included_event_types'),
+            excluded_patterns=filtering.get('excluded_patterns'),
+            include_fields=fields.get('include'),
+            exclude_fields=fields.get('exclude')
+        )
+
+    def _project(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        if self._include_fields is not None:
+            return {field: event[field] for field in self._include_fields if field in event}
+        if self._exclude_fields:
+            return {k: v for k, v in event.items() if k not in self._exclude_fields}
+        return event
+
+    def apply(self, events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the projected events that pass the filter."""
+        levels, min_level, default_level = self._levels, self._min_level, self._default_level
+        included, excluded = self._included_types, self._excluded
+        received = dropped_severity = dropped_type = dropped_pattern = 0
+        passed = []
+
+        for event in events:
+            received += 1
+            severity = event.get('severity')
+            level = levels.get(severity) if severity is not None else default_level
+            if level is None:
+                # Unusual casing or an unknown label: normalize, else treat as unset
+                level = levels.get(str(severity).lower(), default_level)
+            if level < min_level:
+                dropped_severity += 1
+                continue
+
+            event_type = event.get('event_type', event.get('type'))
+            if included and event_type not in included:
+                dropped_type += 1
+                continue
+            if excluded is not None and event_type is not None and excluded(str(event_type)):
+                dropped_pattern += 1
+                continue
+
+            passed.append(self._project(event))
+
+        with self._stats_lock:
+            self.stats['received'] += received
+            self.stats['passed'] += len(passed)
+            self.stats['dropped_severity'] += dropped_severity
+            self.stats['dropped_type'] += dropped_type
+            self.stats['dropped_pattern'] += dropped_pattern
+        return passed
+
+
+class FilteringIntegrator:
+    """Apply an EventFilter in front of any SIEM integrator."""
+
+    def __init__(self, integrator, event_filter: EventFilter):
+        self.integrator = integrator
+        self.event_filter = event_filter
+
+    @property
+    def batch_settings(self) -> Dict:
+        return getattr(self.integrator, 'batch_settings', {})
+
+    def send_logs(self, logs: List[Dict]) -> bool:
+        """Filter and project logs, then ship whatever remains."""
+        filtered = self.event_filter.apply(logs)
+        if not filtered:
+            return True
+        return self.integrator.send_logs(filtered)
+
+    def create_alert(self, alert_data: Dict) -> bool:
+        return self.integrator.create_alert(alert_data)
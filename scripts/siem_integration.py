@@ -8,12 +8,74 @@ Supports real-time log streaming and alert generation.
 
 import json
 import logging
+import os
+import sys
 import requests
+from concurrent.futures import ThreadPoolExecutor
+import yaml
 from datetime import datetime
-from typing import Dict, List, Any
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterable, Iterator, List, Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BATCH_SETTINGS = {
+    'max_batch_size': 100,
+    'max_batch_bytes': 1024 * 1024
+}
+
+class EncodedEvent(dict):
+    """A log dict that carries its own serialized JSON.
+
+    Wrapping an event once lets several integrators share the encoded bytes
+    instead of serializing the same event per sink. Treat it as read-only:
+    later changes to the dict are not reflected in ``raw``.
+    """
+    
+    __slots__ = ('raw',)
+    
+    def __init__(self, log: Dict[str, Any]):
+        super().__init__(log)
+        self.raw = dumps(log)
+
+class PartialDelivery:
+    """Falsy ``send_logs`` result listing the logs that were not delivered.
+
+    Integrators that split a call into several requests return it when only
+    some requests failed, so retrying layers resend just ``undelivered``
+    instead of duplicating what already arrived.
+    """
+    
+    __slots__ = ('undelivered',)
+    
+    def __init__(self, undelivered: List[Dict]):
+        self.undelivered = undelivered
+    
+    def __bool__(self) -> bool:
+        return False
+
+def dumps(obj: Any) -> bytes:
+    """Serialize compactly to UTF-8 JSON bytes, using orjson when installed."""
+    if isinstance(obj, EncodedEvent):
+        return obj.raw
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, separators=(',', ':'), default=str).encode('utf-8')
+
+def load_batch_settings(path: str = 'configs/siem_config.yaml') -> Dict[str, Any]:
+    """Load batch_settings from siem_config.yaml, falling back to defaults."""
+    settings = dict(DEFAULT_BATCH_SETTINGS)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            config = yaml.safe_load(f) or {}
+        settings.update(config.get('batch_settings') or {})
+    return settings
+
 class SIEMIntegrator:
     """Base class for SIEM integration."""
     
@@ -22,6 +84,37 @@ class SIEMIntegrator:
         self.api_endpoint = config.get('api_endpoint')
         self.api_key = config.get('api_key')
         self.verify_ssl = config.get('verify_ssl', True)
+        self.timeout = config.get('timeout', 30)
+        self.batch_settings = {**DEFAULT_BATCH_SETTINGS, **config.get('batch_settings', {})}
+        self.session = self._build_session(config.get('pool_size', 10))
+    
+    def _build_session(self, pool_size: int) -> requests.Session:
+        """Build a keep-alive session so requests reuse pooled connections."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.verify = self.verify_ssl
+        return session
+    
+    def _batches(self, encoded: Iterable[bytes], max_size: Optional[int] = None,
+                 max_bytes: Optional[int] = None) -> Iterator[List[bytes]]:
+        """Group encoded events by batch_settings count and byte limits."""
+        max_size = max_size or self.batch_settings['max_batch_size']
+        max_bytes = max_bytes or self.batch_settings['max_batch_bytes']
+        batch, batch_bytes = [], 0
+        for item in encoded:
+            if batch and (len(batch) >= max_size or batch_bytes + len(item) > max_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(item)
+            batch_bytes += len(item) + 1
+        if batch:
+            yield batch
+    
+    def close(self):
+        """Release pooled connections."""
+        self.session.close()
     
     def send_logs(self, logs: List[Dict]) -> bool:
         """Send logs to SIEM system."""
@@ -34,38 +127,54 @@ class SIEMIntegrator:
 class SplunkIntegrator(SIEMIntegrator):
     """Splunk Enterprise Security integration."""
     
-    def send_logs(self, logs: List[Dict]) -> bool:
-        """Send logs to Splunk."""
+    def send_logs(self, logs: List[Dict]):
+        """Send logs to Splunk.
+
+        Events are packed into HEC requests as newline-separated JSON objects,
+        up to the configured batch size and byte limit per request. If a
+        request fails after earlier ones went out, a PartialDelivery naming
+        the unsent logs is returned so they alone are resent.
+        """
+        delivered = 0
         try:
             headers = {
                 'Authorization': f'Bearer {self.api_key}',
                 'Content-Type': 'application/json'
             }
             
-            for log in logs:
-                response = requests.post(
+            # Splice the serialized event into the HEC envelope so pre-encoded
+            # events are not serialized again
+            encoded = (
+                b'{"event":' + dumps(log) + b',"sourcetype":"google:workspace:audit"}'
+                for log in logs
+            )
+            requests_sent = 0
+            for batch in self._batches(encoded):
+                response = self.session.post(
                     f'{self.api_endpoint}/services/collector',
-                    json={'event': log, 'sourcetype': 'google:workspace:audit'},
+                    data=b'\n'.join(batch),
                     headers=headers,
-                    verify=self.verify_ssl
+                    timeout=self.timeout
                 )
                 response.raise_for_status()
+                requests_sent += 1
+                delivered += len(batch)
             
-            logger.info(f'Sent {len(logs)} logs to Splunk')
+            logger.info(f'Sent {len(logs)} logs to Splunk in {requests_sent} requests')
             return True
         except Exception as e:
-            logger.error(f'Error sending logs to Splunk: {e}')
-            return False
+            logger.error(f'Error sending logs to Splunk after {delivered} of {len(logs)} logs: {e}')
+            return PartialDelivery(logs[delivered:]) if delivered else False
     
     def create_alert(self, alert_data: Dict) -> bool:
         """Create alert in Splunk."""
         try:
             headers = {'Authorization': f'Bearer {self.api_key}'}
-            response = requests.post(
+            response = self.session.post(
                 f'{self.api_endpoint}/services/alerts',
                 json=alert_data,
                 headers=headers,
-                verify=self.verify_ssl
+                timeout=self.timeout
             )
             response.raise_for_status()
             logger.info('Alert created in Splunk')
@@ -77,32 +186,68 @@ class SplunkIntegrator(SIEMIntegrator):
 class ChronicleIntegrator(SIEMIntegrator):
     """Google Chronicle SIEM integration."""
     
-    def send_logs(self, logs: List[Dict]) -> bool:
-        """Send logs to Google Chronicle."""
+    PAYLOAD_PREFIX = b'{"logEntries":['
+    PAYLOAD_SUFFIX = b']}'
+    
+    def _encode_entry(self, log: Dict) -> bytes:
+        """Serialize one log entry; the log itself travels as a JSON string."""
+        return dumps({
+            'severity': log.get('severity', 'LOW'),
+            'logMessage': dumps(log).decode('utf-8'),
+            'logSourceRegion': log.get('region', 'global')
+        })
+    
+    def _send_chunk(self, entries: List[bytes], headers: Dict[str, str]) -> bool:
+        """POST one batchCreate chunk once; retries belong to the caller."""
+        body = self.PAYLOAD_PREFIX + b','.join(entries) + self.PAYLOAD_SUFFIX
+        try:
+            response = self.session.post(
+                f'{self.api_endpoint}/v1/events:batchCreate',
+                data=body,
+                headers=headers,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            logger.warning(f'Chronicle chunk of {len(entries)} entries failed: {e}')
+            return False
+    
+    def send_logs(self, logs: List[Dict]):
+        """Send logs to Google Chronicle.
+
+        Entries are serialized once and packed into batchCreate chunks up to
+        ``max_batch_bytes`` and sent concurrently. If only some chunks fail,
+        a PartialDelivery naming their logs is returned so the pipeline or
+        spool resends only those.
+        """
         try:
             headers = {
                 'Authorization': f'Bearer {self.api_key}',
                 'Content-Type': 'application/json'
             }
             
-            payload = {
-                'logEntries': [
-                    {
-                        'severity': log.get('severity', 'LOW'),
-                        'logMessage': json.dumps(log),
-                        'logSourceRegion': log.get('region', 'global')
-                    } for log in logs
-                ]
-            }
+            budget = self.batch_settings['max_batch_bytes'] - \
+                len(self.PAYLOAD_PREFIX) - len(self.PAYLOAD_SUFFIX)
+            entries = [self._encode_entry(log) for log in logs]
+            # Chunk entry indexes alongside the bytes so failures map back to logs
+            chunks, start = [], 0
+            for chunk in self._batches(entries, max_size=sys.maxsize, max_bytes=budget):
+                chunks.append((start, chunk))
+                start += len(chunk)
+            with ThreadPoolExecutor(max_workers=self.config.get('max_concurrency', 4)) as pool:
+                results = list(pool.map(lambda c: self._send_chunk(c[1], headers), chunks))
             
-            response = requests.post(
-                f'{self.api_endpoint}/v1/events:batchCreate',
-                json=payload,
-                headers=headers,
-                verify=self.verify_ssl
-            )
-            response.raise_for_status()
-            logger.info(f'Sent {len(logs)} logs to Google Chronicle')
+            if not all(results):
+                failed = [chunk for chunk, ok in zip(chunks, results) if not ok]
+                logger.error(f'Failed to send {len(failed)} of {len(results)} '
+                             f'chunks to Google Chronicle')
+                if len(failed) == len(chunks):
+                    return False
+                return PartialDelivery([
+                    log for start, chunk in failed for log in logs[start:start + len(chunk)]
+                ])
+            logger.info(f'Sent {len(logs)} logs to Google Chronicle in {len(results)} chunks')
             return True
         except Exception as e:
             logger.error(f'Error sending logs to Chronicle: {e}')
@@ -112,11 +257,11 @@ class ChronicleIntegrator(SIEMIntegrator):
         """Create alert in Chronicle."""
         try:
             headers = {'Authorization': f'Bearer {self.api_key}'}
-            response = requests.post(
+            response = self.session.post(
                 f'{self.api_endpoint}/v1/alerts',
                 json=alert_data,
                 headers=headers,
-                verify=self.verify_ssl
+                timeout=self.timeout
             )
             response.raise_for_status()
             logger.info('Alert created in Google Chronicle')
@@ -136,11 +281,11 @@ class FortiSIEMIntegrator(SIEMIntegrator):
                 'Content-Type': 'application/json'
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f'{self.api_endpoint}/api/events/custom',
-                json={'events': logs},
+                data=b'{"events":[' + b','.join(dumps(log) for log in logs) + b']}',
                 headers=headers,
-                verify=self.verify_ssl
+                timeout=self.timeout
             )
             response.raise_for_status()
             logger.info(f'Sent {len(logs)} logs to FortiSIEM')
@@ -153,11 +298,11 @@ class FortiSIEMIntegrator(SIEMIntegrator):
         """Create alert in FortiSIEM."""
         try:
             headers = {'Authorization': f'Bearer {self.api_key}'}
-            response = requests.post(
+            response = self.session.post(
                 f'{self.api_endpoint}/api/alerts',
                 json=alert_data,
                 headers=headers,
-                verify=self.verify_ssl
+                timeout=self.timeout
             )
             response.raise_for_status()
             logger.info('Alert created in FortiSIEM')
@@ -184,7 +329,8 @@ if __name__ == '__main__':
     config = {
         'api_endpoint': 'https://siem.example.com',
         'api_key': 'your-api-key',
-        'verify_ssl': True
+        'verify_ssl': True,
+        'batch_settings': load_batch_settings()
     }
     
     integrator = get_siem_integrator('splunk', config)
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+SIEM Shipping Pipeline
+
+Buffers events in a bounded in-memory queue and ships them to a SIEM
+integrator from background threads. Batches are flushed by size or age,
+several requests can be in flight at once, failed batches are retried with
+exponential backoff and jitter, and producers are held back when the queue
+is full. MultiSinkIntegrator fans one event stream out to several SIEMs,
+each behind its own pipeline and, optionally, its own disk spool.
+"""
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from siem_integration import EncodedEvent, PartialDelivery, SIEMIntegrator, get_siem_integrator
+from siem_spool import SpoolingIntegrator, build_spooling_integrator
+
+logger = logging.getLogger(__name__)
+
+
+class SIEMShippingPipeline:
+    """Background, batched delivery in front of a SIEMIntegrator.
+
+    Batch size, flush interval and retry settings default to the
+    integrator's ``batch_settings`` (see configs/siem_config.yaml).
+    """
+
+    def __init__(self, integrator: SIEMIntegrator, max_queue_size: int = 10000,
+                 max_in_flight: int = 4, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, max_retries: Optional[int] = None,
+                 retry_delay: Optional[float] = None, max_retry_delay: float = 60.0,
+                 on_failure: Optional[Callable[[List[Dict]], None]] = None):
+        settings = getattr(integrator, 'batch_settings', {})
+        self.integrator = integrator
+        self.batch_size = batch_size or settings.get('max_batch_size', 100)
+        self.flush_interval = flush_interval if flush_interval is not None \
+            else settings.get('flush_interval_seconds', 30)
+        self.max_retries = max_retries if max_retries is not None else settings.get('max_retries', 3)
+        self.retry_delay = retry_delay if retry_delay is not None \
+            else settings.get('retry_delay_seconds', 5)
+        self.max_retry_delay = max_retry_delay
+        self.max_in_flight = max_in_flight
+        self.on_failure = on_failure
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._closing = threading.Event()
+        self._flush_requested = threading.Event()
+        self._poll_interval = 0.5
+        self._executor = None
+        self._dispatcher = None
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'delivered': 0,
+            'failed': 0,
+            'batches': 0,
+            'retries': 0
+        }
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def start(self) -> 'SIEMShippingPipeline':
+        """Start the dispatcher and delivery workers."""
+        if self._dispatcher is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_in_flight, thread_name_prefix='siem-delivery'
+            )
+            self._dispatcher = threading.Thread(
+                target=self._run, name='siem-dispatcher', daemon=True
+            )
+            self._dispatcher.start()
+        return self
+
+    def submit(self, event: Dict, block: bool = True, timeout: Optional[float] = None) -> bool:
+        """Queue one event for delivery.
+
+        When the queue is full this blocks (up to ``timeout``) so producers
+        slow down to the rate the SIEM accepts; with ``block=False`` or on
+        timeout the event is rejected and False is returned.
+        """
+        if self._closing.is_set():
+            raise RuntimeError('Pipeline is closed')
+        try:
+            self._queue.put(event, block=block, timeout=timeout)
+        except queue.Full:
+            self._count(rejected=1)
+            return False
+        self._count(submitted=1)
+        return True
+
+    def submit_many(self, events: Iterable[Dict], block: bool = True,
+                    timeout: Optional[float] = None) -> int:
+        """Queue several events; returns how many were accepted."""
+        return sum(1 for event in events if self.submit(event, block, timeout))
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        """Collect queued events into batches and hand them to the workers."""
+        batch: List[Dict] = []
+        deadline = 0.0
+        while True:
+            draining = self._closing.is_set() or self._flush_requested.is_set()
+            if not batch:
+                wait = self._poll_interval
+            elif draining:
+                wait = 0
+            else:
+                wait = max(0.0, deadline - time.monotonic())
+
+            try:
+                event = self._queue.get(timeout=wait) if wait > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                event = None
+
+            if event is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(event)
+                if len(batch) < self.batch_size:
+                    continue
+
+            if batch:
+                self._dispatch(batch)
+                batch = []
+            elif self._closing.is_set():
+                return
+
+    def _dispatch(self, batch: List[Dict]):
+        # Blocks while max_in_flight requests are outstanding; the queue then
+        # fills up and producers feel the backpressure.
+        self._in_flight.acquire()
+        self._executor.submit(self._deliver, batch)
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.max_retry_delay, self.retry_delay * (2 ** attempt)))
+
+    def _deliver(self, batch: List[Dict]):
+        pending = batch
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    delivered = self.integrator.send_logs(pending)
+                except Exception as e:
+                    logger.error(f'SIEM delivery raised: {e}')
+                    delivered = False
+                if delivered:
+                    self._count(delivered=len(pending), batches=1)
+                    return
+                if isinstance(delivered, PartialDelivery):
+                    # Only resend what did not arrive
+                    self._count(delivered=len(pending) - len(delivered.undelivered))
+                    pending = delivered.undelivered
+                if attempt < self.max_retries:
+                    self._count(retries=1)
+                    time.sleep(self._backoff(attempt))
+
+            self._count(failed=len(pending))
+            logger.error(f'Dropping {len(pending)} events after {self.max_retries} retries')
+            if self.on_failure:
+                self.on_failure(pending)
+        finally:
+            self._in_flight.release()
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Ship everything queued so far; returns False if ``timeout`` expires first."""
+        self._flush_requested.set()
+        try:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            with self._queue.all_tasks_done:
+                while self._queue.unfinished_tasks:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._queue.all_tasks_done.wait(remaining)
+            return True
+        finally:
+            self._flush_requested.clear()
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Stop accepting events, ship what is queued and stop the workers."""
+        self._closing.set()
+        flushed = self.flush(timeout) if self._dispatcher is not None else True
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout)
+            self._executor.shutdown(wait=flushed)
+        logger.info(
+            f"SIEM pipeline closed: {self.stats['delivered']} delivered, "
+            f"{self.stats['failed']} failed, {self.stats['rejected']} rejected"
+        )
+        return flushed
+
+    def __enter__(self) -> 'SIEMShippingPipeline':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def get_siem_pipeline(siem_type: str, config: Dict[str, Any], **kwargs) -> SIEMShippingPipeline:
+    """Build a started shipping pipeline around the integrator for ``siem_type``."""
+    return SIEMShippingPipeline(get_siem_integrator(siem_type, config), **kwargs).start()
+
+
+class SinkRejection:
+    """Falsy ``MultiSinkIntegrator.send_logs`` result listing rejected events per sink.
+
+    Every other sink already queued the events, so resend each list to its
+    own sink only, e.g. ``send_logs(events, sinks=[name])``.
+    """
+
+    __slots__ = ('rejected',)
+
+    def __init__(self, rejected: Dict[str, List[Dict]]):
+        self.rejected = rejected
+
+    def __bool__(self) -> bool:
+        return False
+
+
+class MultiSinkIntegrator:
+    """Ship one event stream to several SIEMs, serializing each event once.
+
+    Events are wrapped in an EncodedEvent before fan-out, so every sink
+    reuses the same JSON bytes. Each sink gets its own pipeline (queue,
+    workers and retry state), so a backlogged sink never stalls the others.
+    With ``spool_settings`` (the ``spool`` section of siem_config.yaml)
+    each sink also gets its own disk spool under ``<directory>/<sink>``:
+    events its queue rejects or its pipeline gives up on are spooled and
+    replayed to that sink alone. Without a spool, rejected events are
+    returned per sink in a SinkRejection.
+    """
+
+    def __init__(self, sinks: Dict[str, SIEMIntegrator], block_timeout: Optional[float] = 0,
+                 spool_settings: Optional[Dict[str, Any]] = None, **pipeline_kwargs):
+        if not sinks:
+            raise ValueError('At least one SIEM sink is required')
+        self.block_timeout = block_timeout
+        self.spoolers: Dict[str, SpoolingIntegrator] = {}
+        if spool_settings:
+            directory = spool_settings.get('directory', '/var/spool/workspace-siem')
+            for name, integrator in sinks.items():
+                self.spoolers[name] = build_spooling_integrator(
+                    integrator, {**spool_settings, 'directory': os.path.join(directory, name)}
+                ).start()
+        self.pipelines = {
+            name: SIEMShippingPipeline(self.spoolers.get(name, integrator), **pipeline_kwargs).start()
+            for name, integrator in sinks.items()
+        }
+
+    @property
+    def batch_settings(self) -> Dict:
+        # Producers batch for the most restrictive sink
+        sizes = [
+            pipeline.batch_size for pipeline in self.pipelines.values()
+        ]
+        return {'max_batch_size': min(sizes)}
+
+    def _submit(self, pipeline: SIEMShippingPipeline, events: List[EncodedEvent]) -> List[EncodedEvent]:
+        """Queue events on one sink; returns the events its queue rejected."""
+        block = bool(self.block_timeout)
+        timeout = self.block_timeout if block else None
+        return [event for event in events if not pipeline.submit(event, block=block, timeout=timeout)]
+
+    def send_logs(self, logs: List[Dict], sinks: Optional[Iterable[str]] = None) -> bool:
+        """Queue logs on every sink, or only on ``sinks``.
+
+        Returns True once each sink has queued or spooled every event,
+        otherwise a SinkRejection naming what each sink rejected.
+        """
+        encoded = [log if isinstance(log, EncodedEvent) else EncodedEvent(log) for log in logs]
+        rejected = {}
+        for name in sinks if sinks is not None else self.pipelines:
+            refused = self._submit(self.pipelines[name], encoded)
+            if not refused:
+                continue
+            spooler = self.spoolers.get(name)
+            if spooler is not None:
+                spooler.spool.append(refused)
+                logger.warning(f'SIEM sink {name} is backlogged, spooled {len(refused)} events')
+            else:
+                logger.warning(f'SIEM sink {name} is backlogged, rejected {len(refused)} events')
+                rejected[name] = refused
+        return SinkRejection(rejected) if rejected else True
+
+    def create_alert(self, alert_data: Dict) -> bool:
+        """Create the alert on every sink; True only if all succeeded."""
+        results = []
+        for name, pipeline in self.pipelines.items():
+            try:
+                results.append(pipeline.integrator.create_alert(alert_data))
+            except Exception as e:
+                logger.error(f'Error creating alert in SIEM sink {name}: {e}')
+                results.append(False)
+        return all(results)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Flush every sink; each gets the full ``timeout``."""
+        return all([pipeline.flush(timeout) for pipeline in self.pipelines.values()])
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        """Per-sink delivery counters and queue depth."""
+        return {
+            name: {**pipeline.stats, 'queue_depth': pipeline.queue_depth()}
+            for name, pipeline in self.pipelines.items()
+        }
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        # Close sinks concurrently so a slow one does not delay the rest
+        with ThreadPoolExecutor(max_workers=len(self.pipelines)) as pool:
+            closed = all(pool.map(lambda pipeline: pipeline.close(timeout), self.pipelines.values()))
+        for spooler in self.spoolers.values():
+            spooler.close()
+        return closed
+
+    def __enter__(self) -> 'MultiSinkIntegrator':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def get_multi_sink_integrator(sink_configs: Dict[str, Dict[str, Any]], **kwargs) -> MultiSinkIntegrator:
+    """Build a MultiSinkIntegrator from ``{siem_type: config}``."""
+    return MultiSinkIntegrator(
+        {siem_type: get_siem_integrator(siem_type, config) for siem_type, config in sink_configs.items()},
+        **kwargs
+    )
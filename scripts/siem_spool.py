@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Durable SIEM Spool
+
+Write-ahead spool for SIEM events that could not be delivered. Events are
+appended to size-bounded segment files with batched fsyncs and replayed
+through memory-mapped reads once the SIEM endpoint recovers, so outages
+neither lose events nor grow memory.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from siem_integration import PartialDelivery, dumps
+
+logger = logging.getLogger(__name__)
+
+# Each record is <payload length><crc32 of payload> followed by the JSON payload
+RECORD_HEADER = struct.Struct('<II')
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.log'
+CURSOR_FILE = 'cursor.json'
+
+
+class SegmentSpool:
+    """Append-only, segmented on-disk event log with a persisted read cursor."""
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024,
+                 max_total_bytes: int = 2 * 1024 * 1024 * 1024,
+                 fsync_every: int = 512, fsync_interval: float = 1.0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_total_bytes = max_total_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.dropped = 0
+        self._lock = threading.RLock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._closed = threading.Event()
+
+        os.makedirs(directory, exist_ok=True)
+        self._segments = sorted(self._list_segments())
+        if not self._segments:
+            self._segments.append(0)
+        self._cursor = self._load_cursor()
+        self._recover_tail(self._segments[-1])
+        self._writer = open(self._segment_path(self._segments[-1]), 'ab')
+        self._syncer = None
+        if fsync_interval > 0:
+            self._syncer = threading.Thread(target=self._sync_loop, name='siem-spool-sync', daemon=True)
+            self._syncer.start()
+
+    def _sync_loop(self):
+        """Fsync appended records within ``fsync_interval`` even if no more arrive."""
+        while not self._closed.wait(self.fsync_interval):
+            with self._lock:
+                if self._unsynced and not self._writer.closed:
+                    self.sync()
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f'{SEGMENT_PREFIX}{seq:012d}{SEGMENT_SUFFIX}')
+
+    def _list_segments(self) -> List[int]:
+        return [
+            int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        ]
+
+    def _load_cursor(self) -> Tuple[int, int]:
+        path = os.path.join(self.directory, CURSOR_FILE)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                cursor = json.load(f)
+            if cursor['segment'] >= self._segments[0]:
+                return cursor['segment'], cursor['offset']
+        return self._segments[0], 0
+
+    def _save_cursor(self):
+        path = os.path.join(self.directory, CURSOR_FILE)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'segment': self._cursor[0], 'offset': self._cursor[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _scan(self, data, offset: int = 0):
+        """Yield (payload, next_offset) for each intact record from ``offset``."""
+        size = len(data)
+        while offset + RECORD_HEADER.size <= size:
+            length, crc = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            end = start + length
+            if end > size:
+                return
+            payload = data[start:end]
+            if zlib.crc32(payload) != crc:
+                return
+            yield payload, end
+            offset = end
+
+    def _recover_tail(self, seq: int):
+        """Truncate a torn record left at the end of the last segment by a crash."""
+        path = self._segment_path(seq)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, 'rb') as f:
+            data = f.read()
+        valid = 0
+        for _, valid in self._scan(data):
+            pass
+        if valid < len(data):
+            logger.warning(f'Truncating {len(data) - valid} bytes of torn spool data in {path}')
+            with open(path, 'r+b') as f:
+                f.truncate(valid)
+
+    def total_bytes(self) -> int:
+        return sum(
+            os.path.getsize(self._segment_path(seq)) for seq in self._segments
+            if os.path.exists(self._segment_path(seq))
+        )
+
+    def has_backlog(self) -> bool:
+        with self._lock:
+            segment, offset = self._cursor
+            if segment != self._segments[-1]:
+                return True
+            return offset < self._writer.tell()
+
+    def append(self, events: List[Dict]):
+        """Append events and hand them to the OS before returning.
+
+        A process crash therefore loses nothing; fsyncs, which also survive
+        power loss, are batched by count and by a background interval timer.
+        """
+        with self._lock:
+            for event in events:
+                # Same encoder as the integrators, so whatever they ship spools too
+                payload = dumps(event)
+                self._writer.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+                self._writer.write(payload)
+                self._unsynced += 1
+                if self._writer.tell() >= self.segment_bytes:
+                    self._roll()
+
+            if (self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self.sync()
+            else:
+                self._writer.flush()
+
+    def sync(self):
+        """Flush and fsync the active segment."""
+        with self._lock:
+            self._writer.flush()
+            os.fsync(self._writer.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def _roll(self):
+        self.sync()
+        self._writer.close()
+        self._segments.append(self._segments[-1] + 1)
+        self._writer = open(self._segment_path(self._segments[-1]), 'ab')
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        """Drop the oldest segments, unread or not, once the spool exceeds its cap."""
+        while len(self._segments) > 1 and self.total_bytes() > self.max_total_bytes:
+            oldest = self._segments.pop(0)
+            path = self._segment_path(oldest)
+            if self._cursor[0] == oldest:
+                with open(path, 'rb') as f:
+                    lost = sum(1 for _ in self._scan(f.read(), self._cursor[1]))
+                self.dropped += lost
+                logger.error(f'Spool over {self.max_total_bytes} bytes, dropped {lost} unsent events')
+                self._cursor = (self._segments[0], 0)
+                self._save_cursor()
+            os.remove(path)
+
+    def read_batch(self, max_events: int) -> Tuple[List[Dict], Tuple[int, int]]:
+        """Read up to ``max_events`` from the cursor without advancing it.
+
+        Returns the events and the position to pass to ``commit`` once they
+        have been delivered.
+        """
+        with self._lock:
+            self._writer.flush()
+            events: List[Dict] = []
+            segment, offset = self._cursor
+            while len(events) < max_events:
+                path = self._segment_path(segment)
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                if offset < size:
+                    with open(path, 'rb') as f, \
+                            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        for payload, offset in self._scan(data, offset):
+                            events.append(json.loads(payload))
+                            if len(events) >= max_events:
+                                break
+                if len(events) >= max_events or segment == self._segments[-1]:
+                    break
+                segment, offset = self._segments[self._segments.index(segment) + 1], 0
+            return events, (segment, offset)
+
+    def commit(self, position: Tuple[int, int]):
+        """Advance the cursor past delivered events and delete consumed segments.
+
+        Retention may drop segments between ``read_batch`` and ``commit``;
+        positions behind the cursor are ignored and positions in a dropped
+        segment are clamped to the oldest remaining one.
+        """
+        with self._lock:
+            if position <= self._cursor:
+                return
+            if position[0] < self._segments[0]:
+                position = (self._segments[0], 0)
+            self._cursor = position
+            self._save_cursor()
+            while self._segments[0] < position[0]:
+                os.remove(self._segment_path(self._segments.pop(0)))
+
+    def close(self):
+        self._closed.set()
+        if self._syncer is not None:
+            self._syncer.join()
+        with self._lock:
+            self.sync()
+            self._writer.close()
+
+
+class SpoolingIntegrator:
+    """Wrap a SIEM integrator so failed deliveries are spooled and replayed.
+
+    While a backlog exists new events are appended behind it, which keeps
+    delivery in order; a background drainer replays the spool at up to
+    ``drain_rate`` events per second.
+    """
+
+    def __init__(self, integrator, spool: SegmentSpool, drain_rate: float = 1000.0,
+                 drain_batch_size: Optional[int] = None, retry_interval: float = 30.0):
+        self.integrator = integrator
+        self.spool = spool
+        self.drain_rate = drain_rate
+        self.drain_batch_size = drain_batch_size or \
+            getattr(integrator, 'batch_settings', {}).get('max_batch_size', 100)
+        self.retry_interval = retry_interval
+        self._drain_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._drainer = None
+
+    @property
+    def batch_settings(self) -> Dict:
+        return getattr(self.integrator, 'batch_settings', {})
+
+    def send_logs(self, logs: List[Dict]) -> bool:
+        """Deliver logs, spooling them instead if the SIEM is unavailable.
+
+        After a partial delivery only the undelivered logs are spooled.
+        """
+        if not self.spool.has_backlog():
+            result = self.integrator.send_logs(logs)
+            if result:
+                return True
+            if isinstance(result, PartialDelivery):
+                logs = result.undelivered
+        self.spool.append(logs)
+        logger.warning(f'Spooled {len(logs)} events for later delivery')
+        return True
+
+    def create_alert(self, alert_data: Dict) -> bool:
+        return self.integrator.create_alert(alert_data)
+
+    def drain(self, max_seconds: Optional[float] = None) -> int:
+        """Replay spooled events at the configured rate; returns events delivered."""
+        delivered = 0
+        started = time.monotonic()
+        with self._drain_lock:
+            while not self._stop.is_set():
+                if max_seconds is not None and time.monotonic() - started >= max_seconds:
+                    break
+                batch_started = time.monotonic()
+                events, position = self.spool.read_batch(self.drain_batch_size)
+                if not events:
+                    break
+                result = self.integrator.send_logs(events)
+                if isinstance(result, PartialDelivery):
+                    # Requeue just the failed events behind the backlog; append
+                    # before commit so a crash duplicates rather than loses them
+                    self.spool.append(result.undelivered)
+                    self.spool.commit(position)
+                    delivered += len(events) - len(result.undelivered)
+                    logger.warning('SIEM partially unavailable, pausing spool drain')
+                    break
+                if not result:
+                    logger.warning('SIEM still unavailable, pausing spool drain')
+                    break
+                self.spool.commit(position)
+                delivered += len(events)
+
+                pause = len(events) / self.drain_rate - (time.monotonic() - batch_started)
+                if pause > 0:
+                    self._stop.wait(pause)
+        if delivered:
+            logger.info(f'Drained {delivered} spooled events')
+        return delivered
+
+    def _drain_loop(self):
+        while not self._stop.is_set():
+            if self.spool.has_backlog():
+                self.drain()
+            self._stop.wait(self.retry_interval)
+
+    def start(self) -> 'SpoolingIntegrator':
+        """Drain the spool in the background every ``retry_interval`` seconds."""
+        if self._drainer is None:
+            self._drainer = threading.Thread(target=self._drain_loop, name='siem-spool-drainer', daemon=True)
+            self._drainer.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._drainer is not None:
+            self._drainer.join()
+        self.spool.close()
+
+
+def build_spooling_integrator(integrator, settings: Dict) -> SpoolingIntegrator:
+    """Wrap ``integrator`` using the ``spool`` section of siem_config.yaml."""
+    spool = SegmentSpool(
+        settings.get('directory', '/var/spool/workspace-siem'),
+        segment_bytes=settings.get('segment_size_mb', 64) * 1024 * 1024,
+        max_total_bytes=settings.get('max_total_size_mb', 2048) * 1024 * 1024,
+        fsync_every=settings.get('fsync_every_events', 512),
+        fsync_interval=settings.get('fsync_interval_seconds', 1.0)
+    )
+    return SpoolingIntegrator(
+        integrator,
+        spool,
+        drain_rate=settings.get('drain_rate_events_per_second', 1000),
+        retry_interval=settings.get('drain_retry_interval_seconds', 30)
+    )
@@ -1,9 +1,16 @@
 """Pytest configuration and fixtures for Workspace Security Suite tests"""
 
+import os
+import sys
 import pytest
 import json
 from unittest.mock import Mock, MagicMock
 
+# Scripts and API examples are standalone modules rather than packages
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+sys.path.insert(0, os.path.join(ROOT, "api-examples"))
+
 
 @pytest.fixture
 def api_client():
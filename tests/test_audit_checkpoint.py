@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for checkpointed incremental audit polling
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from audit_checkpoint import AuditCheckpointStore, IncrementalAuditPoller
+
+
+class FakeMonitor:
+    """Monitor stand-in returning activities newer than startTime, newest first."""
+
+    def __init__(self):
+        self.activities = []
+        self.start_dates = []
+
+    def add(self, minute, qualifier):
+        time = datetime(2024, 12, 25, 10, 0, tzinfo=timezone.utc) + timedelta(minutes=minute)
+        self.activities.append({
+            'id': {'time': time.strftime('%Y-%m-%dT%H:%M:%S.000Z'), 'uniqueQualifier': qualifier},
+            'events': [],
+        })
+
+    def iter_audit_logs(self, start_date=None, application_name='admin', **kwargs):
+        self.start_dates.append(start_date)
+        start = datetime.fromisoformat(start_date)
+        matching = [
+            a for a in self.activities
+            if datetime.fromisoformat(a['id']['time'].replace('Z', '+00:00')) >= start
+        ]
+        yield from sorted(matching, key=lambda a: a['id']['time'], reverse=True)
+
+
+class TestIncrementalAuditPoller(unittest.TestCase):
+    """Test checkpoint persistence and overlap dedup"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "checkpoints.db")
+        self.store = AuditCheckpointStore(self.db_path)
+        self.monitor = FakeMonitor()
+        self.poller = IncrementalAuditPoller(
+            self.monitor, self.store, overlap=timedelta(minutes=5),
+            initial_lookback=timedelta(days=36500)
+        )
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_second_poll_only_returns_new_activities(self):
+        self.monitor.add(0, "a")
+        self.monitor.add(10, "b")
+        self.assertEqual(len(list(self.poller.poll())), 2)
+
+        self.monitor.add(20, "c")
+        polled = list(self.poller.poll())
+        self.assertEqual([a['id']['uniqueQualifier'] for a in polled], ["c"])
+        self.assertEqual(self.store.get_high_water_mark('admin'), "2024-12-25T10:20:00.000Z")
+
+    def test_late_arrival_inside_overlap_is_delivered_once(self):
+        self.monitor.add(10, "a")
+        list(self.poller.poll())
+
+        # Arrives after the poll but is timestamped before the high-water mark
+        self.monitor.add(7, "late")
+        polled = list(self.poller.poll())
+        self.assertEqual([a['id']['uniqueQualifier'] for a in polled], ["late"])
+        self.assertEqual(self.poller.stats['admin']['duplicates'], 1)
+        self.assertEqual(list(self.poller.poll()), [])
+
+    def test_checkpoint_survives_restart(self):
+        self.monitor.add(0, "a")
+        list(self.poller.poll())
+        self.store.close()
+
+        self.store = AuditCheckpointStore(self.db_path)
+        poller = IncrementalAuditPoller(self.monitor, self.store, overlap=timedelta(minutes=5))
+        self.assertEqual(list(poller.poll()), [])
+        self.assertTrue(self.monitor.start_dates[-1].startswith("2024-12-25T09:55:00"))
+
+    def test_interrupted_poll_does_not_advance_checkpoint(self):
+        self.monitor.add(0, "a")
+        self.monitor.add(10, "b")
+        stream = self.poller.poll()
+        next(stream)
+        stream.close()
+        self.assertIsNone(self.store.get_high_water_mark('admin'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent multi-application audit collection
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from audit_collector import MultiApplicationAuditCollector
+
+
+class FakeMonitor:
+    """Monitor stand-in serving canned activities per application."""
+
+    def __init__(self, activities):
+        self.activities = activities
+        self.calls = []
+
+    def _build_service(self, api_name, api_version):
+        return object()
+
+    def iter_audit_logs(self, start_date=None, end_date=None, application_name='admin',
+                        service=None, **kwargs):
+        self.calls.append((application_name, start_date, end_date))
+        start = datetime.fromisoformat(start_date)
+        end = datetime.fromisoformat(end_date)
+        for activity in self.activities.get(application_name, []):
+            if start <= datetime.fromisoformat(activity['id']['time']) < end:
+                yield activity
+
+
+def make_activity(application, minute):
+    time = datetime(2024, 12, 25, 10, 0) + timedelta(minutes=minute)
+    return {
+        'id': {'time': time.isoformat(), 'uniqueQualifier': f'{application}-{minute}',
+               'applicationName': application},
+        'events': [],
+    }
+
+
+class TestMultiApplicationAuditCollector(unittest.TestCase):
+    """Test fan-out and time-ordered merging"""
+
+    def setUp(self):
+        self.monitor = FakeMonitor({
+            'admin': [make_activity('admin', m) for m in (50, 30, 10)],
+            'login': [make_activity('login', m) for m in (55, 40, 20, 5)],
+            'drive': [],
+        })
+        self.start = datetime(2024, 12, 25, 10, 0)
+        self.end = datetime(2024, 12, 25, 11, 0)
+
+    def test_merges_applications_newest_first(self):
+        collector = MultiApplicationAuditCollector(
+            self.monitor, applications=['admin', 'login', 'drive'], max_workers=2
+        )
+        activities = list(collector.collect(self.start, self.end))
+        times = [a['id']['time'] for a in activities]
+        self.assertEqual(len(activities), 7)
+        self.assertEqual(times, sorted(times, reverse=True))
+
+    def test_time_slices_fetch_each_window(self):
+        collector = MultiApplicationAuditCollector(
+            self.monitor, applications=['admin', 'login'], time_slices=4, lookahead=1
+        )
+        activities = list(collector.collect(self.start, self.end))
+        times = [a['id']['time'] for a in activities]
+        self.assertEqual(len(self.monitor.calls), 8)
+        self.assertEqual(times, sorted(times, reverse=True))
+        self.assertEqual(len(activities), 7)
+
+    def test_reports_per_application_stats(self):
+        collector = MultiApplicationAuditCollector(
+            self.monitor, applications=['admin', 'login'], time_slices=2
+        )
+        list(collector.collect(self.start, self.end))
+        report = collector.report()
+        self.assertEqual(report['admin']['events'], 3)
+        self.assertEqual(report['login']['events'], 4)
+        self.assertEqual(report['login']['fetches'], 2)
+        self.assertIn('events_per_second', report['admin'])
+
+    def test_rejects_empty_worker_pool(self):
+        with self.assertRaises(ValueError):
+            MultiApplicationAuditCollector(self.monitor, max_workers=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
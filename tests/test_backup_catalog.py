@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite backup catalog
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import pytest
+
+from backup_catalog import BackupCatalog
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def backup(backup_id, data_type="drive", days_ago=0, **extra):
+    return {
+        "id": backup_id,
+        "type": data_type,
+        "timestamp": (NOW - timedelta(days=days_ago)).isoformat(),
+        "size": 100,
+        "checksum": f"md5-{backup_id}",
+        **extra,
+    }
+
+
+class TestBackupCatalog(unittest.TestCase):
+    """Test lookups, ordering, chunk references and retention"""
+
+    def setUp(self):
+        self.catalog = BackupCatalog(":memory:")
+        self.addCleanup(self.catalog.close)
+
+    def test_lookup_by_id_keeps_extra_fields(self):
+        self.catalog.add_backup(backup("a", new_bytes=42))
+        record = self.catalog.get_backup("a")
+        self.assertEqual(record["checksum"], "md5-a")
+        self.assertEqual(record["new_bytes"], 42)
+        self.assertIsNone(self.catalog.get_backup("missing"))
+
+    def test_latest_and_range_queries(self):
+        self.catalog.add_backup(backup("old", days_ago=10))
+        self.catalog.add_backup(backup("new", days_ago=1))
+        self.catalog.add_backup(backup("mail", data_type="gmail", days_ago=0))
+        self.assertEqual(self.catalog.latest_backup("drive")["id"], "new")
+        self.assertEqual([b["id"] for b in self.catalog.iter_backups()], ["old", "new", "mail"])
+        recent = self.catalog.iter_backups("drive", since=NOW - timedelta(days=5))
+        self.assertEqual([b["id"] for b in recent], ["new"])
+        self.assertEqual(self.catalog.count_backups("drive"), 2)
+
+    def test_retention_deletes_range_and_orphaned_chunks(self):
+        self.catalog.add_backup(backup("old", days_ago=40), [["c1", 10], ["c2", 20], ["c1", 10]])
+        self.catalog.add_backup(backup("new", days_ago=1), [["c2", 20], ["c3", 30]])
+        removed = self.catalog.delete_before(NOW - timedelta(days=30))
+        self.assertEqual(removed, {"backups": ["old"], "chunks": ["c1"]})
+        self.assertIsNone(self.catalog.get_backup("old"))
+        self.assertEqual(list(self.catalog.iter_chunk_records()), [("c2", 20), ("c3", 30)])
+        self.assertEqual(self.catalog.backup_chunks("new"), [("c2", 20), ("c3", 30)])
+
+    def test_retention_can_be_limited_to_a_type(self):
+        self.catalog.add_backup(backup("drive-old", days_ago=40))
+        self.catalog.add_backup(backup("mail-old", data_type="gmail", days_ago=40))
+        removed = self.catalog.delete_before(NOW - timedelta(days=30), data_type="gmail")
+        self.assertEqual(removed["backups"], ["mail-old"])
+        self.assertIsNotNone(self.catalog.get_backup("drive-old"))
+
+    def test_rerecording_replaces_chunk_references(self):
+        self.assertEqual(self.catalog.add_backup(backup("a"), [["c1", 10], ["c3", 30]]), [])
+        self.catalog.add_backup(backup("b"), [["c3", 30]])
+        self.assertEqual(self.catalog.add_backup(backup("a"), [["c2", 20], ["c1", 10]]), [])
+        self.assertEqual(self.catalog.add_backup(backup("a"), [["c2", 20]]), ["c1"])
+        self.assertEqual(self.catalog.get_backup("a")["chunk_count"], 1)
+        self.assertEqual(list(self.catalog.iter_chunk_records()), [("c2", 20), ("c3", 30)])
+
+    def test_rerecording_without_chunks_releases_them(self):
+        self.catalog.add_backup(backup("a"), [["c1", 10]])
+        self.assertEqual(self.catalog.add_backup(backup("a")), ["c1"])
+        self.assertEqual(self.catalog.backup_chunks("a"), [])
+        self.assertEqual(self.catalog.count_chunks(), 0)
+
+    def test_chunk_records_resume_after_digest(self):
+        self.catalog.add_backup(backup("a"), [[f"c{n:03d}", n] for n in range(50)])
+        records = list(self.catalog.iter_chunk_records(after="c024", batch_size=7))
+        self.assertEqual(records[0], ("c025", 25))
+        self.assertEqual(len(records), 25)
+
+    def test_catalog_persists(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "catalog.db")
+            catalog = BackupCatalog(path)
+            catalog.add_backup(backup("a"), [["c1", 10]])
+            catalog.close()
+            reopened = BackupCatalog(path)
+            self.assertEqual(reopened.get_backup("a")["chunk_count"], 1)
+            reopened.close()
+
+
+class TestBackupManagerCatalog(unittest.TestCase):
+    """Test verify_backup and cleanup_old_backups against the catalog"""
+
+    def test_cleanup_removes_expired_backup_files(self):
+        pytest.importorskip("google.auth")
+        from backup_automation import BackupManager
+
+        with tempfile.TemporaryDirectory() as tmp:
+            config = os.path.join(tmp, "backup.yaml")
+            with open(config, "w") as f:
+                f.write(f"backup:\n  storage:\n    path: {tmp}/store\n")
+            manager = BackupManager(config)
+            old_id = manager.store_backup("drive", os.urandom(200_000))
+            new_data = os.urandom(200_000)
+            new_id = manager.store_backup("gmail", new_data)
+            self.assertTrue(manager.verify_backup(old_id, manager.catalog.get_backup(old_id)["checksum"]))
+            self.assertFalse(manager.verify_backup(old_id, "wrong"))
+
+            old_chunks = manager.catalog.backup_chunks(old_id)
+            expired = (datetime.now() - timedelta(days=60)).isoformat()
+            manager.catalog.conn.execute(
+                "UPDATE backups SET timestamp = ?, created = ? WHERE id = ?",
+                (expired, datetime.fromisoformat(expired).timestamp(), old_id),
+            )
+            manager.cleanup_old_backups(retention_days=30)
+
+            self.assertFalse(manager.verify_backup(old_id, "anything"))
+            self.assertIsNone(manager.chunk_store.load_manifest(old_id))
+            self.assertFalse(any(manager.chunk_store.has_chunk(d) for d, _ in old_chunks))
+            self.assertIsNotNone(manager.catalog.get_backup(new_id))
+            self.assertEqual(b"".join(manager.restore_backup(new_id)), new_data)
+
+    def test_unchanged_incremental_is_a_separate_backup(self):
+        pytest.importorskip("google.auth")
+        from backup_automation import BackupManager
+
+        with tempfile.TemporaryDirectory() as tmp:
+            config = os.path.join(tmp, "backup.yaml")
+            with open(config, "w") as f:
+                f.write(f"backup:\n  storage:\n    path: {tmp}/store\n")
+            manager = BackupManager(config)
+            data = os.urandom(200_000)
+            full_id = manager.store_backup("drive", data)
+            incremental_id = manager.store_backup("drive", data, "incremental")
+
+            self.assertNotEqual(full_id, incremental_id)
+            self.assertEqual(manager.catalog.count_backups(), 2)
+            self.assertEqual(manager.catalog.get_backup(full_id)["backup_type"], "full")
+            incremental = manager.catalog.get_backup(incremental_id)
+            self.assertEqual(incremental["backup_type"], "incremental")
+            self.assertEqual(incremental["parent"], full_id)
+            self.assertEqual(b"".join(manager.restore_backup(full_id)), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
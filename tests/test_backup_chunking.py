@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for content-defined chunking and the chunk store
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+import pytest
+
+from backup_chunking import ChunkStore, ContentDefinedChunker
+
+
+def random_bytes(size, seed=1):
+    return random.Random(seed).randbytes(size)
+
+
+class TestContentDefinedChunker(unittest.TestCase):
+    """Test chunk bounds, determinism and shift resistance"""
+
+    def setUp(self):
+        self.chunker = ContentDefinedChunker(min_size=2048, avg_size=8192, max_size=32768)
+        self.data = random_bytes(1_000_000)
+
+    def test_chunks_reassemble_within_bounds(self):
+        chunks = list(self.chunker.chunks(self.data, read_size=10_000))
+        self.assertEqual(b"".join(chunks), self.data)
+        self.assertTrue(all(len(c) <= 32768 for c in chunks))
+        self.assertTrue(all(len(c) >= 2048 for c in chunks[:-1]))
+        self.assertLess(abs(len(self.data) / len(chunks) - 8192), 4096)
+
+    def test_boundaries_do_not_depend_on_read_size(self):
+        self.assertEqual(list(self.chunker.chunks(self.data, read_size=4096)),
+                         list(self.chunker.chunks(self.data, read_size=300_000)))
+
+    def test_insert_only_changes_nearby_chunks(self):
+        original = set(self.chunker.chunks(self.data))
+        edited = self.data[:400_000] + b"inserted bytes" + self.data[400_000:]
+        chunks = list(self.chunker.chunks(edited))
+        changed = [c for c in chunks if c not in original]
+        self.assertLessEqual(len(changed), 2)
+
+    def test_uniform_data_is_cut_at_max_size(self):
+        chunks = list(self.chunker.chunks(bytes(100_000)))
+        self.assertEqual([len(c) for c in chunks], [32768, 32768, 32768, 1696])
+
+    def test_rejects_bad_sizes(self):
+        with self.assertRaises(ValueError):
+            ContentDefinedChunker(min_size=8192, avg_size=4096, max_size=32768)
+
+
+class TestChunkStore(unittest.TestCase):
+    """Test deduplicated storage and incremental backups"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ChunkStore(self.tmp.name, ContentDefinedChunker(2048, 8192, 32768))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        data = random_bytes(200_000)
+        manifest = self.store.write_backup("drive", data)
+        self.assertEqual(b"".join(self.store.read_backup(manifest["id"])), data)
+        self.assertEqual(manifest["new_bytes"], len(data))
+        self.assertEqual(self.store.load_manifest(manifest["id"])["size"], len(data))
+
+    def test_incremental_writes_only_changed_chunks(self):
+        data = bytearray(random_bytes(500_000))
+        first = self.store.write_backup("gmail", bytes(data))
+        data[250_000:250_100] = random_bytes(100, seed=2)
+        second = self.store.write_backup("gmail", bytes(data), "incremental", parent=first["id"])
+
+        self.assertEqual(second["parent"], first["id"])
+        self.assertLess(second["new_bytes"], 0.2 * len(data))
+        self.assertEqual(b"".join(self.store.read_backup(second["id"])), bytes(data))
+
+    def test_unchanged_data_gets_a_new_backup(self):
+        data = random_bytes(100_000)
+        first = self.store.write_backup("drive", data)
+        second = self.store.write_backup("drive", data, "incremental", parent=first["id"])
+
+        self.assertNotEqual(second["id"], first["id"])
+        self.assertEqual(second["sha256"], first["sha256"])
+        self.assertEqual(second["new_chunks"], 0)
+        self.assertEqual(self.store.load_manifest(first["id"])["backup_type"], "full")
+        self.assertEqual(self.store.load_manifest(second["id"])["parent"], first["id"])
+
+    def test_unknown_backup(self):
+        with self.assertRaises(KeyError):
+            list(self.store.read_backup("missing"))
+
+
+class TestBackupManagerStorage(unittest.TestCase):
+    """Test BackupManager.store_backup / restore_backup"""
+
+    def test_incremental_records_parent(self):
+        pytest.importorskip("google.auth")
+        from backup_automation import BackupManager
+
+        with tempfile.TemporaryDirectory() as tmp:
+            config = os.path.join(tmp, "backup.yaml")
+            with open(config, "w") as f:
+                f.write(f"backup:\n  storage:\n    path: {tmp}/store\n")
+            manager = BackupManager(config)
+            data = random_bytes(300_000)
+            full_id = manager.store_backup("drive", data)
+            incremental_id = manager.store_backup("drive", data + b"more", backup_type="incremental")
+
+            incremental = manager.catalog.get_backup(incremental_id)
+            self.assertEqual(incremental["parent"], full_id)
+            self.assertLess(incremental["new_bytes"], 100_000)
+            self.assertEqual(b"".join(manager.restore_backup(incremental_id)), data + b"more")
+
+
+if __name__ == "__main__":
+    unittest.main()
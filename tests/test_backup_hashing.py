@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming backup hashing
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+import backup_hashing
+from backup_hashing import hash_source, iter_chunks
+
+
+class TestStreamingHashing(unittest.TestCase):
+    """Test single-pass digests over every supported source type"""
+
+    def setUp(self):
+        self.data = os.urandom(300_000)
+        self.expected = {
+            "size": len(self.data),
+            "sha256": hashlib.sha256(self.data).hexdigest(),
+            "md5": hashlib.md5(self.data).hexdigest(),
+        }
+
+    def test_bytes(self):
+        self.assertEqual(hash_source(self.data, chunk_size=4096), self.expected)
+
+    def test_file_path(self):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(self.data)
+        try:
+            self.assertEqual(hash_source(f.name, chunk_size=65536), self.expected)
+        finally:
+            os.unlink(f.name)
+
+    def test_file_objects(self):
+        self.assertEqual(hash_source(io.BytesIO(self.data), chunk_size=7000), self.expected)
+
+        class ReadOnly:
+            def __init__(self, data):
+                self.stream = io.BytesIO(data)
+
+            def read(self, size):
+                return self.stream.read(size)
+
+        self.assertEqual(hash_source(ReadOnly(self.data)), self.expected)
+
+    def test_chunk_iterator(self):
+        chunks = (self.data[i:i + 1000] for i in range(0, len(self.data), 1000))
+        self.assertEqual(hash_source(chunks), self.expected)
+
+    def test_file_chunks_reuse_one_buffer(self):
+        chunks = iter_chunks(io.BytesIO(self.data), chunk_size=1024)
+        first = next(chunks)
+        second = next(chunks)
+        self.assertIs(first.obj, second.obj)
+        self.assertEqual(len(second), 1024)
+
+    def test_empty_source(self):
+        self.assertEqual(hash_source(b"")["size"], 0)
+        self.assertEqual(hash_source(iter([]))["sha256"], hashlib.sha256(b"").hexdigest())
+
+    def test_md5_without_usedforsecurity_support(self):
+        real_new = hashlib.new
+
+        def new(name, data=b"", **kwargs):
+            if kwargs:
+                raise TypeError("new() got an unexpected keyword argument 'usedforsecurity'")
+            return real_new(name, data)
+
+        with patch.object(backup_hashing.hashlib, "new", new):
+            self.assertEqual(hash_source(self.data)["md5"], hashlib.md5(self.data).hexdigest())
+
+
+class TestCreateBackup(unittest.TestCase):
+    """Test BackupManager.create_backup over streamed sources"""
+
+    def test_path_and_bytes_give_same_metadata(self):
+        pytest.importorskip("google.auth")
+        from backup_automation import BackupManager
+
+        data = os.urandom(100_000)
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(data)
+        try:
+            manager = BackupManager("missing-config.json")
+            from_path = manager.create_backup("drive", f.name, chunk_size=8192)
+            from_bytes = manager.create_backup("drive", data)
+        finally:
+            os.unlink(f.name)
+
+        self.assertNotEqual(from_path, from_bytes)
+        for backup_id in (from_path, from_bytes):
+            self.assertEqual(manager.catalog.get_backup(backup_id)["sha256"], hashlib.sha256(data).hexdigest())
+        self.assertEqual(manager.catalog.get_backup(from_path)["checksum"], hashlib.md5(data).hexdigest())
+        self.assertEqual(manager.catalog.get_backup(from_path)["size"], len(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
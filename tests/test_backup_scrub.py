@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Tests for backup scrubbing
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+import unittest
+
+import pytest
+
+from backup_catalog import BackupCatalog
+from backup_chunking import ChunkStore, ContentDefinedChunker
+from backup_scrub import BackupScrubber, BandwidthLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestBandwidthLimiter(unittest.TestCase):
+    """Test the byte-rate token bucket"""
+
+    def test_reads_beyond_burst_are_paced(self):
+        clock = FakeClock()
+        limiter = BandwidthLimiter(1000, burst=500, clock=clock, sleep=clock.sleep)
+        for _ in range(5):
+            limiter.acquire(500)
+        self.assertAlmostEqual(clock.now, 2.0)
+
+    def test_rejects_non_positive_rate(self):
+        with self.assertRaises(ValueError):
+            BandwidthLimiter(0)
+
+
+class TestBackupScrubber(unittest.TestCase):
+    """Test corruption detection, reporting and resumption"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = ChunkStore(
+            os.path.join(self.tmp.name, "store"),
+            ContentDefinedChunker(min_size=2048, avg_size=8192, max_size=32768),
+        )
+        self.catalog = BackupCatalog(":memory:")
+        self.addCleanup(self.catalog.close)
+        rng = random.Random(9)
+        self.backup_ids = []
+        for data_type in ("drive", "gmail"):
+            manifest = self.store.write_backup(data_type, rng.randbytes(200_000))
+            self.catalog.add_backup(manifest, manifest["chunks"])
+            self.backup_ids.append(manifest["id"])
+        self.digests = [digest for digest, _ in self.catalog.iter_chunk_records()]
+        self.state_path = os.path.join(self.tmp.name, "scrub_state.json")
+
+    def scrubber(self, **kwargs):
+        return BackupScrubber(self.catalog, self.store, workers=3, state_path=self.state_path, **kwargs)
+
+    def corrupt(self, digest):
+        with open(self.store.chunk_path(digest), "r+b") as f:
+            f.write(b"\xff\xfe")
+
+    def test_clean_store_verifies_every_chunk(self):
+        report = self.scrubber().scrub("chunks")
+        self.assertTrue(report["complete"])
+        self.assertEqual(report["objects"], len(self.digests))
+        self.assertEqual(report["bytes"], 400_000)
+        self.assertEqual(report["corrupt"], [])
+        self.assertGreater(report["rate_mb_s"], 0)
+
+    def test_corrupt_and_missing_chunks_are_reported(self):
+        self.corrupt(self.digests[1])
+        os.remove(self.store.chunk_path(self.digests[4]))
+        report = self.scrubber().scrub("chunks")
+        self.assertEqual(report["corrupt"], [
+            {"id": self.digests[1], "error": "digest mismatch"},
+            {"id": self.digests[4], "error": "missing"},
+        ])
+
+    def test_backup_mode_checks_restored_content(self):
+        drive_chunk = self.catalog.backup_chunks(self.backup_ids[0])[0][0]
+        self.corrupt(drive_chunk)
+        report = self.scrubber().scrub("backups")
+        self.assertEqual(report["objects"], 2)
+        self.assertEqual(report["corrupt"], [{"id": self.backup_ids[0], "error": "checksum mismatch"}])
+
+    def test_interrupted_scrub_resumes(self):
+        self.corrupt(self.digests[2])
+        first = self.scrubber().scrub("chunks", max_objects=5)
+        self.assertFalse(first["complete"])
+        self.assertEqual(first["objects"], 5)
+        with open(self.state_path) as f:
+            self.assertEqual(json.load(f)["chunks"]["cursor"], self.digests[4])
+
+        second = self.scrubber().scrub("chunks")
+        self.assertTrue(second["complete"])
+        self.assertEqual(second["resumed_from"], self.digests[4])
+        self.assertEqual(second["objects"], len(self.digests) - 5)
+        self.assertEqual(second["pass_objects"], len(self.digests))
+        self.assertEqual([c["id"] for c in second["corrupt"]], [self.digests[2]])
+
+        third = self.scrubber().scrub("chunks")
+        self.assertIsNone(third["resumed_from"])
+        self.assertEqual(third["objects"], len(self.digests))
+
+    def test_deadline_stops_checks_already_running(self):
+        class SlowLimiter:
+            def acquire(self, size):
+                time.sleep(0.05)
+
+        scrubber = self.scrubber()
+        scrubber.limiter = SlowLimiter()
+        started = time.monotonic()
+        report = scrubber.scrub("backups", max_seconds=0.2)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertFalse(report["complete"])
+        self.assertEqual(report["objects"], 0)
+        with open(self.state_path) as f:
+            self.assertIsNone(json.load(f)["backups"]["cursor"])
+
+        resumed = self.scrubber().scrub("backups")
+        self.assertTrue(resumed["complete"])
+        self.assertEqual(resumed["objects"], 2)
+
+    def test_corrupt_list_is_capped(self):
+        for digest in self.digests[:3]:
+            self.corrupt(digest)
+        report = self.scrubber(max_corrupt_listed=2).scrub("chunks")
+        self.assertEqual(report["corrupt_count"], 3)
+        self.assertEqual([c["id"] for c in report["corrupt"]], self.digests[:2])
+        with open(self.state_path) as f:
+            self.assertEqual(json.load(f)["last_chunks"]["corrupt"], 3)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            self.scrubber().scrub("manifests")
+
+
+class TestBackupManagerScrub(unittest.TestCase):
+    """Test BackupManager.scrub_backups with settings from the config"""
+
+    def test_scrub_uses_configured_settings(self):
+        pytest.importorskip("google.auth")
+        from backup_automation import BackupManager
+
+        with tempfile.TemporaryDirectory() as tmp:
+            config = os.path.join(tmp, "backup.yaml")
+            with open(config, "w") as f:
+                f.write(
+                    f"backup:\n  storage:\n    path: {tmp}/store\n"
+                    "  scrub:\n    workers: 2\n    bandwidth_mb_s: 50\n"
+                )
+            manager = BackupManager(config)
+            backup_id = manager.store_backup("drive", os.urandom(300_000))
+            report = manager.scrub_backups("backups")
+            self.assertTrue(report["complete"])
+            self.assertEqual(report["bytes"], 300_000)
+            self.assertEqual(report["corrupt"], [])
+            self.assertIsNotNone(manager.catalog.get_backup(backup_id))
+            self.assertTrue(os.path.exists(os.path.join(tmp, "store", "scrub_state.json")))
+
+    def test_replicated_backups_are_not_scrubbed_as_corrupt(self):
+        pytest.importorskip("google.auth")
+        from backup_automation import BackupManager
+        from backup_writer import LocalDirectoryTarget, PipelinedBackupWriter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            config = os.path.join(tmp, "backup.yaml")
+            with open(config, "w") as f:
+                f.write(f"backup:\n  storage:\n    path: {tmp}/store\n")
+            manager = BackupManager(config)
+            manager.store_backup("drive", os.urandom(300_000))
+            writer = PipelinedBackupWriter(
+                [LocalDirectoryTarget("replica", os.path.join(tmp, "replica"))], compression_workers=1
+            )
+            replica_id = manager.replicate_backup("drive", os.urandom(300_000), writer=writer)
+            self.assertGreater(manager.catalog.get_backup(replica_id)["chunk_count"], 0)
+
+            report = manager.scrub_backups("backups")
+            self.assertTrue(report["complete"])
+            self.assertEqual(report["objects"], 1)
+            self.assertEqual(report["corrupt"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
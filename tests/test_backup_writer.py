@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Tests for the pipelined multi-target backup writer
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import pytest
+import requests
+
+from backup_chunking import ContentDefinedChunker
+from backup_writer import (
+    HttpTarget,
+    LocalDirectoryTarget,
+    PipelinedBackupWriter,
+    build_backup_writer,
+    build_targets,
+)
+
+KEY = bytes(range(32))
+
+
+def sample_data(size=600_000, seed=3):
+    rng = random.Random(seed)
+    words = [b"login", b"admin", b"drive", b"share", b"token", b"alert"]
+    return b" ".join(rng.choice(words) + str(rng.randrange(1000)).encode() for _ in range(size // 8))
+
+
+class FailingTarget(LocalDirectoryTarget):
+    def put(self, key, data):
+        raise IOError("disk full")
+
+
+class TestPipelinedBackupWriter(unittest.TestCase):
+    """Test round trips, target fan-out, dedup and failure handling"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.targets = [
+            LocalDirectoryTarget("primary", os.path.join(self.tmp.name, "primary")),
+            LocalDirectoryTarget("secondary", os.path.join(self.tmp.name, "secondary")),
+        ]
+        self.chunker = ContentDefinedChunker(min_size=4096, avg_size=16384, max_size=65536)
+        self.data = sample_data()
+
+    def writer(self, **kwargs):
+        kwargs.setdefault("compression_workers", 2)
+        kwargs.setdefault("queue_size", 4)
+        return PipelinedBackupWriter(self.targets, chunker=self.chunker, **kwargs)
+
+    def test_gzip_round_trip_to_every_target(self):
+        writer = self.writer()
+        manifest = writer.write("drive", self.data)
+        self.assertEqual(manifest["size"], len(self.data))
+        self.assertLess(manifest["stored_bytes"], len(self.data) // 2)
+        for target in self.targets:
+            self.assertEqual(b"".join(writer.restore(target, manifest["id"])), self.data)
+
+    def test_encrypted_round_trip(self):
+        pytest.importorskip("cryptography")
+        writer = self.writer(encryption_key=KEY)
+        manifest = writer.write("drive", self.data)
+        self.assertTrue(manifest["encrypted"])
+        digest = manifest["chunks"][0][0]
+        blob = self.targets[0].get(writer._chunk_key(digest))
+        self.assertTrue(blob.startswith(b"WSB1"))
+        self.assertEqual(b"".join(writer.restore(self.targets[1], manifest["id"])), self.data)
+
+    def test_encrypted_object_keys_do_not_reveal_digests(self):
+        pytest.importorskip("cryptography")
+        writer = self.writer(encryption_key=KEY)
+        manifest = writer.write("drive", self.data)
+        digest = manifest["chunks"][0][0]
+        self.assertNotIn(digest, writer._chunk_key(digest))
+        self.assertFalse(self.targets[0].exists(f"chunks/{digest[:2]}/{digest}"))
+        other_key = PipelinedBackupWriter(self.targets, encryption_key=bytes(32))._chunk_key(digest)
+        self.assertNotEqual(writer._chunk_key(digest), other_key)
+
+    def test_swapped_ciphertext_is_rejected(self):
+        pytest.importorskip("cryptography")
+        from cryptography.exceptions import InvalidTag
+
+        writer = self.writer(encryption_key=KEY)
+        manifest = writer.write("drive", self.data)
+        first, second = manifest["chunks"][0][0], manifest["chunks"][1][0]
+        target = self.targets[0]
+        target.put(writer._chunk_key(first), target.get(writer._chunk_key(second)))
+        with self.assertRaises(InvalidTag):
+            b"".join(writer.restore(target, manifest["id"]))
+
+    def test_zstd_round_trip(self):
+        pytest.importorskip("zstandard")
+        writer = self.writer(compression="zstd", zstd_threads=2)
+        manifest = writer.write("drive", self.data)
+        self.assertEqual(b"".join(writer.restore(self.targets[0], manifest["id"])), self.data)
+
+    def test_chunks_present_on_all_targets_are_skipped(self):
+        writer = self.writer()
+        first = writer.write("drive", self.data)
+        edited = self.data[:300_000] + b"changed" + self.data[300_000:]
+        second = writer.write("drive", edited)
+        self.assertLess(second["stored_bytes"], first["stored_bytes"] // 2)
+        self.assertEqual(b"".join(writer.restore(self.targets[1], second["id"])), edited)
+
+    def test_unchanged_data_gets_a_new_manifest(self):
+        writer = self.writer()
+        first = writer.write("drive", self.data)
+        second = writer.write("drive", self.data)
+        self.assertNotEqual(first["id"], second["id"])
+        self.assertEqual(second["stored_bytes"], 0)
+        self.assertEqual(b"".join(writer.restore(self.targets[0], first["id"])), self.data)
+
+    def test_target_failure_is_raised(self):
+        self.targets.append(FailingTarget("broken", os.path.join(self.tmp.name, "broken")))
+        with self.assertRaisesRegex(RuntimeError, "Upload to broken failed"):
+            self.writer(queue_size=1).write("drive", self.data)
+
+
+class TestBuildFromConfig(unittest.TestCase):
+    """Test target selection and settings from backup_schedule.yaml"""
+
+    CONFIG = {
+        "targets": [
+            {"name": "google_drive", "enabled": True, "path": "drive://vault",
+             "compression": "gzip", "encryption": True},
+            {"name": "cloud_storage", "enabled": True, "bucket": "backups"},
+            {"name": "local_nas", "enabled": False, "path": "nas://server"},
+        ],
+        "pipeline": {"compression_workers": 2, "queue_size": 8, "upload_concurrency": 2},
+    }
+
+    def test_remote_targets_without_a_stand_in_are_skipped(self):
+        with self.assertLogs("backup_writer", "WARNING") as logs:
+            self.assertEqual(build_targets(self.CONFIG["targets"]), [])
+        self.assertEqual(len(logs.output), 2)
+
+    def test_no_usable_target_falls_back_to_storage_path(self):
+        with tempfile.TemporaryDirectory() as root:
+            config = {**self.CONFIG, "storage": {"path": root}}
+            writer = build_backup_writer(config)
+            self.assertEqual([t.name for t in writer.targets], ["local_storage"])
+            self.assertIsNone(writer._aead)
+            manifest = writer.write("drive", b"replicated")
+            self.assertTrue(os.path.exists(os.path.join(root, "replicas", "manifests", f"{manifest['id']}.json")))
+
+    def test_enabled_targets_use_stand_in_directories(self):
+        pytest.importorskip("cryptography")
+        with tempfile.TemporaryDirectory() as root:
+            writer = build_backup_writer(self.CONFIG, stand_in_root=root, encryption_key=KEY)
+            self.assertEqual([t.name for t in writer.targets], ["google_drive", "cloud_storage"])
+            self.assertEqual(writer.compression, "gzip")
+            self.assertEqual(writer.upload_concurrency, 2)
+            self.assertIsNotNone(writer._aead)
+
+    def test_strongest_compression_and_level_win(self):
+        targets = [
+            {"name": "plain", "path": "plain"},
+            {"name": "fast", "path": "fast", "compression": "gzip", "compression_level": 3},
+            {"name": "small", "path": "small", "compression": "gzip", "compression_level": 9},
+        ]
+        with tempfile.TemporaryDirectory() as root:
+            writer = build_backup_writer({"targets": targets, "pipeline": {"compression_level": 5}},
+                                         stand_in_root=root)
+            self.assertEqual((writer.compression, writer.compression_level), ("gzip", 9))
+
+            pytest.importorskip("zstandard")
+            targets.append({"name": "zstd", "path": "zstd", "compression": "zstd"})
+            writer = build_backup_writer({"targets": targets, "pipeline": {"compression_level": 5}},
+                                         stand_in_root=root)
+            self.assertEqual((writer.compression, writer.compression_level), ("zstd", 5))
+
+    def test_unknown_compression_is_rejected(self):
+        with tempfile.TemporaryDirectory() as root:
+            with self.assertRaisesRegex(ValueError, "lz4"):
+                build_backup_writer({"targets": [{"name": "a", "compression": "lz4"}]}, stand_in_root=root)
+
+    def test_encryption_requires_a_key(self):
+        with tempfile.TemporaryDirectory() as root:
+            with mock.patch.dict(os.environ, {}, clear=True):
+                with self.assertRaises(ValueError):
+                    build_backup_writer(self.CONFIG, stand_in_root=root)
+
+
+class TestHttpTarget(unittest.TestCase):
+    """Test HEAD-based existence checks"""
+
+    def head_status(self, status):
+        target = HttpTarget("bucket", "http://stub/bucket")
+        target.session = mock.MagicMock()
+        target.session.head.return_value = requests.Response()
+        target.session.head.return_value.status_code = status
+        return target
+
+    def test_exists(self):
+        target = self.head_status(200)
+        self.assertTrue(target.exists("chunks/ab/abc"))
+        target.session.head.assert_called_once_with("http://stub/bucket/chunks/ab/abc", timeout=60.0)
+        self.assertFalse(self.head_status(404).exists("chunks/ab/abc"))
+
+    def test_errors_are_raised(self):
+        with self.assertRaises(requests.HTTPError):
+            self.head_status(500).exists("chunks/ab/abc")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for bulk per-user enrichment
+"""
+
+import itertools
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("requests")
+
+from bulk_enrichment import RateLimiter, bulk_enrich  # noqa: E402
+from okta_api_example import OktaIntegration  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestBulkEnrich(unittest.TestCase):
+    """Test the bounded, streaming worker pool"""
+
+    def test_runs_lookups_in_parallel(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def lookup(item):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return item * 2
+
+        results = dict(bulk_enrich(range(40), lookup, max_workers=8))
+        self.assertEqual(results, {i: i * 2 for i in range(40)})
+        self.assertEqual(peak[0], 8)
+
+    def test_reads_input_lazily(self):
+        consumed = []
+        users = (consumed.append(i) or i for i in itertools.count())
+        stream = bulk_enrich(users, lambda item: item, max_workers=2, max_pending=4)
+        first = [next(stream) for _ in range(3)]
+        self.assertEqual(len(first), 3)
+        self.assertLess(len(consumed), 10)
+        stream.close()
+
+    def test_closing_early_cancels_queued_lookups(self):
+        calls = []
+
+        def lookup(item):
+            calls.append(item)
+            time.sleep(0.05)
+            return item
+
+        stream = bulk_enrich(range(20), lookup, max_workers=1, max_pending=6)
+        next(stream)
+        stream.close()
+        self.assertLessEqual(len(calls), 2)
+
+    def test_rate_limiter_caps_request_rate(self):
+        clock = FakeClock()
+        limiter = RateLimiter(10, burst=1, clock=clock, sleep=clock.sleep)
+        for _ in range(21):
+            limiter.acquire()
+        self.assertAlmostEqual(clock.now, 2.0)
+
+
+class TestOktaEnrichment(unittest.TestCase):
+    """Test OktaIntegration.enrich_users"""
+
+    def test_streams_factors_and_groups(self):
+        okta = OktaIntegration("https://example.okta.com", "token")
+        okta.session = MagicMock()
+
+        def request(method, url, **kwargs):
+            response = MagicMock(status_code=200, content=b"[]", headers={})
+            response.json.return_value = [{"url": url}]
+            return response
+
+        okta.session.request.side_effect = request
+        users = [{"id": f"u{i}", "profile": {"login": f"user{i}@example.com"}} for i in range(10)]
+        results = {result["user_id"]: result for result in okta.enrich_users(users, max_workers=4)}
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual(okta.session.request.call_count, 20)
+        self.assertTrue(results["u3"]["factors"][0]["url"].endswith("/users/u3/factors"))
+        self.assertTrue(results["u3"]["groups"][0]["url"].endswith("/users/u3/groups"))
+        self.assertEqual(results["u3"]["login"], "user3@example.com")
+
+
+if __name__ == "__main__":
+    unittest.main()
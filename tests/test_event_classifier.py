@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled security event classifier
+"""
+
+import os
+import unittest
+
+from event_classifier import DEFAULT_RULES, SecurityEventClassifier
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "configs", "security_config.yaml")
+
+
+class TestSecurityEventClassifier(unittest.TestCase):
+    """Test rule compilation and single-pass tagging"""
+
+    def setUp(self):
+        self.classifier = SecurityEventClassifier([
+            {"match": "exact", "pattern": "CREATE_USER", "category": "account_lifecycle", "severity": "medium"},
+            {"match": "contains", "pattern": "admin", "category": "privilege_change", "severity": "high"},
+            {"match": "contains", "pattern": "login_failure", "category": "authentication", "severity": "medium"},
+        ])
+
+    def test_exact_match_is_case_insensitive(self):
+        self.assertEqual(self.classifier.classify("create_user"), ("account_lifecycle", "medium"))
+        self.assertEqual(self.classifier.classify("CREATE_USER"), ("account_lifecycle", "medium"))
+
+    def test_substring_rules_use_leftmost_match(self):
+        self.assertEqual(self.classifier.classify("GRANT_ADMIN_PRIVILEGE"), ("privilege_change", "high"))
+        self.assertEqual(self.classifier.classify("login_failure"), ("authentication", "medium"))
+        self.assertIsNone(self.classifier.classify("logout"))
+        self.assertIsNone(self.classifier.classify(None))
+
+    def test_classify_activities_tags_by_event_name(self):
+        activities = [
+            {
+                "id": {"time": "2024-12-25T10:00:00.000Z"},
+                "actor": {"email": "admin@example.com"},
+                "events": [
+                    {"type": "USER_SETTINGS", "name": "CREATE_USER"},
+                    {"type": "USER_SETTINGS", "name": "CHANGE_DISPLAY_NAME"},
+                ],
+            },
+            {"id": {"time": "2024-12-25T10:01:00.000Z"}, "events": []},
+        ]
+        tagged = list(self.classifier.classify_activities(activities))
+        self.assertEqual(len(tagged), 1)
+        self.assertEqual(tagged[0]["event_name"], "CREATE_USER")
+        self.assertEqual(tagged[0]["actor"], "admin@example.com")
+        self.assertEqual(tagged[0]["severity"], "medium")
+
+    def test_rejects_unknown_severity(self):
+        with self.assertRaises(ValueError):
+            SecurityEventClassifier([{"pattern": "x", "category": "c", "severity": "urgent"}])
+
+    def test_loads_rules_from_config(self):
+        classifier = SecurityEventClassifier.from_config(CONFIG_PATH)
+        self.assertEqual(classifier.classify("GRANT_ADMIN_PRIVILEGE"), ("privilege_change", "critical"))
+
+    def test_missing_config_falls_back_to_defaults(self):
+        classifier = SecurityEventClassifier.from_config("does/not/exist.yaml")
+        self.assertEqual(len(classifier.rules), len(DEFAULT_RULES))
+
+
+if __name__ == "__main__":
+    unittest.main()
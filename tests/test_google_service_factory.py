@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached Google API service factory
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("google_auth_httplib2")
+
+from google.auth.credentials import AnonymousCredentials  # noqa: E402
+
+from google_service_factory import GoogleServiceFactory  # noqa: E402
+
+
+class TestGoogleServiceFactory(unittest.TestCase):
+    """Test discovery caching and lazy, shared-transport services"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.factory = GoogleServiceFactory(AnonymousCredentials(), cache_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_nothing_is_built_until_first_use(self):
+        self.assertEqual(self.factory.stats["builds"], 0)
+        self.assertIsNone(self.factory._http)
+
+    def test_services_are_memoized_and_share_transport(self):
+        reports = self.factory.service("admin", "reports_v1")
+        self.assertIs(self.factory.service("admin", "reports_v1"), reports)
+        directory = self.factory.service("admin", "directory_v1")
+        self.assertIs(reports._http, directory._http)
+        self.assertEqual(self.factory.stats["builds"], 2)
+        self.assertEqual(self.factory.stats["static_hits"], 2)
+
+    def test_worker_services_get_their_own_transport(self):
+        shared = self.factory.service("admin", "reports_v1")
+        worker = self.factory.build("admin", "reports_v1", http=self.factory.new_http())
+        self.assertIsNot(worker._http, shared._http)
+
+    def test_disk_cache_is_preferred(self):
+        document = self.factory.discovery_document("admin", "reports_v1")
+        with open(os.path.join(self.tmp.name, "admin.reports_v1.json"), "w") as f:
+            f.write(document)
+        self.factory.service("admin", "reports_v1")
+        self.assertEqual(self.factory.stats["disk_hits"], 1)
+
+    def test_unbundled_documents_are_fetched_once_and_cached(self):
+        document = self.factory.discovery_document("admin", "reports_v1")
+        with patch("googleapiclient.discovery_cache.get_static_doc", return_value=None), \
+                patch.object(GoogleServiceFactory, "_fetch_discovery_document",
+                             return_value=document) as fetch:
+            self.factory.build("admin", "reports_v1")
+            self.factory.build("admin", "reports_v1")
+        self.assertEqual(fetch.call_count, 1)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "admin.reports_v1.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for Graph delta sync into the local directory store
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from graph_directory_sync import DirectoryStore, GraphDirectorySync  # noqa: E402
+
+
+class FakeGraph:
+    """Graph stand-in serving queued delta rounds as pages."""
+
+    def __init__(self):
+        self.rounds = []
+        self.calls = []
+
+    def delta_pages(self, url, params=None):
+        self.calls.append(url)
+        response = self.rounds.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        for index, page in enumerate(response["pages"]):
+            last = index == len(response["pages"]) - 1
+            yield page, response["delta_link"] if last else None
+
+
+class TestGraphDirectorySync(unittest.TestCase):
+    """Test delta application, token persistence and resync"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "directory.db")
+        self.store = DirectoryStore(self.path)
+        self.graph = FakeGraph()
+        self.sync = GraphDirectorySync(self.graph, self.store)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def user(self, user_id, **props):
+        return {"id": user_id, "displayName": user_id.upper(),
+                "userPrincipalName": f"{user_id}@example.com", "accountEnabled": True, **props}
+
+    def test_full_then_incremental_sync(self):
+        self.graph.rounds.append({
+            "pages": [[self.user("u1"), self.user("u2")], [self.user("u3")]],
+            "delta_link": "https://graph/users/delta?token=1",
+        })
+        stats = self.sync.sync_resource("users")
+        self.assertTrue(stats["full_sync"])
+        self.assertEqual((stats["pages"], stats["upserted"]), (2, 3))
+        self.assertEqual(self.graph.calls, ["/users/delta"])
+
+        self.graph.rounds.append({
+            "pages": [[{"id": "u1", "accountEnabled": False}, {"id": "u2", "@removed": {"reason": "deleted"}}]],
+            "delta_link": "https://graph/users/delta?token=2",
+        })
+        stats = self.sync.sync_resource("users")
+        self.assertFalse(stats["full_sync"])
+        self.assertEqual(self.graph.calls[-1], "https://graph/users/delta?token=1")
+
+        self.assertEqual(self.store.count_users(), 2)
+        self.assertIsNone(self.store.get_user("u2"))
+        self.assertEqual(self.store.get_user("u1"), {
+            "id": "u1", "displayName": "U1", "mail": None,
+            "userPrincipalName": "u1@example.com", "accountEnabled": False,
+        })
+        self.assertEqual(self.store.find_user("U3@EXAMPLE.COM")["id"], "u3")
+        self.assertEqual([user["id"] for user in self.store.iter_users(enabled_only=True)], ["u3"])
+
+    def test_token_survives_restart(self):
+        self.graph.rounds.append({"pages": [[self.user("u1")]], "delta_link": "link-1"})
+        self.sync.sync_resource("users")
+        self.store.close()
+
+        self.store = DirectoryStore(self.path)
+        self.assertEqual(self.store.get_delta_state("users")["delta_link"], "link-1")
+        self.assertEqual(self.store.get_user("u1")["id"], "u1")
+
+    def test_interrupted_round_keeps_previous_token(self):
+        self.graph.rounds.append({"pages": [[self.user("u1")]], "delta_link": "link-1"})
+        self.sync.sync_resource("users")
+        self.graph.rounds.append(requests.exceptions.ConnectionError("reset"))
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.sync.sync_resource("users")
+        self.assertEqual(self.store.get_delta_state("users")["delta_link"], "link-1")
+
+    def test_expired_token_triggers_full_resync_and_sweep(self):
+        self.graph.rounds.append({"pages": [[self.user("u1"), self.user("u2")]], "delta_link": "link-1"})
+        self.sync.sync_resource("users")
+
+        gone = requests.exceptions.HTTPError("410", response=MagicMock(status_code=410))
+        self.graph.rounds.append(gone)
+        self.graph.rounds.append({"pages": [[self.user("u2")]], "delta_link": "link-2"})
+        stats = self.sync.sync_resource("users")
+
+        self.assertTrue(stats["full_sync"])
+        self.assertEqual(self.graph.calls, ["/users/delta", "link-1", "/users/delta"])
+        self.assertEqual([user["id"] for user in self.store.iter_users()], ["u2"])
+        self.assertEqual(self.store.get_delta_state("users")["delta_link"], "link-2")
+
+    def test_group_membership_deltas(self):
+        self.graph.rounds.append({"pages": [[self.user("u1"), self.user("u2")]], "delta_link": "u-1"})
+        self.graph.rounds.append({
+            "pages": [[{"id": "g1", "displayName": "Admins",
+                        "members@delta": [{"id": "u1"}, {"id": "u2"}]}]],
+            "delta_link": "g-1",
+        })
+        self.sync.sync()
+        self.assertEqual(self.store.get_group_members("g1"), ["u1", "u2"])
+
+        self.graph.rounds.append({"pages": [[]], "delta_link": "u-2"})
+        self.graph.rounds.append({
+            "pages": [[{"id": "g1", "members@delta": [{"id": "u2", "@removed": {"reason": "deleted"}}]}]],
+            "delta_link": "g-2",
+        })
+        results = self.sync.sync()
+        self.assertFalse(results["groups"]["full_sync"])
+        self.assertEqual(self.store.get_group_members("g1"), ["u1"])
+        self.assertEqual(self.store.get_user_groups("u1"), [{"id": "g1", "displayName": "Admins", "mail": None}])
+
+
+if __name__ == "__main__":
+    unittest.main()
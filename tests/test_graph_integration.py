@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Tests for the Microsoft Graph client
+"""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+pytest.importorskip("azure.identity")
+pytest.importorskip("msgraph.core")
+
+import microsoft_graph_example  # noqa: E402
+from microsoft_graph_example import MicrosoftGraphIntegration, retry_after_seconds  # noqa: E402
+
+
+def json_response(data, status_code=200, headers=None):
+    response = MagicMock()
+    response.json.return_value = data
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class GraphTestCase(unittest.TestCase):
+    def setUp(self):
+        with patch.object(microsoft_graph_example, "ClientSecretCredential"), \
+                patch.object(microsoft_graph_example, "GraphClient"):
+            self.graph = MicrosoftGraphIntegration("client", "secret", "tenant")
+        self.graph.client = MagicMock()
+
+
+class TestGraphPagination(GraphTestCase):
+    """Test @odata.nextLink following"""
+
+    def test_follows_next_links_lazily(self):
+        next_link = "https://graph.microsoft.com/v1.0/users?$skiptoken=abc"
+        self.graph.client.get.side_effect = [
+            json_response({"value": [{"id": "u1"}, {"id": "u2"}], "@odata.nextLink": next_link}),
+            json_response({"value": [{"id": "u3"}]}),
+        ]
+
+        users = self.graph.iter_users()
+        self.assertEqual(next(users), {"id": "u1"})
+        self.assertEqual(self.graph.client.get.call_count, 1)
+        self.assertEqual([user["id"] for user in users], ["u2", "u3"])
+
+        first, second = self.graph.client.get.call_args_list
+        self.assertEqual(first.args[0], "/users")
+        self.assertEqual(first.kwargs["params"]["$top"], 999)
+        self.assertEqual(second.args[0], next_link)
+        self.assertIsNone(second.kwargs["params"])
+
+    def test_get_methods_follow_every_page(self):
+        pages = [
+            json_response({"value": [{"id": "a1"}, {"id": "a2"}], "@odata.nextLink": "next"}),
+            json_response({"value": [{"id": "a3"}]}),
+        ]
+        self.graph.client.get.side_effect = list(pages)
+        self.assertEqual([a["id"] for a in self.graph.get_security_alerts()], ["a1", "a2", "a3"])
+
+        self.graph.client.get.side_effect = list(pages)
+        self.assertEqual([u["id"] for u in self.graph.get_users(max_results=2)], ["a1", "a2"])
+        self.assertEqual(self.graph.client.get.call_count, 3)
+
+    def test_delta_pages_return_delta_link_on_last_page(self):
+        self.graph.client.get.side_effect = [
+            json_response({"value": [{"id": "u1"}], "@odata.nextLink": "next"}),
+            json_response({"value": [{"id": "u2"}], "@odata.deltaLink": "delta"}),
+        ]
+        pages = list(self.graph.delta_pages("/users/delta", {"$select": "id"}))
+        self.assertEqual(pages, [([{"id": "u1"}], None), ([{"id": "u2"}], "delta")])
+
+
+class TestGraphBatching(GraphTestCase):
+    """Test $batch packing and per-item Retry-After"""
+
+    def batch_reply(self, statuses):
+        def post(url, json):
+            self.assertEqual(url, "/$batch")
+            self.assertLessEqual(len(json["requests"]), 20)
+            self.sent.append([request["id"] for request in json["requests"]])
+            responses = []
+            for request in json["requests"]:
+                status = statuses.pop(request["id"], 200)
+                responses.append({
+                    "id": request["id"],
+                    "status": status,
+                    "headers": {"Retry-After": "1"} if status == 429 else {},
+                    "body": {"value": [{"@odata.type": "#microsoft.graph.fido2AuthenticationMethod"}]},
+                })
+            return json_response({"responses": responses})
+        return post
+
+    def test_packs_twenty_requests_per_call(self):
+        self.sent = []
+        self.graph.client.post.side_effect = self.batch_reply({})
+        results = list(self.graph.iter_mfa_status_batched(f"u{i}" for i in range(45)))
+
+        self.assertEqual([len(ids) for ids in self.sent], [20, 20, 5])
+        self.assertEqual(len(results), 45)
+        self.assertTrue(all(result["mfa_enabled"] for result in results))
+
+    def test_throttled_items_are_retried_after_delay(self):
+        self.sent = []
+        self.graph.client.post.side_effect = self.batch_reply({"3": 429})
+        clock = {"now": 100.0, "sleeps": []}
+
+        def sleep(seconds):
+            clock["sleeps"].append(seconds)
+            clock["now"] += seconds
+
+        with patch.object(microsoft_graph_example.time, "monotonic", lambda: clock["now"]), \
+                patch.object(microsoft_graph_example.time, "sleep", sleep):
+            results = list(self.graph.iter_mfa_status_batched([f"u{i}" for i in range(5)]))
+
+        self.assertEqual(self.sent, [["0", "1", "2", "3", "4"], ["3"]])
+        self.assertEqual(clock["sleeps"], [1.0])
+        self.assertEqual(sorted(result["user_id"] for result in results),
+                         ["u0", "u1", "u2", "u3", "u4"])
+
+    def test_missing_sub_responses_are_retried_then_failed(self):
+        self.sent = []
+        reply = self.batch_reply({})
+
+        def post(url, json):
+            response = reply(url, json)
+            body = response.json.return_value
+            body["responses"] = [item for item in body["responses"] if item["id"] != "1"]
+            return response
+
+        self.graph.client.post.side_effect = post
+        clock = {"now": 100.0}
+
+        def sleep(seconds):
+            clock["now"] += seconds
+
+        with patch.object(microsoft_graph_example.time, "monotonic", lambda: clock["now"]), \
+                patch.object(microsoft_graph_example.time, "sleep", sleep):
+            results = list(self.graph.batch_requests(
+                [{"id": str(i), "method": "GET", "url": f"/users/u{i}"} for i in range(3)],
+                max_retries=2,
+            ))
+
+        self.assertEqual(self.sent, [["0", "1", "2"], ["1"], ["1"]])
+        statuses = {item["id"]: item["status"] for item in results}
+        self.assertEqual(statuses, {"0": 200, "1": 0, "2": 200})
+
+    def test_throttled_batch_call_is_retried(self):
+        self.sent = []
+        reply = self.batch_reply({})
+        throttled = [json_response({}, 429, {"Retry-After": "2"}), json_response({}, 503)]
+
+        def post(url, json):
+            return throttled.pop(0) if throttled else reply(url, json)
+
+        self.graph.client.post.side_effect = post
+        sleeps = []
+        with patch.object(microsoft_graph_example.time, "sleep", sleeps.append):
+            results = list(self.graph.iter_mfa_status_batched([f"u{i}" for i in range(3)]))
+
+        self.assertEqual(sleeps, [2.0, 2])
+        self.assertEqual(self.graph.client.post.call_count, 3)
+        self.assertTrue(all(result["mfa_enabled"] for result in results))
+
+
+class TestRetryAfter(unittest.TestCase):
+    """Test Retry-After parsing"""
+
+    def test_seconds(self):
+        self.assertEqual(retry_after_seconds("7", 1), 7.0)
+        self.assertEqual(retry_after_seconds(None, 4), 4)
+
+    def test_http_date(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        delay = retry_after_seconds(format_datetime(retry_at, usegmt=True), 1)
+        self.assertTrue(28 <= delay <= 30, delay)
+        self.assertEqual(retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT", 1), 0.0)
+
+    def test_unparseable_value_uses_default(self):
+        self.assertEqual(retry_after_seconds("soon", 3), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
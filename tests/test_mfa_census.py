@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming MFA census
+"""
+
+import unittest
+
+from mfa_census import MfaCensus
+
+
+class TestMfaCensus(unittest.TestCase):
+    """Test incremental MFA counts and per-OU breakdowns"""
+
+    def test_counts_accumulate_across_pages(self):
+        census = MfaCensus()
+        census.add_users([
+            {"primaryEmail": "a@example.com", "isEnrolledIn2Sv": True, "orgUnitPath": "/Engineering"},
+            {"primaryEmail": "b@example.com", "isEnrolledIn2Sv": False, "orgUnitPath": "/Engineering"},
+        ])
+        census.add_users([
+            {"primaryEmail": "c@example.com", "isEnrolledIn2Sv": True, "orgUnitPath": "/Sales"},
+            {"primaryEmail": "d@example.com"},
+        ])
+        summary = census.summary()
+        self.assertEqual(summary["total_users"], 4)
+        self.assertEqual(summary["mfa_enabled"], 2)
+        self.assertEqual(summary["mfa_disabled"], 2)
+        self.assertEqual(summary["percentage"], 50.0)
+        self.assertEqual(summary["by_org_unit"]["/Engineering"]["percentage"], 50.0)
+        self.assertEqual(summary["by_org_unit"]["/Sales"]["mfa_enabled"], 1)
+        self.assertEqual(summary["by_org_unit"]["/"]["total_users"], 1)
+
+    def test_empty_directory(self):
+        summary = MfaCensus().summary()
+        self.assertEqual(summary["total_users"], 0)
+        self.assertEqual(summary["percentage"], 0)
+        self.assertEqual(summary["by_org_unit"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for the Okta API client
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("requests")
+
+from okta_api_example import OktaIntegration, OktaRateLimiter  # noqa: E402
+
+
+class TestOktaSession(unittest.TestCase):
+    """Test pooled session, timeouts and per-host concurrency"""
+
+    def setUp(self):
+        self.okta = OktaIntegration(
+            "https://example.okta.com/", "token", max_concurrency=2,
+            connect_timeout=3, read_timeout=10
+        )
+
+    def tearDown(self):
+        self.okta.close()
+
+    def test_session_is_reused_with_headers(self):
+        self.okta.session = MagicMock()
+        self.okta.session.request.return_value.json.return_value = [{"id": "u1"}]
+        self.assertEqual(self.okta.list_users(), [{"id": "u1"}])
+        self.okta.list_groups()
+
+        self.assertEqual(self.okta.session.request.call_count, 2)
+        method, url = self.okta.session.request.call_args_list[0].args
+        self.assertEqual((method, url), ("GET", "https://example.okta.com/api/v1/users"))
+        self.assertEqual(self.okta.session.request.call_args.kwargs["timeout"], (3, 10))
+
+    def test_pooled_adapter_and_gzip(self):
+        adapter = self.okta.session.get_adapter("https://example.okta.com")
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(adapter._pool_maxsize, 20)
+        self.assertIn("gzip", self.okta.session.headers["Accept-Encoding"])
+        self.assertEqual(self.okta.session.headers["Authorization"], "SSWS token")
+
+    def test_concurrency_is_limited_per_host(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def slow_request(method, url, **kwargs):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return MagicMock(content=b"")
+
+        self.okta.session = MagicMock()
+        self.okta.session.request.side_effect = slow_request
+        threads = [
+            threading.Thread(target=self.okta.list_mfa_devices, args=(f"u{i}",))
+            for i in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(peak[0], 2)
+
+
+def make_response(items, next_url=None, status=200, headers=None):
+    response = MagicMock(status_code=status, content=b"[]" if items is not None else b"")
+    response.json.return_value = items
+    response.links = {"next": {"url": next_url}} if next_url else {}
+    response.headers = headers or {}
+    return response
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestOktaPagination(unittest.TestCase):
+    """Test Link-header pagination"""
+
+    def test_follows_next_links_lazily(self):
+        okta = OktaIntegration("https://example.okta.com", "token")
+        okta.session = MagicMock()
+        okta.session.request.side_effect = [
+            make_response([{"id": 1}, {"id": 2}], "https://example.okta.com/api/v1/users?after=2"),
+            make_response([{"id": 3}]),
+        ]
+
+        users = okta.iter_users(page_size=2)
+        self.assertEqual(next(users), {"id": 1})
+        self.assertEqual(okta.session.request.call_count, 1)
+        self.assertEqual([user["id"] for user in users], [2, 3])
+
+        first, second = okta.session.request.call_args_list
+        self.assertEqual(first.kwargs["params"], {"limit": 2})
+        self.assertEqual(second.args[1], "https://example.okta.com/api/v1/users?after=2")
+        self.assertIsNone(second.kwargs["params"])
+
+    def test_empty_page_ends_polling_endpoints(self):
+        okta = OktaIntegration("https://example.okta.com", "token")
+        okta.session = MagicMock()
+        okta.session.request.side_effect = [
+            make_response([{"uuid": "a"}], "https://example.okta.com/api/v1/logs?after=a"),
+            make_response([], "https://example.okta.com/api/v1/logs?after=a"),
+        ]
+        self.assertEqual(len(list(okta.iter_security_events())), 1)
+
+
+class TestOktaRateLimiter(unittest.TestCase):
+    """Test per-bucket pacing from X-Rate-Limit headers"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = OktaRateLimiter(clock=self.clock, sleep=self.clock.sleep)
+
+    def headers(self, limit, remaining, reset_in):
+        now = time.time()
+        return {
+            "X-Rate-Limit-Limit": str(limit),
+            "X-Rate-Limit-Remaining": str(remaining),
+            "X-Rate-Limit-Reset": str(int(now + reset_in)),
+        }
+
+    def test_buckets_normalize_ids(self):
+        self.assertEqual(
+            OktaRateLimiter.bucket("get", "https://x.okta.com/api/v1/users/00u1/factors"),
+            "GET /users/{id}/factors",
+        )
+        self.assertEqual(
+            OktaRateLimiter.bucket("GET", "https://x.okta.com/api/v1/users?after=abc"),
+            "GET /users",
+        )
+
+    def test_unknown_bucket_is_not_delayed(self):
+        self.limiter.acquire("GET /users")
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_exhausted_bucket_waits_for_reset(self):
+        self.limiter.update("GET /users", make_response([], headers=self.headers(600, 1, 30)))
+        self.limiter.acquire("GET /users")
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 30, delta=1.5)
+
+    def test_low_quota_is_spread_until_reset(self):
+        self.limiter.update("GET /users", make_response([], headers=self.headers(100, 11, 20)))
+        for _ in range(5):
+            self.limiter.acquire("GET /users")
+        self.assertGreater(sum(self.clock.sleeps), 5)
+        self.assertLess(sum(self.clock.sleeps), 20)
+
+    def test_other_buckets_are_independent(self):
+        self.limiter.update("GET /users", make_response([], headers=self.headers(600, 0, 30)))
+        self.limiter.acquire("GET /groups")
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_429_is_retried_after_reset(self):
+        okta = OktaIntegration("https://example.okta.com", "token", rate_limiter=self.limiter)
+        okta.session = MagicMock()
+        okta.session.request.side_effect = [
+            make_response(None, status=429, headers=self.headers(600, 0, 10)),
+            make_response([{"id": "u1"}]),
+        ]
+        self.assertEqual(okta.list_users(), [{"id": "u1"}])
+        self.assertEqual(okta.session.request.call_count, 2)
+        self.assertAlmostEqual(self.clock.sleeps[0], 10, delta=1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming report writer
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from report_writer import StreamingReportWriter, load_compression_settings
+
+CACHE_CONFIG = os.path.join(os.path.dirname(__file__), "..", "configs", "cache_config.yaml")
+
+
+class TestStreamingReportWriter(unittest.TestCase):
+    """Test JSON/NDJSON output and compression"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.records = ({"id": i, "type": "user_login"} for i in range(1000))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_json_document_round_trips(self):
+        path = self.path("report.json")
+        with StreamingReportWriter(path, chunk_size=128) as writer:
+            writer.write_section("timestamp", "2024-12-25T10:00:00")
+            count = writer.write_records("audit_logs", self.records)
+            writer.write_records("security_events", [])
+
+        with open(path) as f:
+            report = json.load(f)
+        self.assertEqual(count, 1000)
+        self.assertEqual(len(report["audit_logs"]), 1000)
+        self.assertEqual(report["security_events"], [])
+        self.assertEqual(report["timestamp"], "2024-12-25T10:00:00")
+
+    def test_ndjson_gzip_output(self):
+        path = self.path(StreamingReportWriter.filename("report", "ndjson", "gzip"))
+        self.assertTrue(path.endswith(".ndjson.gz"))
+        with StreamingReportWriter(path, "ndjson", "gzip") as writer:
+            writer.write_section("mfa_status", {"total_users": 2})
+            writer.write_records("audit_logs", self.records)
+
+        with gzip.open(path, "rt") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 1001)
+        self.assertEqual(lines[0], {"section": "mfa_status", "data": {"total_users": 2}})
+        self.assertEqual(lines[-1]["data"]["id"], 999)
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            StreamingReportWriter(self.path("report.xml"), output_format="xml")
+
+    def test_compression_settings_from_cache_config(self):
+        self.assertEqual(load_compression_settings(CACHE_CONFIG), "gzip")
+        self.assertIsNone(load_compression_settings(self.path("missing.yaml")))
+
+
+if __name__ == "__main__":
+    unittest.main()
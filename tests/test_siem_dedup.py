@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for bounded-memory SIEM event deduplication
+"""
+
+import unittest
+
+from siem_dedup import BloomFilter, DedupIntegrator, EventDeduplicator, RotatingBloomFilter, event_key
+
+
+def activity(qualifier, time="2024-12-25T10:00:00.000Z"):
+    return {"id": {"applicationName": "admin", "time": time, "uniqueQualifier": qualifier}}
+
+
+class FlakyIntegrator:
+    def __init__(self, results):
+        self.results = list(results)
+        self.sent = []
+
+    def send_logs(self, logs):
+        self.sent.append(logs)
+        return self.results.pop(0)
+
+
+class TestEventDeduplication(unittest.TestCase):
+    """Test exact and probabilistic duplicate detection"""
+
+    def test_event_key_prefers_activity_id(self):
+        self.assertEqual(event_key(activity("q1")), "admin|2024-12-25T10:00:00.000Z|q1")
+        self.assertEqual(event_key({"id": "evt_001"}), "evt_001")
+        self.assertEqual(event_key({"a": 1, "b": 2}), event_key({"b": 2, "a": 1}))
+
+    def test_filter_drops_repeats_across_and_within_batches(self):
+        dedup = EventDeduplicator()
+        first = dedup.filter([activity("q1"), activity("q1"), activity("q2")])
+        self.assertEqual(len(first), 2)
+        dedup.mark_delivered(first)
+        self.assertEqual(dedup.filter([activity("q2"), activity("q3")]), [activity("q3")])
+        self.assertEqual(dedup.report()["exact_hits"], 1)
+
+    def test_bloom_filter_remembers_keys_evicted_from_lru(self):
+        dedup = EventDeduplicator(lru_size=10, bloom_capacity=10_000)
+        dedup.mark_delivered([activity(f"q{i}") for i in range(100)])
+        report = dedup.report()
+        self.assertEqual(report["recent_keys"], 10)
+        self.assertEqual(dedup.filter([activity("q0")]), [])
+        self.assertEqual(dedup.report()["bloom_hits"], 1)
+
+    def test_false_positive_rate_stays_near_target(self):
+        bloom = BloomFilter(10_000, error_rate=0.01)
+        for i in range(10_000):
+            bloom.add(f"seen-{i}")
+        false_positives = sum(1 for i in range(10_000) if f"unseen-{i}" in bloom)
+        self.assertLess(false_positives / 10_000, 0.03)
+        self.assertAlmostEqual(bloom.estimated_false_positive_rate(), 0.01, delta=0.005)
+
+    def test_rotation_forgets_oldest_generation(self):
+        bloom = RotatingBloomFilter(capacity=5, generations=2, rotation_seconds=3600)
+        bloom.add("old")
+        for i in range(10):
+            bloom.add(f"key-{i}")
+        self.assertNotIn("old", bloom)
+        self.assertEqual(bloom.rotations, 2)
+
+    def test_failed_send_is_not_marked_delivered(self):
+        siem = FlakyIntegrator([False, True, True])
+        integrator = DedupIntegrator(siem)
+        batch = [activity("q1"), activity("q2")]
+        self.assertFalse(integrator.send_logs(batch))
+        self.assertTrue(integrator.send_logs(batch))
+        self.assertTrue(integrator.send_logs(batch))
+        self.assertEqual(len(siem.sent), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the pre-ship SIEM event filter
+"""
+
+import os
+import unittest
+
+from siem_filter import EventFilter, FilteringIntegrator
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "configs", "siem_config.yaml")
+
+
+class RecordingIntegrator:
+    def __init__(self):
+        self.sent = []
+
+    def send_logs(self, logs):
+        self.sent.append(logs)
+        return True
+
+
+class TestEventFilter(unittest.TestCase):
+    """Test severity, type and pattern filtering plus projection"""
+
+    def setUp(self):
+        self.event_filter = EventFilter(
+            min_severity="medium",
+            included_event_types=["security_alert", "internal_audit_run", "data_export"],
+            excluded_patterns=["internal_audit.*"],
+            include_fields=["event_type", "severity", "email", "debug_info"],
+            exclude_fields=["debug_info"],
+        )
+
+    def test_filters_and_projects(self):
+        events = [
+            {"event_type": "security_alert", "severity": "HIGH", "email": "a@example.com",
+             "debug_info": "x", "internal_id": 7},
+            {"event_type": "security_alert", "severity": "low"},
+            {"event_type": "user_login", "severity": "critical"},
+            {"event_type": "internal_audit_run", "severity": "high"},
+            {"type": "data_export", "severity": "Medium"},
+        ]
+        passed = self.event_filter.apply(events)
+        self.assertEqual(passed, [
+            {"event_type": "security_alert", "severity": "HIGH", "email": "a@example.com"},
+            {"severity": "Medium"},
+        ])
+        stats = self.event_filter.stats
+        self.assertEqual(stats["dropped_severity"], 1)
+        self.assertEqual(stats["dropped_type"], 1)
+        self.assertEqual(stats["dropped_pattern"], 1)
+        self.assertEqual(stats["passed"], 2)
+
+    def test_missing_severity_uses_default(self):
+        self.assertEqual(EventFilter().apply([{"type": "anything"}]), [{"type": "anything"}])
+        self.assertEqual(EventFilter(min_severity="high").apply([{"type": "anything"}]), [])
+
+    def test_unknown_or_oddly_cased_severity_uses_default(self):
+        events = [{"severity": "info"}, {"severity": "INFORMATIONAL"}, {"severity": "hIgH"}]
+        self.assertEqual(EventFilter(min_severity="low").apply(events), events)
+        self.assertEqual(EventFilter(min_severity="high").apply(events), [{"severity": "hIgH"}])
+        self.assertEqual(
+            EventFilter(min_severity="medium", default_severity="medium").apply(events[:2]), events[:2]
+        )
+
+    def test_config_driven_filter(self):
+        event_filter = EventFilter.from_config(CONFIG_PATH)
+        passed = event_filter.apply([
+            {"event_type": "user_login", "severity": "low", "email": "a@example.com", "internal_id": 1},
+            {"event_type": "system_maintenance_window", "severity": "low"},
+        ])
+        self.assertEqual(passed, [{"email": "a@example.com", "event_type": "user_login", "severity": "low"}])
+
+    def test_filtering_integrator_skips_empty_batches(self):
+        siem = RecordingIntegrator()
+        integrator = FilteringIntegrator(siem, EventFilter(min_severity="critical"))
+        self.assertTrue(integrator.send_logs([{"type": "user_login", "severity": "low"}]))
+        self.assertEqual(siem.sent, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
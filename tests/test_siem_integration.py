@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for SIEM integrators
+"""
+
+import json
+import unittest
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("requests")
+
+from siem_integration import (  # noqa: E402
+    ChronicleIntegrator,
+    PartialDelivery,
+    SplunkIntegrator,
+    get_siem_integrator,
+)
+
+
+class TestSplunkBatching(unittest.TestCase):
+    """Test HEC batching over a pooled session"""
+
+    def setUp(self):
+        self.integrator = SplunkIntegrator({
+            "api_endpoint": "https://splunk.example.com:8088",
+            "api_key": "test_token",
+            "batch_settings": {"max_batch_size": 10, "max_batch_bytes": 4096},
+        })
+        self.integrator.session = MagicMock()
+        self.events = [{"id": i, "type": "user_login"} for i in range(25)]
+
+    def test_events_are_packed_into_batches(self):
+        self.assertTrue(self.integrator.send_logs(self.events))
+        calls = self.integrator.session.post.call_args_list
+        self.assertEqual(len(calls), 3)
+
+        body = calls[0].kwargs["data"].decode("utf-8")
+        events = [json.loads(line) for line in body.split("\n")]
+        self.assertEqual(len(events), 10)
+        self.assertEqual(events[0]["sourcetype"], "google:workspace:audit")
+        self.assertEqual(events[0]["event"], {"id": 0, "type": "user_login"})
+
+    def test_byte_limit_splits_batches(self):
+        self.integrator.batch_settings["max_batch_bytes"] = 200
+        self.integrator.send_logs(self.events)
+        for call in self.integrator.session.post.call_args_list:
+            self.assertLessEqual(len(call.kwargs["data"]), 200)
+
+    def test_http_error_returns_false(self):
+        self.integrator.session.post.return_value.raise_for_status.side_effect = Exception("503")
+        self.assertFalse(self.integrator.send_logs(self.events))
+
+    def test_failure_after_first_batch_is_partial_delivery(self):
+        ok, failed = MagicMock(), MagicMock()
+        failed.raise_for_status.side_effect = Exception("503")
+        self.integrator.session.post.side_effect = [ok, failed]
+        result = self.integrator.send_logs(self.events)
+        self.assertIsInstance(result, PartialDelivery)
+        self.assertFalse(result)
+        self.assertEqual(result.undelivered, self.events[10:])
+        self.assertEqual(self.integrator.session.post.call_count, 2)
+
+    def test_factory_rejects_unknown_platform(self):
+        with self.assertRaises(ValueError):
+            get_siem_integrator("qradar", {})
+
+
+class TestChronicleChunking(unittest.TestCase):
+    """Test byte-budgeted batchCreate chunks and partial delivery reporting"""
+
+    def setUp(self):
+        self.integrator = ChronicleIntegrator({
+            "api_endpoint": "https://chronicle.example.com",
+            "api_key": "test_token",
+            "batch_settings": {"max_batch_bytes": 2048, "max_retries": 2, "retry_delay_seconds": 0},
+        })
+        self.integrator.session = MagicMock()
+        self.events = [{"id": i, "type": "file_shared", "severity": "HIGH"} for i in range(100)]
+
+    def posted_entries(self):
+        entries = []
+        for call in self.integrator.session.post.call_args_list:
+            self.assertLessEqual(len(call.kwargs["data"]), 2048)
+            entries.extend(json.loads(call.kwargs["data"])["logEntries"])
+        return entries
+
+    def test_entries_are_chunked_under_byte_budget(self):
+        self.assertTrue(self.integrator.send_logs(self.events))
+        self.assertGreater(self.integrator.session.post.call_count, 1)
+        entries = self.posted_entries()
+        self.assertEqual(len(entries), 100)
+        self.assertEqual(entries[0]["severity"], "HIGH")
+        self.assertEqual(json.loads(entries[0]["logMessage"])["type"], "file_shared")
+
+    def test_failed_chunk_is_reported_as_partial_delivery(self):
+        ok = MagicMock()
+        failing = MagicMock()
+        failing.raise_for_status.side_effect = Exception("503")
+        self.integrator.session.post.side_effect = [ok, failing] + [ok] * 50
+        self.integrator.config["max_concurrency"] = 1
+
+        result = self.integrator.send_logs(self.events)
+        self.assertIsInstance(result, PartialDelivery)
+        self.assertFalse(result)
+        failed_chunk = json.loads(self.integrator.session.post.call_args_list[1].kwargs["data"])
+        self.assertEqual(
+            [json.loads(e["logMessage"])["id"] for e in failed_chunk["logEntries"]],
+            [log["id"] for log in result.undelivered],
+        )
+        self.assertNotIn(0, [log["id"] for log in result.undelivered])
+
+    def test_failed_chunk_is_not_retried_internally(self):
+        self.integrator.session.post.return_value.raise_for_status.side_effect = Exception("413")
+        self.assertIs(self.integrator.send_logs(self.events[:1]), False)
+        self.assertEqual(self.integrator.session.post.call_count, 1)
+
+if __name__ == "__main__":
+    unittest.main()
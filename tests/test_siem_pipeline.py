@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Tests for the buffered SIEM shipping pipeline
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import pytest
+
+pytest.importorskip("requests")
+
+from siem_integration import EncodedEvent, PartialDelivery, dumps  # noqa: E402
+from siem_pipeline import MultiSinkIntegrator, SIEMShippingPipeline, SinkRejection  # noqa: E402
+
+
+class RecordingIntegrator:
+    """Integrator stand-in that records batches and can fail on demand."""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.batch_settings = {"max_batch_size": 10, "flush_interval_seconds": 0.05,
+                               "max_retries": 3, "retry_delay_seconds": 0.001}
+        self.batches = []
+        self.failures = failures
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def send_logs(self, logs):
+        time.sleep(self.delay)
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                return False
+            self.batches.append(list(logs))
+            return True
+
+
+class TestSIEMShippingPipeline(unittest.TestCase):
+    """Test batching, retries and backpressure"""
+
+    def test_batches_by_size_and_flushes_remainder(self):
+        integrator = RecordingIntegrator()
+        with SIEMShippingPipeline(integrator) as pipeline:
+            self.assertEqual(pipeline.submit_many({"id": i} for i in range(25)), 25)
+            self.assertTrue(pipeline.flush(timeout=5))
+
+        sizes = sorted(len(batch) for batch in integrator.batches)
+        self.assertEqual(sum(sizes), 25)
+        self.assertLessEqual(max(sizes), 10)
+        self.assertEqual(pipeline.stats["delivered"], 25)
+
+    def test_flush_interval_ships_partial_batch(self):
+        integrator = RecordingIntegrator()
+        with SIEMShippingPipeline(integrator) as pipeline:
+            pipeline.submit({"id": "evt_001"})
+            time.sleep(0.6)
+            self.assertEqual(integrator.batches, [[{"id": "evt_001"}]])
+
+    def test_retries_then_delivers(self):
+        integrator = RecordingIntegrator(failures=2)
+        with SIEMShippingPipeline(integrator) as pipeline:
+            pipeline.submit({"id": 1})
+            pipeline.flush(timeout=5)
+        self.assertEqual(pipeline.stats["retries"], 2)
+        self.assertEqual(pipeline.stats["delivered"], 1)
+
+    def test_exhausted_retries_call_on_failure(self):
+        failed = []
+        integrator = RecordingIntegrator(failures=10)
+        with SIEMShippingPipeline(integrator, max_retries=1, on_failure=failed.append) as pipeline:
+            pipeline.submit({"id": 1})
+            pipeline.flush(timeout=5)
+        self.assertEqual(failed, [[{"id": 1}]])
+        self.assertEqual(pipeline.stats["failed"], 1)
+
+    def test_partial_delivery_resends_only_undelivered(self):
+        integrator = RecordingIntegrator()
+        calls = []
+
+        def send_logs(logs):
+            calls.append([e["id"] for e in logs])
+            if len(calls) == 1:
+                integrator.batches.append(logs[:3])
+                return PartialDelivery(logs[3:])
+            integrator.batches.append(list(logs))
+            return True
+
+        integrator.send_logs = send_logs
+        with SIEMShippingPipeline(integrator) as pipeline:
+            pipeline.submit_many({"id": i} for i in range(5))
+            pipeline.flush(timeout=5)
+        self.assertEqual(calls, [[0, 1, 2, 3, 4], [3, 4]])
+        self.assertEqual(pipeline.stats["delivered"], 5)
+        self.assertEqual(pipeline.stats["retries"], 1)
+
+    def test_full_queue_rejects_non_blocking_submit(self):
+        integrator = RecordingIntegrator(delay=0.2)
+        pipeline = SIEMShippingPipeline(integrator, max_queue_size=5, max_in_flight=1, batch_size=1)
+        for i in range(5):
+            self.assertTrue(pipeline.submit({"id": i}))
+        self.assertFalse(pipeline.submit({"id": 5}, block=False))
+        self.assertEqual(pipeline.stats["rejected"], 1)
+
+
+class TestMultiSinkIntegrator(unittest.TestCase):
+    """Test fan-out to several SIEM sinks"""
+
+    def test_sinks_share_encoded_events(self):
+        splunk, chronicle = RecordingIntegrator(), RecordingIntegrator()
+        with MultiSinkIntegrator({"splunk": splunk, "chronicle": chronicle}) as multi:
+            self.assertTrue(multi.send_logs([{"id": i} for i in range(15)]))
+            self.assertTrue(multi.flush(timeout=5))
+
+        splunk_events = [event for batch in splunk.batches for event in batch]
+        chronicle_events = [event for batch in chronicle.batches for event in batch]
+        self.assertEqual(len(splunk_events), 15)
+        self.assertTrue(all(isinstance(event, EncodedEvent) for event in splunk_events))
+        self.assertEqual({id(e) for e in splunk_events}, {id(e) for e in chronicle_events})
+        self.assertEqual(dumps(splunk_events[0]), splunk_events[0].raw)
+
+    def test_slow_sink_does_not_block_fast_sink(self):
+        fast, slow = RecordingIntegrator(), RecordingIntegrator(delay=0.5)
+        multi = MultiSinkIntegrator({"fast": fast, "slow": slow}, max_queue_size=5,
+                                    max_in_flight=1, batch_size=1)
+        started = time.monotonic()
+        accepted = multi.send_logs([{"id": i} for i in range(20)])
+        self.assertTrue(multi.pipelines["fast"].flush(timeout=5))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+        self.assertFalse(accepted)
+        report = multi.report()
+        self.assertGreater(report["slow"]["rejected"], 0)
+        self.assertEqual(report["fast"]["delivered"] + report["fast"]["rejected"], 20)
+        multi.close(timeout=5)
+
+    def test_rejected_events_are_resent_to_their_sink_only(self):
+        fast, slow = RecordingIntegrator(), RecordingIntegrator(delay=0.2)
+        multi = MultiSinkIntegrator({"fast": fast, "slow": slow}, max_queue_size=5,
+                                    max_in_flight=1, batch_size=1)
+        result = multi.send_logs([{"id": i} for i in range(20)])
+        self.assertIsInstance(result, SinkRejection)
+        self.assertFalse(result)
+        self.assertIn("slow", result.rejected)
+
+        retries = list(result.rejected.items())
+        while retries:
+            time.sleep(0.05)
+            name, events = retries.pop(0)
+            result = multi.send_logs(events, sinks=[name])
+            retries.extend(result.rejected.items() if not result else ())
+        self.assertTrue(multi.close(timeout=10))
+
+        for sink in (fast, slow):
+            ids = [event["id"] for batch in sink.batches for event in batch]
+            self.assertEqual(sorted(ids), list(range(20)))
+
+    def test_backlogged_sink_spools_instead_of_rejecting(self):
+        fast, slow = RecordingIntegrator(), RecordingIntegrator(delay=0.05)
+        with tempfile.TemporaryDirectory() as tmp:
+            multi = MultiSinkIntegrator(
+                {"fast": fast, "slow": slow}, max_queue_size=5, max_in_flight=1, batch_size=1,
+                spool_settings={"directory": tmp, "drain_retry_interval_seconds": 0.05}
+            )
+            self.assertIs(multi.send_logs([{"id": i} for i in range(20)]), True)
+            self.assertTrue(os.path.isdir(os.path.join(tmp, "slow")))
+
+            deadline = time.monotonic() + 10
+            while sum(map(len, slow.batches)) < 20 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertTrue(multi.close(timeout=5))
+
+        for sink in (fast, slow):
+            ids = [event["id"] for batch in sink.batches for event in batch]
+            self.assertEqual(sorted(ids), list(range(20)))
+
+
+if __name__ == "__main__":
+    unittest.main()
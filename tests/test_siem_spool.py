@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests for the durable SIEM spool
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import unittest
+from datetime import datetime
+
+from siem_integration import EncodedEvent, PartialDelivery, dumps
+from siem_spool import SegmentSpool, SpoolingIntegrator
+
+
+class FlakyIntegrator:
+    """Integrator stand-in that is down until ``up`` is set."""
+
+    def __init__(self, up=False):
+        self.up = up
+        self.received = []
+        self.batch_settings = {"max_batch_size": 4}
+
+    def send_logs(self, logs):
+        if not self.up:
+            return False
+        self.received.extend(logs)
+        return True
+
+
+class TestSegmentSpool(unittest.TestCase):
+    """Test append, replay and recovery"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_read_commit_and_restart(self):
+        spool = SegmentSpool(self.directory, segment_bytes=256)
+        spool.append([{"id": i} for i in range(20)])
+        events, position = spool.read_batch(8)
+        self.assertEqual([e["id"] for e in events], list(range(8)))
+        spool.commit(position)
+        spool.close()
+
+        spool = SegmentSpool(self.directory, segment_bytes=256)
+        events, position = spool.read_batch(100)
+        self.assertEqual([e["id"] for e in events], list(range(8, 20)))
+        spool.commit(position)
+        self.assertFalse(spool.has_backlog())
+        self.assertEqual(len(spool._segments), 1)
+        spool.close()
+
+    def test_torn_tail_is_truncated_on_open(self):
+        spool = SegmentSpool(self.directory)
+        spool.append([{"id": 1}, {"id": 2}])
+        spool.close()
+        segment = [n for n in os.listdir(self.directory) if n.startswith("segment-")][0]
+        with open(os.path.join(self.directory, segment), "ab") as f:
+            f.write(b"\x40\x00\x00\x00partial")
+
+        spool = SegmentSpool(self.directory)
+        spool.append([{"id": 3}])
+        events, _ = spool.read_batch(10)
+        self.assertEqual([e["id"] for e in events], [1, 2, 3])
+        spool.close()
+
+    def test_retention_drops_oldest_segments(self):
+        spool = SegmentSpool(self.directory, segment_bytes=200, max_total_bytes=600)
+        spool.append([{"id": i, "pad": "x" * 20} for i in range(100)])
+        self.assertLessEqual(spool.total_bytes(), 600 + 200)
+        self.assertGreater(spool.dropped, 0)
+        events, _ = spool.read_batch(1000)
+        self.assertEqual(len(events) + spool.dropped, 100)
+        self.assertEqual(events[-1]["id"], 99)
+        spool.close()
+
+    def test_events_with_datetimes_are_spooled(self):
+        spool = SegmentSpool(self.directory)
+        event = {"id": 1, "time": datetime(2026, 1, 2, 3, 4, 5)}
+        spool.append([event, EncodedEvent({"id": 2})])
+        events, _ = spool.read_batch(10)
+        # Rendered exactly as the integrators would ship it
+        self.assertEqual(events, [json.loads(dumps(event)), {"id": 2}])
+        self.assertTrue(events[0]["time"].startswith("2026-01-02"))
+        spool.close()
+
+    def test_commit_after_retention_dropped_the_batch(self):
+        spool = SegmentSpool(self.directory, segment_bytes=200, max_total_bytes=600)
+        spool.append([{"id": i, "pad": "x" * 20} for i in range(5)])
+        events, position = spool.read_batch(3)
+        spool.append([{"id": i, "pad": "x" * 20} for i in range(5, 100)])
+        self.assertGreater(spool._segments[0], position[0])
+
+        spool.commit(position)
+        self.assertIn(spool._cursor[0], spool._segments)
+        events, _ = spool.read_batch(1000)
+        self.assertEqual(events[-1]["id"], 99)
+        spool.close()
+
+    def test_appended_events_survive_a_process_kill(self):
+        script = textwrap.dedent(f"""
+            import os, sys
+            sys.path.insert(0, {os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")!r})
+            from siem_spool import SegmentSpool
+            spool = SegmentSpool({self.directory!r}, fsync_every=1000, fsync_interval=60)
+            spool.append([{{"id": i}} for i in range(10)])
+            os._exit(0)
+        """)
+        subprocess.run([sys.executable, "-c", script], check=True, timeout=60)
+
+        spool = SegmentSpool(self.directory)
+        events, _ = spool.read_batch(100)
+        self.assertEqual([e["id"] for e in events], list(range(10)))
+        spool.close()
+
+    def test_background_timer_fsyncs_idle_appends(self):
+        spool = SegmentSpool(self.directory, fsync_every=1000, fsync_interval=0.05)
+        spool.append([{"id": 1}])
+        deadline = time.monotonic() + 5
+        while spool._unsynced and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(spool._unsynced, 0)
+        spool.close()
+
+
+class TestSpoolingIntegrator(unittest.TestCase):
+    """Test spooling during an outage and draining afterwards"""
+
+    def test_outage_is_spooled_and_drained_in_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            siem = FlakyIntegrator()
+            spooling = SpoolingIntegrator(siem, SegmentSpool(directory), drain_rate=100000)
+            self.assertTrue(spooling.send_logs([{"id": 1}, {"id": 2}]))
+            siem.up = True
+            # New events queue behind the backlog to keep ordering
+            self.assertTrue(spooling.send_logs([{"id": 3}]))
+            self.assertEqual(siem.received, [])
+
+            self.assertEqual(spooling.drain(), 3)
+            self.assertEqual([e["id"] for e in siem.received], [1, 2, 3])
+            self.assertTrue(spooling.send_logs([{"id": 4}]))
+            self.assertEqual(siem.received[-1], {"id": 4})
+            spooling.close()
+
+    def test_partial_delivery_spools_only_undelivered(self):
+        with tempfile.TemporaryDirectory() as directory:
+            siem = FlakyIntegrator(up=True)
+            siem.send_logs = lambda logs: PartialDelivery(logs[2:])
+            spooling = SpoolingIntegrator(siem, SegmentSpool(directory), drain_rate=100000)
+            self.assertTrue(spooling.send_logs([{"id": i} for i in range(4)]))
+            events, _ = spooling.spool.read_batch(10)
+            self.assertEqual([e["id"] for e in events], [2, 3])
+            spooling.close()
+
+    def test_partial_drain_requeues_only_undelivered(self):
+        with tempfile.TemporaryDirectory() as directory:
+            siem = FlakyIntegrator()
+            spooling = SpoolingIntegrator(siem, SegmentSpool(directory), drain_rate=100000)
+            spooling.send_logs([{"id": i} for i in range(4)])
+            siem.send_logs = lambda logs: PartialDelivery(logs[1:2])
+            self.assertEqual(spooling.drain(), 3)
+            events, _ = spooling.spool.read_batch(10)
+            self.assertEqual([e["id"] for e in events], [1])
+            spooling.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
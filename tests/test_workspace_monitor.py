@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Tests for GoogleWorkspaceMonitor paging and the per-report dataset context
+"""
+
+import time
+import unittest
+
+import pytest
+
+pytest.importorskip("google.oauth2")
+
+from google_workspace_api_monitor import GoogleWorkspaceMonitor, ReportContext  # noqa: E402
+
+
+class FakeRequest:
+    def __init__(self, collection, page):
+        self.collection = collection
+        self.page = page
+
+    def execute(self):
+        self.collection.executed.append(self.page)
+        return self.collection.pages[self.page]
+
+
+class FakeCollection:
+    """Mimics a googleapiclient collection's list()/list_next() paging"""
+
+    def __init__(self, pages):
+        self.pages = [
+            {"activities": items, **({"nextPageToken": f"t{n + 1}"} if n + 1 < len(pages) else {})}
+            for n, items in enumerate(pages)
+        ]
+        self.params = None
+        self.executed = []
+
+    def list(self, **params):
+        self.params = params
+        return FakeRequest(self, 0)
+
+    def list_next(self, request, response):
+        if "nextPageToken" not in response:
+            return None
+        return FakeRequest(self, request.page + 1)
+
+
+class FakeReportsService:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def activities(self):
+        return self.collection
+
+
+def make_pages(count, size):
+    return [[{"id": f"{page}-{n}"} for n in range(size)] for page in range(count)]
+
+
+class TestIterPages(unittest.TestCase):
+    """Test nextPageToken following, prefetch and max_results truncation"""
+
+    def setUp(self):
+        self.monitor = GoogleWorkspaceMonitor.__new__(GoogleWorkspaceMonitor)
+
+    def test_follows_next_page_token_to_the_last_page(self):
+        collection = FakeCollection(make_pages(3, 2))
+        pages = list(self.monitor._iter_pages(collection, {"maxResults": 2}, "activities"))
+        self.assertEqual([len(p) for p in pages], [2, 2, 2])
+        self.assertEqual(pages[2][1]["id"], "2-1")
+        self.assertEqual(collection.executed, [0, 1, 2])
+
+    def test_next_page_is_prefetched_while_current_is_consumed(self):
+        collection = FakeCollection(make_pages(3, 2))
+        pages = self.monitor._iter_pages(collection, {}, "activities")
+        next(pages)
+        # Page 1 is requested without the consumer asking for it
+        deadline = time.monotonic() + 5
+        while 1 not in collection.executed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIn(1, collection.executed)
+        self.assertNotIn(2, collection.executed)
+        pages.close()
+
+    def test_closing_early_stops_fetching(self):
+        collection = FakeCollection(make_pages(5, 2))
+        pages = self.monitor._iter_pages(collection, {}, "activities")
+        next(pages)
+        pages.close()
+        self.assertLessEqual(len(collection.executed), 2)
+
+    def test_max_results_stops_paging_and_truncates(self):
+        collection = FakeCollection(make_pages(5, 4))
+        service = FakeReportsService(collection)
+        events = list(self.monitor.iter_audit_logs(
+            start_date="2026-01-01T00:00:00Z", page_size=4, max_results=6, service=service
+        ))
+        self.assertEqual([e["id"] for e in events], ["0-0", "0-1", "0-2", "0-3", "1-0", "1-1"])
+        self.assertEqual(collection.params["maxResults"], 4)
+        self.assertEqual(collection.executed, [0, 1])
+
+    def test_page_size_is_capped_by_max_results(self):
+        collection = FakeCollection(make_pages(1, 3))
+        service = FakeReportsService(collection)
+        list(self.monitor.iter_audit_logs(
+            start_date="2026-01-01T00:00:00Z", page_size=1000, max_results=3, service=service
+        ))
+        self.assertEqual(collection.params["maxResults"], 3)
+
+
+class FakeLoader:
+    def __init__(self, items):
+        self.items = items
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return list(self.items)
+
+    def stream(self):
+        self.calls += 1
+        yield from self.items
+
+
+class TestReportContext(unittest.TestCase):
+    """Test fetch-once sharing, hit counting, stream replay and invalidation"""
+
+    def setUp(self):
+        self.context = ReportContext()
+        self.loader = FakeLoader([{"id": 1}, {"id": 2}])
+
+    def test_get_fetches_once_and_counts_hits(self):
+        first = self.context.get("users", self.loader)
+        second = self.context.get("users", self.loader)
+        self.assertIs(first, second)
+        self.assertEqual(self.loader.calls, 1)
+        self.assertEqual(self.context.stats["users"]["fetches"], 1)
+        self.assertEqual(self.context.stats["users"]["hits"], 1)
+
+    def test_stream_does_not_retain_the_dataset(self):
+        self.assertEqual(list(self.context.stream("audit", self.loader.stream)), self.loader.items)
+        self.assertEqual(list(self.context.stream("audit", self.loader.stream)), self.loader.items)
+        self.assertEqual(self.loader.calls, 2)
+        self.assertEqual(self.context.stats["audit"]["fetches"], 2)
+        self.assertEqual(self.context.stats["audit"]["hits"], 0)
+
+    def test_stream_replays_a_materialized_dataset(self):
+        self.context.get("users", self.loader)
+        self.assertEqual(list(self.context.stream("users", self.loader.stream)), self.loader.items)
+        self.assertEqual(self.loader.calls, 1)
+        self.assertEqual(self.context.stats["users"]["hits"], 1)
+
+    def test_stream_is_lazy(self):
+        stream = self.context.stream("audit", self.loader.stream)
+        self.assertEqual(self.loader.calls, 0)
+        next(stream)
+        self.assertEqual(self.loader.calls, 1)
+
+    def test_invalidate_one_dataset(self):
+        other = FakeLoader([{"id": 3}])
+        self.context.get("users", self.loader)
+        self.context.get("groups", other)
+        self.context.invalidate("users")
+        self.context.get("users", self.loader)
+        self.context.get("groups", other)
+        self.assertEqual(self.loader.calls, 2)
+        self.assertEqual(other.calls, 1)
+        self.assertEqual(self.context.stats["users"]["fetches"], 2)
+
+    def test_invalidate_all(self):
+        self.context.get("users", self.loader)
+        self.context.invalidate()
+        self.context.invalidate("missing")
+        self.context.get("users", self.loader)
+        self.assertEqual(self.loader.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()